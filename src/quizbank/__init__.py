@@ -1,25 +1,48 @@
-"""Utility package for managing quiz question banks."""
-
-from .question_bank import QuestionBank, QuestionSelection
-from .cli import run_cli
-from .converters import convert_format2_to_format1, convert_embedded_question_format
-from .importers import extract_from_docx, extract_from_marked_text
-from .cleaners import prepend_prefix
-
-
-def run_gui() -> None:
-    from .gui import run_gui as _run_gui
-
-    _run_gui()
-
-__all__ = [
-    "QuestionBank",
-    "QuestionSelection",
-    "run_cli",
-    "run_gui",
-    "convert_format2_to_format1",
-    "convert_embedded_question_format",
-    "extract_from_docx",
-    "extract_from_marked_text",
-    "prepend_prefix",
-]
+"""Utility package for managing quiz question banks.
+
+Public names are imported lazily (PEP 562) so that ``import quizbank`` and
+the practice CLI do not pay for pandas, PyQt5 or python-docx up front.
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+
+_EXPORTS = {
+    "QuestionBank": ".question_bank",
+    "QuestionSelection": ".question_bank",
+    "BankChanges": ".question_bank",
+    "SQLiteQuestionBank": ".sqlite_bank",
+    "open_bank": ".question_bank",
+    "run_cli": ".cli",
+    "run_gui": ".gui",
+    "convert_format2_to_format1": ".converters",
+    "convert_embedded_question_format": ".converters",
+    "extract_from_docx": ".importers",
+    "iter_docx_questions": ".importers",
+    "extract_from_marked_text": ".importers",
+    "iter_marked_text": ".importers",
+    "prepend_prefix": ".cleaners",
+    "CleanRule": ".cleaners",
+    "clean_many": ".cleaners",
+    "grade_batch": ".grading",
+    "generate_papers": ".papers",
+    "export_papers": ".papers",
+    "FileWatcher": ".watcher",
+    "ProgressStore": ".progress",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,9 +1,47 @@
 from __future__ import annotations
 
-from .gui import run_gui
+import sys
+from typing import Callable, Optional
 
 
-def main() -> None:
+def _commands() -> dict[str, Callable[[Optional[list[str]]], None]]:
+    from .cli import (
+        run_clean,
+        run_cli,
+        run_convert,
+        run_db,
+        run_dedup,
+        run_grade,
+        run_loadtest,
+        run_papers,
+        run_search,
+        run_serve,
+    )
+
+    return {
+        "practice": run_cli,
+        "db": run_db,
+        "convert": run_convert,
+        "clean": run_clean,
+        "dedup": run_dedup,
+        "search": run_search,
+        "grade": run_grade,
+        "papers": run_papers,
+        "serve": run_serve,
+        "loadtest": run_loadtest,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        commands = _commands()
+        if argv[0] in commands:
+            commands[argv[0]](argv[1:])
+            return
+
+    from .gui import run_gui
+
     run_gui()
 
 
@@ -0,0 +1,8 @@
+"""Benchmarks for loading, practising, converting and importing banks.
+
+Run ``python -m quizbank.bench --help`` for options.
+"""
+
+from .runner import STAGES, Stage, compare, measure
+
+__all__ = ["STAGES", "Stage", "compare", "measure"]
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from .imports import check_import_budget
+from .runner import STAGES, compare, environment, measure
+
+
+def main(args: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m quizbank.bench", description="题库性能基准测试"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000], help="题目数量（可多个）"
+    )
+    parser.add_argument("--stages", nargs="+", choices=sorted(STAGES), help="只运行指定阶段")
+    parser.add_argument("--warmup", type=int, default=1, help="预热次数")
+    parser.add_argument("--repeat", type=int, default=5, help="计时重复次数")
+    parser.add_argument("--workdir", help="合成题库目录（可复用），默认使用临时目录")
+    parser.add_argument("--output", help="结果 JSON 输出路径")
+    parser.add_argument("--compare", help="与之前的结果 JSON 对比")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10, help="中位数变慢超过该比例视为回退"
+    )
+    parser.add_argument(
+        "--import-budget", action="store_true", help="只检查 CLI 启动路径的导入耗时预算"
+    )
+    ns = parser.parse_args(args)
+
+    if ns.import_budget:
+        failed = 0
+        print(f"{'module':<20} {'import (ms)':>12} {'budget':>8}  heavy")
+        for row in check_import_budget(repeat=ns.repeat):
+            failed += not row["ok"]
+            flag = "" if row["ok"] else "  <-- 超出预算"
+            print(
+                f"{row['module']:<20} {row['ms']:>12.1f} {row['budget_ms']:>8.0f}  "
+                f"{','.join(row['heavy']) or '-'}{flag}"
+            )
+        return 1 if failed else 0
+
+    stage_names = ns.stages or list(STAGES)
+    with tempfile.TemporaryDirectory(prefix="quizbank-bench-") as tmp:
+        workdir = Path(ns.workdir) if ns.workdir else Path(tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        results = []
+        mismatched = 0
+        print(
+            f"{'stage':<24} {'size':>9} {'median (s)':>11} {'min (s)':>10} {'peak (MiB)':>11} "
+            f"{'rows/s':>12}  baseline"
+        )
+        for size in ns.sizes:
+            for name in stage_names:
+                row = measure(STAGES[name], workdir, size, warmup=ns.warmup, repeat=ns.repeat)
+                results.append(row)
+                rate = row["rows_per_second"]
+                note = ""
+                if "speedup" in row:
+                    note = f"{row['baseline_median']:.4f}s，{row['speedup']:.1f}x"
+                    if not row["identical"]:
+                        mismatched += 1
+                        note += "  <-- 输出与旧实现不一致"
+                print(
+                    f"{name:<24} {size:>9} {row['median']:>11.4f} {row['min']:>10.4f} "
+                    f"{row['peak_kib'] / 1024:>11.1f} {f'{rate:,.0f}' if rate else '-':>12}  "
+                    f"{note or '-'}",
+                    flush=True,
+                )
+
+    payload = {"environment": environment(), "results": results}
+    if ns.output:
+        text = json.dumps(payload, indent=2, ensure_ascii=False)
+        Path(ns.output).write_text(text, encoding="utf-8")
+        print(f"结果已写入：{ns.output}")
+
+    if mismatched:
+        print(f"{mismatched} 个阶段的输出与旧实现不一致")
+        return 1
+
+    if ns.compare:
+        regressions = 0
+        print(f"\n{'stage':<24} {'size':>9} {'baseline':>10} {'current':>10} {'ratio':>7}")
+        for row in compare(results, Path(ns.compare), threshold=ns.threshold):
+            flag = "  <-- 回退" if row["regression"] else ""
+            regressions += row["regression"]
+            print(
+                f"{row['stage']:<24} {row['size']:>9} {row['baseline']:>10.4f} "
+                f"{row['current']:>10.4f} {row['ratio']:>6.2f}x{flag}"
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
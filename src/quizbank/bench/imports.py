@@ -0,0 +1,62 @@
+"""Import-time budget for the modules on the CLI startup path."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from typing import Optional
+
+# 冷启动预算（毫秒），只计模块导入，不含解释器自身启动
+IMPORT_BUDGET_MS: dict[str, float] = {
+    "quizbank": 30.0,
+    "quizbank.cli": 150.0,
+    "quizbank.__main__": 150.0,
+}
+
+# 这些重量级依赖不应出现在答题 CLI 的启动路径上
+HEAVY_MODULES: tuple[str, ...] = ("pandas", "numpy", "openpyxl", "PyQt5", "docx")
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def import_cost(module: str, *, repeat: int = 3) -> tuple[float, list[str]]:
+    """Best-of-``repeat`` cold import time in ms and the heavy modules it pulled in."""
+    best: Optional[float] = None
+    heavy: list[str] = []
+    for _ in range(max(1, repeat)):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        elapsed = float(output[0])
+        heavy = output[1].split(",") if len(output) > 1 else []
+        best = elapsed if best is None else min(best, elapsed)
+    return best or 0.0, heavy
+
+
+def check_import_budget(
+    budget: Optional[dict[str, float]] = None, *, repeat: int = 3
+) -> list[dict[str, object]]:
+    """Measure every module in ``budget``; rows with ``ok`` False are violations."""
+    rows = []
+    for module, limit in (budget or IMPORT_BUDGET_MS).items():
+        elapsed, heavy = import_cost(module, repeat=repeat)
+        rows.append(
+            {
+                "module": module,
+                "ms": elapsed,
+                "budget_ms": limit,
+                "heavy": heavy,
+                "ok": elapsed <= limit and not heavy,
+            }
+        )
+    return rows
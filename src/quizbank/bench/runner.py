@@ -0,0 +1,386 @@
+"""Stage definitions, timing and result comparison for ``python -m quizbank.bench``."""
+
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from . import synth
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A benchmark stage.
+
+    ``prepare`` builds inputs once per size, ``reset`` restores them before
+    every run (untimed) and ``run`` is the timed operation. ``cleanup``
+    releases what ``prepare`` opened; anything ``run`` returns with a
+    ``close`` method is closed after timing.
+
+    ``per_row`` stages process ``size`` questions per run and also report
+    rows per second. A ``baseline`` is an older implementation of ``run``;
+    it is timed on the same input and its result must equal the current one.
+    """
+
+    name: str
+    prepare: Callable[[Path, int], Any]
+    run: Callable[[Any], Any]
+    reset: Optional[Callable[[Any], None]] = None
+    cleanup: Optional[Callable[[Any], None]] = None
+    per_row: bool = False
+    baseline: Optional[Callable[[Any], Any]] = None
+
+
+def _bank_path(workdir: Path, size: int) -> Path:
+    path = workdir / f"bank-{size}.xlsx"
+    if not path.exists():
+        synth.write_format1_bank(path, size)
+    return path
+
+
+def _prepare_bank(workdir: Path, size: int):
+    from ..question_bank import QuestionBank
+
+    source = _bank_path(workdir, size)
+    # 单独的目录：重置时删除它的进度文件，不影响其他阶段
+    work = workdir / f"work-{size}" / source.name
+    work.parent.mkdir(exist_ok=True)
+    shutil.copyfile(source, work)
+    return {
+        "source": source,
+        "path": work,
+        "bank": QuestionBank(work, cache="off"),
+        "rng": random.Random(0),
+    }
+
+
+def _reset_bank(state) -> None:
+    from ..question_bank import QuestionBank
+    from ..utils import SIDECAR_DIR
+
+    state["bank"].close()
+    shutil.rmtree(state["path"].parent / SIDECAR_DIR, ignore_errors=True)
+    shutil.copyfile(state["source"], state["path"])
+    state["bank"] = QuestionBank(state["path"], cache="off")
+    state["rng"] = random.Random(0)
+
+
+def _close_bank(state) -> None:
+    state["bank"].close()
+
+
+def _prepare_cached(workdir: Path, size: int) -> Path:
+    from ..question_bank import QuestionBank
+
+    path = _bank_path(workdir, size)
+    QuestionBank(path, cache="rebuild").close()
+    return path
+
+
+def _select_many(state, draws: int = 1000) -> None:
+    bank, rng = state["bank"], state["rng"]
+    for _ in range(draws):
+        bank.select_question(rng)
+
+
+def _record_and_sync(state, answers: int = 100) -> None:
+    bank, rng = state["bank"], state["rng"]
+    for _ in range(answers):
+        selection = bank.select_question(rng)
+        if selection is None:
+            break
+        bank.record_correct(selection)
+        bank.sync()
+
+
+def _raw_file(writer: Callable[[Path, int], Path], suffix: str):
+    def prepare(workdir: Path, size: int) -> tuple[Path, Path]:
+        path = workdir / f"{writer.__name__}-{size}{suffix}"
+        if not path.exists():
+            writer(path, size)
+        return path, workdir / f"{writer.__name__}-{size}-out.xlsx"
+
+    return prepare
+
+
+def _raw_frame(writer: Callable[[Path, int], Path], *, header: Optional[int]):
+    """Read a synthetic sheet the way the converter does, so only its core is timed."""
+    prepare = _raw_file(writer, ".xlsx")
+
+    def prepare_frame(workdir: Path, size: int):
+        import pandas as pd
+
+        return pd.read_excel(prepare(workdir, size)[0], header=header, dtype=str)
+
+    return prepare_frame
+
+
+def _load(path: Path):
+    from ..question_bank import QuestionBank
+
+    return QuestionBank(path, cache="off")
+
+
+def _load_cached(path: Path):
+    from ..question_bank import QuestionBank
+
+    return QuestionBank(path, cache="auto")
+
+
+def _convert_format2(paths: tuple[Path, Path]):
+    from ..converters import convert_format2_to_format1
+
+    return convert_format2_to_format1(str(paths[0]), str(paths[1]))
+
+
+def _convert_embedded(paths: tuple[Path, Path]):
+    from ..converters import convert_embedded_question_format
+
+    return convert_embedded_question_format(str(paths[0]), str(paths[1]))
+
+
+def _convert_format2_stream(paths: tuple[Path, Path]):
+    from ..converters import convert_format2_to_format1
+
+    return convert_format2_to_format1(str(paths[0]), str(paths[1]), streaming=True)
+
+
+def _convert_embedded_stream(paths: tuple[Path, Path]):
+    from ..converters import convert_embedded_question_format
+
+    return convert_embedded_question_format(str(paths[0]), str(paths[1]), streaming=True)
+
+
+def _format2_frame(frame):
+    from ..converters import format2_to_format1_frame
+
+    return format2_to_format1_frame(frame)
+
+
+def _embedded_frame(frame):
+    from ..converters import embedded_to_format1_frame
+
+    return embedded_to_format1_frame(frame)
+
+
+def _legacy_format2_frame(frame):
+    from .legacy import legacy_format2_to_format1_frame
+
+    return legacy_format2_to_format1_frame(frame)
+
+
+def _legacy_embedded_frame(frame):
+    from .legacy import legacy_embedded_to_format1_frame
+
+    return legacy_embedded_to_format1_frame(frame)
+
+
+def _import_docx(paths: tuple[Path, Path]):
+    from ..importers import extract_from_docx
+
+    return extract_from_docx(paths[0])
+
+
+def _import_marked(paths: tuple[Path, Path]):
+    from ..importers import extract_from_marked_text
+
+    return extract_from_marked_text(paths[0])
+
+
+STAGES: dict[str, Stage] = {
+    stage.name: stage
+    for stage in (
+        Stage("load", lambda workdir, size: _bank_path(workdir, size), _load, per_row=True),
+        Stage("load_cached", _prepare_cached, _load_cached, per_row=True),
+        Stage("select_x1000", _prepare_bank, _select_many, cleanup=_close_bank),
+        Stage("record_sync_x100", _prepare_bank, _record_and_sync, _reset_bank, _close_bank),
+        Stage("save", _prepare_bank, lambda state: state["bank"].save(), cleanup=_close_bank),
+        Stage(
+            "convert_format2",
+            _raw_file(synth.write_format2_raw, ".xlsx"),
+            _convert_format2,
+            per_row=True,
+        ),
+        Stage(
+            "convert_embedded",
+            _raw_file(synth.write_embedded_raw, ".xlsx"),
+            _convert_embedded,
+            per_row=True,
+        ),
+        Stage(
+            "convert_format2_stream",
+            _raw_file(synth.write_format2_raw, ".xlsx"),
+            _convert_format2_stream,
+            per_row=True,
+        ),
+        Stage(
+            "convert_embedded_stream",
+            _raw_file(synth.write_embedded_raw, ".xlsx"),
+            _convert_embedded_stream,
+            per_row=True,
+        ),
+        Stage(
+            "format2_frame",
+            _raw_frame(synth.write_format2_raw, header=None),
+            _format2_frame,
+            per_row=True,
+            baseline=_legacy_format2_frame,
+        ),
+        Stage(
+            "embedded_frame",
+            _raw_frame(synth.write_embedded_raw, header=0),
+            _embedded_frame,
+            per_row=True,
+            baseline=_legacy_embedded_frame,
+        ),
+        Stage("import_docx", _raw_file(synth.write_docx, ".docx"), _import_docx, per_row=True),
+        Stage(
+            "import_marked",
+            _raw_file(synth.write_marked_text, ".txt"),
+            _import_marked,
+            per_row=True,
+        ),
+    )
+}
+
+
+def _time_runs(
+    stage: Stage, run: Callable[[Any], Any], state: Any, warmup: int, repeat: int
+) -> list[float]:
+    samples: list[float] = []
+    for i in range(warmup + repeat):
+        if stage.reset is not None:
+            stage.reset(state)
+        gc.collect()
+        start = time.perf_counter()
+        result = run(state)
+        elapsed = time.perf_counter() - start
+        _close(result)
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
+
+
+def measure(
+    stage: Stage, workdir: Path, size: int, *, warmup: int = 1, repeat: int = 5
+) -> dict[str, Any]:
+    """Time ``stage`` at ``size`` and record its peak traced allocation.
+
+    With a ``baseline`` the older implementation is timed the same way and
+    ``speedup`` and ``identical`` compare it with the current one.
+    """
+    state = stage.prepare(workdir, size)
+    baseline: list[float] = []
+    identical: Optional[bool] = None
+    try:
+        samples = _time_runs(stage, stage.run, state, warmup, repeat)
+
+        if stage.reset is not None:
+            stage.reset(state)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = stage.run(state)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        if stage.baseline is not None:
+            baseline = _time_runs(stage, stage.baseline, state, warmup, repeat)
+            if stage.reset is not None:
+                stage.reset(state)
+            identical = _same(result, stage.baseline(state))
+        _close(result)
+    finally:
+        if stage.cleanup is not None:
+            stage.cleanup(state)
+
+    median = statistics.median(samples)
+    row = {
+        "stage": stage.name,
+        "size": size,
+        "repeat": repeat,
+        "min": min(samples),
+        "median": median,
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "peak_kib": peak / 1024,
+        "rows_per_second": size / median if stage.per_row and median else None,
+    }
+    if baseline:
+        row["baseline_median"] = statistics.median(baseline)
+        row["speedup"] = row["baseline_median"] / median if median else None
+        row["identical"] = identical
+    return row
+
+
+def _same(current: Any, baseline: Any) -> bool:
+    equals = getattr(current, "equals", None)
+    if callable(equals):
+        # 两种实现的列 dtype 可能不同（object / string），只比较内容
+        return current.astype(object).equals(baseline.astype(object))
+    return current == baseline
+
+
+def _close(result: Any) -> None:
+    close = getattr(result, "close", None)
+    if callable(close):
+        close()
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def environment() -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(
+    current: list[dict[str, Any]], baseline_path: Path, *, threshold: float
+) -> list[dict[str, Any]]:
+    """Return ``median`` ratios against a previous JSON run, flagging regressions."""
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    previous = {(row["stage"], row["size"]): row for row in baseline.get("results", [])}
+    rows = []
+    for row in current:
+        old = previous.get((row["stage"], row["size"]))
+        if old is None or not old.get("median"):
+            continue
+        ratio = row["median"] / old["median"]
+        rows.append(
+            {
+                "stage": row["stage"],
+                "size": row["size"],
+                "baseline": old["median"],
+                "current": row["median"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            }
+        )
+    return rows
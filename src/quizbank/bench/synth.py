@@ -0,0 +1,127 @@
+"""Synthetic question banks in every input layout the package understands."""
+
+from __future__ import annotations
+
+import random
+import zipfile
+from pathlib import Path
+from typing import Iterator
+from xml.sax.saxutils import escape
+
+_STEMS = (
+    "马克思主义认为，实践的基本特征是（ ）",
+    "下列关于社会存在与社会意识关系的表述正确的是",
+    "在1912年成立的南京临时政府中，占有领导和主体地位的是",
+    "中国特色社会主义最本质的特征是",
+)
+_WORDS = (
+    "物质", "意识", "实践", "认识", "矛盾", "规律", "生产力", "生产关系", "上层建筑", "经济基础",
+)
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _question(rng: random.Random, i: int) -> tuple[str, list[str], str]:
+    stem = f"{rng.choice(_STEMS)}（第{i}题）"
+    options = ["".join(rng.choices(_WORDS, k=rng.randint(1, 3))) + str(i) for _ in "ABCD"]
+    answer = "".join(sorted(rng.sample("ABCD", rng.choice((1, 1, 1, 2, 3)))))
+    return stem, options, answer
+
+
+def _qtype(answer: str) -> str:
+    return "多选题" if len(answer) > 1 else "单选题"
+
+
+def _write_rows(path: Path, rows: Iterator[list[object]]) -> Path:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def write_format1_bank(path: Path, size: int, *, seed: int = 0, progress: bool = True) -> Path:
+    """Normalized 题目/选项/答案 bank, optionally with a 正确次数 column."""
+    rng = random.Random(seed)
+
+    def rows() -> Iterator[list[object]]:
+        yield ["题目", "选项", "答案", *(["正确次数"] if progress else [])]
+        for i in range(1, size + 1):
+            stem, options, answer = _question(rng, i)
+            qtype = _qtype(answer)
+            marked = (f"{letter}.{text}" for letter, text in zip("ABCD", options))
+            row = [f"{qtype}  {i}. {stem}", ", ".join([qtype, *marked]), answer]
+            if progress:
+                row.append(rng.randint(0, 3))
+            yield row
+
+    return _write_rows(path, rows())
+
+
+def write_format2_raw(path: Path, size: int, *, seed: int = 0) -> Path:
+    """Raw 格式2 export: title row, 标题/选项A-D header and a noisy answer column."""
+    rng = random.Random(seed)
+
+    def rows() -> Iterator[list[object]]:
+        yield ["题库导出", None, None, None, None, None, None]
+        yield ["标题", "选项A", "选项B", "选项C", "选项D", "正确答案", "解析"]
+        for i in range(1, size + 1):
+            stem, options, answer = _question(rng, i)
+            if rng.random() < 0.1:
+                answer = ",".join(answer.lower())
+            yield [stem, *options, answer, "解析：" + "".join(rng.choices(_WORDS, k=4))]
+
+    return _write_rows(path, rows())
+
+
+def _embedded_text(rng: random.Random, i: int) -> tuple[str, str]:
+    stem, options, answer = _question(rng, i)
+    marked = [f"{letter}.{text}" for letter, text in zip("ABCD", options)]
+    if rng.random() < 0.5:
+        text = f"{i}.{stem}\n" + "\n".join(marked) + f"\n（{_qtype(answer)}，2分）"
+    else:
+        text = f"{i}、{stem} " + " ".join(marked) + f"（{_qtype(answer)}）"
+    return text, answer
+
+
+def write_embedded_raw(path: Path, size: int, *, seed: int = 0) -> Path:
+    """Question text with options and type embedded in a single cell."""
+    rng = random.Random(seed)
+
+    def rows() -> Iterator[list[object]]:
+        yield ["题目", "答案"]
+        for i in range(1, size + 1):
+            yield list(_embedded_text(rng, i))
+
+    return _write_rows(path, rows())
+
+
+def write_docx(path: Path, size: int, *, seed: int = 0) -> Path:
+    """Minimal Word document: question paragraphs followed by ``正确答案：``."""
+    rng = random.Random(seed)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        with archive.open("word/document.xml", "w") as handle:
+            handle.write(b'<?xml version="1.0" encoding="UTF-8"?>')
+            handle.write(f'<w:document xmlns:w="{_W_NS}"><w:body>'.encode())
+            for i in range(1, size + 1):
+                text, answer = _embedded_text(rng, i)
+                paragraphs = [*text.split("\n"), f"正确答案：{answer}"]
+                for paragraph in paragraphs:
+                    handle.write(f"<w:p><w:r><w:t>{escape(paragraph)}</w:t></w:r></w:p>".encode())
+            handle.write(b"<w:sectPr/></w:body></w:document>")
+        archive.writestr("[Content_Types].xml", "<Types/>")
+    return path
+
+
+def write_marked_text(path: Path, size: int, *, seed: int = 0) -> Path:
+    """Numbered plain-text dump: ``N. stem`` / option lines / answer line."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as handle:
+        for i in range(1, size + 1):
+            stem, options, answer = _question(rng, i)
+            handle.write(f"{i}. {stem}\n")
+            handle.writelines(f"{letter}. {text}\n" for letter, text in zip("ABCD", options))
+            handle.write(f"{answer}\n")
+    return path
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from .utils import sidecar_path
+from .workbook import Table, read_xlsx_table
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CACHE_MODES: tuple[str, ...] = ("auto", "off", "rebuild")
+# 版本 2 起缓存的是纯 Python 列表，读取缓存不再需要导入 pandas
+_CACHE_VERSION = 2
+_HASH_CHUNK = 1 << 20
+
+
+def file_fingerprint(path: str | Path) -> tuple[str, int, int, str]:
+    """Identify a workbook by resolved path, size, mtime and content hash."""
+    source = Path(path).resolve()
+    stat = source.stat()
+    digest = hashlib.sha256()
+    with open(source, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return str(source), stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+
+def load_cached_table(path: str | Path) -> Optional[Table]:
+    cache_path = sidecar_path(path, "cache")
+    if not cache_path.exists():
+        return None
+    try:
+        with open(cache_path, "rb") as handle:
+            payload = pickle.load(handle)
+    except Exception:  # pylint: disable=broad-except
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != _CACHE_VERSION:
+        return None
+    if payload.get("key") != file_fingerprint(path):
+        return None
+    return payload.get("table")
+
+
+def store_cached_table(path: str | Path, table: Table) -> None:
+    cache_path = sidecar_path(path, "cache")
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"version": _CACHE_VERSION, "key": file_fingerprint(path), "table": table}
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    with open(tmp_path, "wb") as handle:
+        pickle.dump(payload, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
+
+def read_bank_table(path: str | Path, *, cache: str = "auto") -> Table:
+    """Read a workbook as a column table, going through the snapshot when allowed.
+
+    ``cache`` is ``"auto"`` (use and refresh the snapshot), ``"off"`` (always
+    parse the workbook) or ``"rebuild"`` (parse and overwrite the snapshot).
+    """
+    if cache not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode: {cache}")
+    if cache == "auto":
+        table = load_cached_table(path)
+        if table is not None:
+            return table
+    table = read_xlsx_table(path)
+    if cache != "off":
+        try:
+            store_cached_table(path, table)
+        except OSError:
+            pass
+    return table
+
+
+def read_bank_frame(path: str | Path, *, cache: str = "auto") -> "pd.DataFrame":
+    """:func:`read_bank_table` as a DataFrame, for callers that want pandas."""
+    import pandas as pd
+
+    return pd.DataFrame(read_bank_table(path, cache=cache))
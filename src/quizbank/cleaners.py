@@ -1,9 +1,128 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
+import re
+import time
+from typing import Iterable, Iterator, Optional, Sequence
+
 import pandas as pd
 
 
+@dataclass(frozen=True)
+class CleanRule:
+    """Remove ``trigger`` from cells of ``column`` that contain it and prepend ``prefix``.
+
+    ``trigger`` is a literal substring unless ``regex`` is set, in which case
+    every match of the pattern is removed.
+    """
+
+    column: str
+    trigger: str
+    prefix: str = ""
+    regex: bool = False
+
+    def __post_init__(self) -> None:
+        if not self.trigger:
+            raise ValueError("触发文本不能为空。")
+        if self.regex:
+            re.compile(self.trigger)
+
+    def apply(self, column: pd.Series) -> tuple[pd.Series, int]:
+        """Return the rewritten column and the number of cells whose value changed."""
+        present = column.notna()
+        text = column.astype(object).where(~present, column.astype(str))
+        contains = text.str.contains(self.trigger, regex=self.regex)
+        matched = present & contains.fillna(False).astype(bool)
+        if not matched.any():
+            return text, 0
+        replaced = self.prefix + text[matched].str.replace(self.trigger, "", regex=self.regex)
+        changed = int((replaced != text[matched]).sum())
+        text = text.copy()
+        text[matched] = replaced
+        return text, changed
+
+
+@dataclass
+class CleanResult:
+    path: str
+    changes: list[int] = field(default_factory=list)
+    written: bool = False
+    seconds: float = 0.0
+    error: str = ""
+
+    @property
+    def total(self) -> int:
+        return sum(self.changes)
+
+
+def apply_rules(df: pd.DataFrame, rules: Sequence[CleanRule]) -> tuple[pd.DataFrame, list[int]]:
+    """Apply ``rules`` in order; each rule sees the output of the previous ones."""
+    missing = [rule.column for rule in rules if rule.column not in df.columns]
+    if missing:
+        raise ValueError(f"列 '{missing[0]}' 不存在。")
+    counts: list[int] = []
+    for rule in rules:
+        df[rule.column], changed = rule.apply(df[rule.column])
+        counts.append(changed)
+    return df, counts
+
+
+def clean_file(
+    file_path: str | Path,
+    rules: Sequence[CleanRule],
+    *,
+    dry_run: bool = False,
+) -> CleanResult:
+    """Apply every rule to one workbook with a single read and at most one write.
+
+    The file is only rewritten when some cell changed and ``dry_run`` is off.
+    """
+    start = time.perf_counter()
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"未找到文件：{path}")
+
+    df, counts = apply_rules(pd.read_excel(path), rules)
+    written = False
+    if sum(counts) and not dry_run:
+        df.to_excel(path, index=False)
+        written = True
+    return CleanResult(str(path), counts, written, time.perf_counter() - start)
+
+
+def _clean_one(path: str, rules: Sequence[CleanRule], dry_run: bool) -> CleanResult:
+    try:
+        return clean_file(path, rules, dry_run=dry_run)
+    except Exception as exc:  # pylint: disable=broad-except
+        return CleanResult(path, error=str(exc))
+
+
+def clean_many(
+    paths: Iterable[str | Path],
+    rules: Sequence[CleanRule],
+    *,
+    dry_run: bool = False,
+    workers: Optional[int] = None,
+) -> Iterator[CleanResult]:
+    """Clean many workbooks in a process pool, yielding results as they finish.
+
+    ``workers=1`` cleans in-process. Errors are reported per file instead of
+    stopping the batch.
+    """
+    jobs = [str(path) for path in paths]
+    rules = list(rules)
+    if workers == 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield _clean_one(job, rules, dry_run)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_clean_one, job, rules, dry_run) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
 def prepend_prefix(
     file_path: str | Path,
     column_name: str,
@@ -13,21 +132,5 @@ def prepend_prefix(
 ) -> Path:
     """Remove a trigger string and prepend a prefix in the target column."""
     path = Path(file_path)
-    if not path.exists():
-        raise FileNotFoundError(f"未找到文件：{path}")
-
-    df = pd.read_excel(path)
-    if column_name not in df.columns:
-        raise ValueError(f"列 '{column_name}' 不存在。")
-
-    def transform(value):
-        if pd.isna(value):
-            return value
-        text = str(value)
-        if trigger in text:
-            return prefix + text.replace(trigger, "")
-        return text
-
-    df[column_name] = df[column_name].map(transform)
-    df.to_excel(path, index=False)
+    clean_file(path, [CleanRule(column_name, trigger, prefix)])
     return path
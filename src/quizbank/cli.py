@@ -2,10 +2,14 @@ from __future__ import annotations
 
 import argparse
 import random
+from pathlib import Path
 from typing import Optional
 
-from .question_bank import QuestionBank, QuestionSelection
-from .utils import answers_match, normalize_answers
+from . import instrument
+from .progress import DURABILITY_MODES
+from .question_bank import QuestionBank, QuestionSelection, load_records, open_bank
+from .scheduler import POLICIES
+from .utils import normalize_answers
 
 
 def print_question(selection: QuestionSelection) -> None:
@@ -26,14 +30,53 @@ def ask_for_answer() -> Optional[str]:
 
 def run_cli(args: Optional[list[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="交互式题库答题工具")
-    parser.add_argument("excel", help="题库 Excel 文件路径")
+    parser.add_argument("excel", help="题库文件路径（Excel 或 SQLite）")
     parser.add_argument("--max-correct", type=int, default=5, help="达到该次数后不再抽取该题")
     parser.add_argument("--seed", type=int, help="随机种子，方便重现测试")
+    parser.add_argument(
+        "--policy",
+        choices=tuple(POLICIES),
+        default="weighted",
+        help="抽题策略：weighted 按正确次数加权随机，sm2 按间隔重复的到期时间",
+    )
+    parser.add_argument(
+        "--durability",
+        choices=DURABILITY_MODES,
+        default="batch",
+        help="进度文件的落盘策略：always 每题同步，batch 批量同步，none 交由系统",
+    )
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument(
+        "--no-cache", dest="cache", action="store_const", const="off", help="不使用题库二进制缓存"
+    )
+    cache_group.add_argument(
+        "--rebuild-cache", dest="cache", action="store_const", const="rebuild", help="重新解析题库并重建缓存"
+    )
+    parser.set_defaults(cache="auto")
+    parser.add_argument("--profile", action="store_true", help="记录各操作耗时并在退出时输出 p50/p95/p99")
+    parser.add_argument(
+        "--profile-output", help="附加输出性能数据：.prof 为 cProfile，.json 为 speedscope"
+    )
     ns = parser.parse_args(args)
 
+    if ns.profile or ns.profile_output:
+        instrument.enable(output=ns.profile_output)
+
     rng = random.Random(ns.seed) if ns.seed is not None else random.Random()
-    bank = QuestionBank(ns.excel, max_correct=ns.max_correct)
+    bank = open_bank(
+        ns.excel,
+        max_correct=ns.max_correct,
+        durability=ns.durability,
+        cache=ns.cache,
+        policy=ns.policy,
+    )
+    try:
+        _practice(bank, rng)
+    finally:
+        bank.close()
+
 
+def _practice(bank: QuestionBank, rng: random.Random) -> None:
     while True:
         selection = bank.select_question(rng)
         if selection is None:
@@ -55,19 +98,389 @@ def run_cli(args: Optional[list[str]] = None) -> None:
             print("无效输入，请输入合法的选项(如 1、12、AB)。")
             continue
 
-        if answers_match(user_letters, selection.answer):
+        if selection.is_correct(user_letters):
             bank.record_correct(selection)
             print("回答正确！")
-            new_count = bank.data.at[selection.index, bank.correct_column]
+            new_count = bank.correct_count(selection.index)
             print(f"当前题目正确次数：{new_count}")
             if new_count >= bank.max_correct:
                 print("恭喜！该题已达到设定的正确次数阈值。")
         else:
+            bank.record_incorrect(selection)
             print(f"回答错误！正确答案是：{selection.answer}")
-            current = bank.data.at[selection.index, bank.correct_column]
+            current = bank.correct_count(selection.index)
             print(f"当前题目正确次数：{current}")
 
-        bank.save()
+        bank.sync()
+
+
+def run_db(args: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="quizbank db", description="SQLite 题库导入导出")
+    sub = parser.add_subparsers(dest="action", required=True)
+    import_parser = sub.add_parser("import", help="将 Excel 题库导入为 SQLite（保留正确次数）")
+    import_parser.add_argument("excel", nargs="+", help="Excel 题库文件")
+    import_parser.add_argument("--output-dir", help="输出目录，默认与题库同目录")
+    import_parser.add_argument("--overwrite", action="store_true", help="覆盖已存在的数据库")
+    export_parser = sub.add_parser("export", help="将 SQLite 题库导出为 Excel")
+    export_parser.add_argument("database", help="SQLite 题库文件")
+    export_parser.add_argument(
+        "output", nargs="?", help="输出 Excel 路径，默认为 <文件名>.export.xlsx"
+    )
+    export_parser.add_argument("--overwrite", action="store_true", help="覆盖已存在的 Excel 文件")
+    ns = parser.parse_args(args)
+
+    from .sqlite_bank import SQLITE_SUFFIX, export_xlsx, import_xlsx
+
+    try:
+        if ns.action == "import":
+            for excel in ns.excel:
+                target = None
+                if ns.output_dir:
+                    target = Path(ns.output_dir) / Path(excel).with_suffix(SQLITE_SUFFIX).name
+                print(f"已导入：{import_xlsx(excel, target, overwrite=ns.overwrite)}")
+        else:
+            print(f"已导出：{export_xlsx(ns.database, ns.output, overwrite=ns.overwrite)}")
+    except FileExistsError as exc:
+        parser.exit(1, f"{exc}（如需覆盖请加 --overwrite）\n")
+
+
+def run_serve(args: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="quizbank serve", description="多用户本地练习服务（HTTP/JSON）")
+    parser.add_argument("directory", nargs="?", default="题库", help="题库目录")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--max-correct", type=int, default=5, help="达到该次数后不再抽取该题")
+    parser.add_argument("--seed", type=int, help="随机种子，方便重现测试")
+    parser.add_argument("--flush-interval", type=float, default=10.0, help="进度落盘间隔（秒）")
+    ns = parser.parse_args(args)
+
+    import asyncio
+
+    from .server import PracticeServer
+
+    server = PracticeServer.from_directory(ns.directory, max_correct=ns.max_correct, seed=ns.seed)
+    try:
+        asyncio.run(server.serve(ns.host, ns.port, flush_interval=ns.flush_interval))
+    except KeyboardInterrupt:
+        print("服务已停止，进度已保存。")
+
+
+def run_loadtest(args: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="quizbank loadtest", description="练习服务压测客户端")
+    parser.add_argument("--host", default="127.0.0.1", help="服务地址")
+    parser.add_argument("--port", type=int, default=8765, help="服务端口")
+    parser.add_argument("--clients", type=int, default=200, help="并发用户数")
+    parser.add_argument("--rounds", type=int, default=50, help="每个用户的答题轮数")
+    parser.add_argument("--bank", help="题库名称，默认第一个")
+    ns = parser.parse_args(args)
+
+    import asyncio
+
+    from .server import run_load_test
+
+    result = asyncio.run(
+        run_load_test(ns.host, ns.port, clients=ns.clients, rounds=ns.rounds, bank=ns.bank)
+    )
+    print(
+        f"请求 {result['requests']} 次，错误 {result['errors']} 次，耗时 {result['seconds']:.2f}s，"
+        f"{result['requests_per_second']:.0f} req/s，"
+        f"p50 {result['p50_ms']:.2f}ms / p95 {result['p95_ms']:.2f}ms / p99 {result['p99_ms']:.2f}ms"
+    )
+
+
+def run_convert(args: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="quizbank convert", description="批量转换原始题库为标准格式")
+    parser.add_argument("inputs", nargs="+", help="题库文件、目录或通配符")
+    parser.add_argument("--output-dir", help="输出目录，默认与原文件同目录")
+    parser.add_argument(
+        "--converter",
+        choices=("auto", "format2", "embedded"),
+        default="auto",
+        help="转换器，auto 表示按表头自动识别",
+    )
+    parser.add_argument("--workers", type=int, help="并行进程数，默认等于 CPU 核数")
+    parser.add_argument("--force", action="store_true", help="即使输出文件较新也重新转换")
+    parser.add_argument(
+        "--stream", action="store_true", help="逐行读写，内存占用不随行数增长（适合几十万行的导出）"
+    )
+    ns = parser.parse_args(args)
+
+    import time
+
+    from .converters import convert_many, iter_bank_inputs
+
+    labels = {"converted": "完成", "skipped": "跳过", "up-to-date": "最新", "error": "失败"}
+    totals: dict[str, int] = {}
+    started = time.perf_counter()
+    for result in convert_many(
+        iter_bank_inputs(ns.inputs),
+        output_dir=ns.output_dir,
+        converter=ns.converter,
+        workers=ns.workers,
+        force=ns.force,
+        streaming=ns.stream,
+    ):
+        totals[result.status] = totals.get(result.status, 0) + 1
+        line = f"[{labels[result.status]}] {result.input_path} ({result.converter}, {result.seconds:.2f}s)"
+        if result.status == "converted":
+            line += f" -> {result.output_path}"
+        if result.error:
+            line += f"：{result.error}"
+        print(line)
+    summary = "，".join(f"{labels[key]} {value}" for key, value in totals.items())
+    print(f"共处理 {sum(totals.values())} 个文件（{summary}），总耗时 {time.perf_counter() - started:.2f}s")
+
+
+def run_clean(args: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="quizbank clean",
+        description="批量清洗题库：删除触发文本并在单元格前加前缀，每个文件只读写一次",
+    )
+    parser.add_argument("inputs", nargs="+", help="题库文件、目录或通配符")
+    parser.add_argument(
+        "--rule",
+        nargs=3,
+        action="append",
+        default=[],
+        metavar=("列", "触发文本", "前缀"),
+        help="包含触发文本的单元格：删去触发文本并加上前缀（可重复，按顺序执行）",
+    )
+    parser.add_argument(
+        "--regex-rule",
+        nargs=3,
+        action="append",
+        default=[],
+        metavar=("列", "正则", "前缀"),
+        help="同 --rule，但触发文本按正则表达式匹配（在全部 --rule 之后执行）",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="只统计每条规则会修改的单元格数")
+    parser.add_argument("--workers", type=int, help="并行进程数，默认等于 CPU 核数")
+    ns = parser.parse_args(args)
+
+    import re
+    import time
+
+    from .cleaners import CleanRule, clean_many
+    from .converters import iter_bank_inputs
+
+    try:
+        rules = [CleanRule(*rule) for rule in ns.rule] + [
+            CleanRule(*rule, regex=True) for rule in ns.regex_rule
+        ]
+    except (ValueError, re.error) as exc:
+        parser.error(f"规则无效：{exc}")
+    if not rules:
+        parser.error("至少需要一条 --rule 或 --regex-rule")
+
+    started = time.perf_counter()
+    totals = [0] * len(rules)
+    files = failed = 0
+    for result in clean_many(
+        iter_bank_inputs(ns.inputs, include_outputs=True),
+        rules,
+        dry_run=ns.dry_run,
+        workers=ns.workers,
+    ):
+        files += 1
+        if result.error:
+            failed += 1
+            print(f"[失败] {result.path}：{result.error}")
+            continue
+        totals = [a + b for a, b in zip(totals, result.changes)]
+        state = "已写回" if result.written else "未修改"
+        print(f"[{state}] {result.path}：{result.total} 处（{result.seconds:.2f}s）")
+    verb = "将修改" if ns.dry_run else "修改"
+    for rule, count in zip(rules, totals):
+        kind = "正则" if rule.regex else "文本"
+        print(f"  {rule.column} {kind} {rule.trigger!r} -> 前缀 {rule.prefix!r}：{verb} {count} 个单元格")
+    print(f"共处理 {files} 个文件（失败 {failed}），总耗时 {time.perf_counter() - started:.2f}s")
+
+
+def run_dedup(args: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="quizbank dedup", description="跨题库查找相似重复题")
+    parser.add_argument("inputs", nargs="+", help="题库文件、目录或通配符")
+    parser.add_argument("--threshold", type=float, default=0.7, help="估计 Jaccard 相似度阈值")
+    parser.add_argument("--num-perm", type=int, default=128, help="MinHash 签名长度")
+    parser.add_argument("--bands", type=int, default=32, help="LSH 分段数，需整除签名长度")
+    parser.add_argument("--shingle", type=int, default=3, help="按字切分的 n-gram 长度")
+    parser.add_argument("--show", type=int, default=20, help="最多显示的重复组数，0 表示全部")
+    parser.add_argument("--conflicts-only", action="store_true", help="只显示答案冲突的组")
+    parser.add_argument("--merge", help="输出去重后的题库（Excel）")
+    parser.add_argument(
+        "--drop-conflicts", action="store_true", help="合并时答案冲突的组也只保留一题"
+    )
+    ns = parser.parse_args(args)
+
+    import time
+
+    from .converters import iter_bank_inputs
+    from .dedup import find_duplicates, format_cluster, load_questions, merge_banks
+
+    started = time.perf_counter()
+    questions = load_questions(iter_bank_inputs(ns.inputs))
+    clusters = find_duplicates(
+        questions,
+        threshold=ns.threshold,
+        num_perm=ns.num_perm,
+        bands=ns.bands,
+        shingle_size=ns.shingle,
+    )
+    shown = [cluster for cluster in clusters if cluster.conflict or not ns.conflicts_only]
+    for cluster in shown[: ns.show or None]:
+        print(format_cluster(cluster))
+    duplicates = sum(len(cluster.members) - 1 for cluster in clusters)
+    conflicts = sum(cluster.conflict for cluster in clusters)
+    print(
+        f"共 {len(questions)} 题，{len(clusters)} 组相似题（可去除 {duplicates} 题），"
+        f"其中 {conflicts} 组答案冲突，耗时 {time.perf_counter() - started:.2f}s"
+    )
+    if ns.merge:
+        output, dropped = merge_banks(
+            questions, clusters, ns.merge, keep_conflicts=not ns.drop_conflicts
+        )
+        print(f"已写出去重题库：{output}（去除 {dropped} 题）")
+
+
+def run_search(args: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="quizbank search", description="在全部题库中搜索题目")
+    parser.add_argument("query", nargs="+", help="搜索内容（题干或选项中的文字）")
+    parser.add_argument("--dir", default="题库", help="题库目录")
+    parser.add_argument("--limit", type=int, default=20, help="最多显示的结果数")
+    ns = parser.parse_args(args)
+
+    import time
+
+    from .search import SearchIndex
+
+    index = SearchIndex.from_directory(ns.dir)
+    started = time.perf_counter()
+    rebuilt = index.refresh()
+    if rebuilt:
+        print(f"已更新 {len(rebuilt)} 个题库的索引（{time.perf_counter() - started:.2f}s）")
+    query = " ".join(ns.query)
+    started = time.perf_counter()
+    hits = index.search(query, limit=ns.limit, refresh=False)
+    elapsed = (time.perf_counter() - started) * 1000
+    for hit in hits:
+        print(f"\n[{hit.location}] {hit.stem}")
+        for letter, text in hit.options:
+            print(f"  {letter}. {text}")
+        print(f"  答案：{hit.answer}")
+    print(f"\n共 {len(hits)} 条结果（检索 {len(index)} 题，耗时 {elapsed:.1f}ms）")
+
+
+def run_grade(args: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="quizbank grade", description="批量批改答题表（每行一名学生，每列一道题）"
+    )
+    parser.add_argument("bank", help="题库文件（.xlsx 或 .sqlite）")
+    parser.add_argument("answers", help="答题表（.csv 或 .xlsx），表头为题号")
+    parser.add_argument("--id-column", help="学生标识列，默认为第一个非题号列")
+    parser.add_argument("--output", help="写出成绩与题目难度（.xlsx 两个工作表，或 .csv 两个文件）")
+    parser.add_argument("--show", type=int, default=10, help="显示正确率最低的题目数")
+    ns = parser.parse_args(args)
+
+    import statistics
+    import time
+
+    from .grading import grade_batch
+
+    started = time.perf_counter()
+    try:
+        report = grade_batch(ns.bank, ns.answers, id_column=ns.id_column)
+    except (OSError, ValueError) as exc:
+        parser.exit(1, f"批改失败：{exc}\n")
+    elapsed = time.perf_counter() - started
+
+    total = len(report.labels)
+    scores = report.scores
+    print(f"共 {len(report.students)} 名学生，{total} 道题，耗时 {elapsed:.2f}s")
+    if len(scores):
+        print(
+            f"平均分 {scores.mean():.1f} / {total}，最高 {scores.max()}，最低 {scores.min()}，"
+            f"中位数 {statistics.median(scores.tolist()):.1f}"
+        )
+    hardest = report.difficulty.argsort(kind="stable")[: ns.show]
+    if len(hardest):
+        print("正确率最低的题目：")
+    wrong = report.common_wrong()
+    for column in hardest.tolist():
+        record = report.records[column]
+        stem = record.stem if len(record.stem) <= 30 else record.stem[:30] + "…"
+        common = f"，最常见错选 {wrong[column]}" if wrong[column] else ""
+        print(
+            f"  {report.labels[column]:>5}  正确率 {report.difficulty[column]:.0%}"
+            f"（答案 {record.answer}{common}）{stem}"
+        )
+    if ns.output:
+        print(f"已写出：{report.write(ns.output)}")
+
+
+def _parse_quota(text: str) -> tuple[str, int]:
+    qtype, sep, number = text.partition("=")
+    if not sep or not qtype.strip() or not number.strip().isdigit():
+        raise argparse.ArgumentTypeError(f"格式应为 题型=数量，例如 单选题=30：{text}")
+    return qtype.strip(), int(number)
+
+
+def run_papers(args: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="quizbank papers", description="从题库批量生成随机试卷")
+    parser.add_argument("bank", help="题库文件（.xlsx 或 .sqlite）")
+    parser.add_argument("--count", type=int, default=1, help="试卷数量")
+    parser.add_argument(
+        "--quota",
+        type=_parse_quota,
+        action="append",
+        required=True,
+        metavar="题型=数量",
+        help="每卷各题型的题数，可重复，例如 --quota 单选题=30 --quota 多选题=20",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="随机种子，相同种子生成相同试卷")
+    parser.add_argument(
+        "--max-overlap", type=float, default=0.5, help="任意两卷共有题目占每卷题数的上限（0-1）"
+    )
+    parser.add_argument("--no-shuffle", action="store_true", help="不打乱选项顺序")
+    parser.add_argument("--output-dir", default="试卷", help="输出目录")
+    parser.add_argument(
+        "--format", nargs="+", choices=("xlsx", "docx"), default=["xlsx"], help="导出格式"
+    )
+    parser.add_argument("--workers", type=int, help="导出进程数，默认等于 CPU 核数")
+    ns = parser.parse_args(args)
+
+    import time
+
+    from .papers import export_papers, generate_papers, question_type
+
+    started = time.perf_counter()
+    records = load_records(ns.bank)
+    quota = dict(ns.quota)
+    try:
+        papers = generate_papers(
+            records,
+            ns.count,
+            quota,
+            seed=ns.seed,
+            max_overlap=ns.max_overlap,
+            shuffle=not ns.no_shuffle,
+        )
+    except ValueError as exc:
+        available: dict[str, int] = {}
+        for record in records:
+            qtype = question_type(record)
+            available[qtype] = available.get(qtype, 0) + 1
+        summary = "，".join(f"{qtype} {number}" for qtype, number in available.items())
+        parser.exit(1, f"生成失败：{exc}\n题库中的题型：{summary}\n")
+    generated = time.perf_counter() - started
+    try:
+        written = export_papers(papers, ns.output_dir, formats=ns.format, workers=ns.workers)
+    except ImportError as exc:
+        parser.exit(1, f"导出失败：{exc}\n")
+    used = len({id(question.record) for paper in papers for question in paper.questions})
+    print(
+        f"已生成 {len(papers)} 套试卷（每卷 {sum(quota.values())} 题，共用到 {used} 道不同的题），"
+        f"抽题 {generated:.2f}s，导出 {len(written)} 个文件共 {time.perf_counter() - started:.2f}s"
+    )
+    print(f"输出目录：{ns.output_dir}（答案汇总见 答案.xlsx）")
 
 
 if __name__ == "__main__":
@@ -1,12 +1,24 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from itertools import chain, islice
 from pathlib import Path
+import glob
 import os
 import re
-from typing import Optional
+import time
+from typing import Callable, Iterable, Iterator, Optional
 
 import pandas as pd
 
+from .workbook import write_xlsx_rows
+
+OUTPUT_SUFFIX = "_格式1"
+# 流式转换只看前若干行来定位表头和答案列
+_SAMPLE_ROWS = 200
+_STREAM_SUFFIXES = (".xlsx", ".xlsm")
+
 
 def _normalize_cell(value) -> str:
     if value is None or (isinstance(value, float) and pd.isna(value)) or pd.isna(value):
@@ -14,190 +26,438 @@ def _normalize_cell(value) -> str:
     return str(value).strip()
 
 
-def convert_format2_to_format1(
-    input_xlsx_path: str,
-    output_xlsx_path: str | None = None,
-    sheet_name: str | int | None = 0,
-) -> str:
-    """Convert the raw bank (格式2) into a normalized Excel file."""
-    input_path = Path(input_xlsx_path)
-    if not input_path.exists():
-        raise FileNotFoundError(f"Input file not found: {input_path}")
-
-    if output_xlsx_path is None:
-        base, ext = os.path.splitext(str(input_path))
-        output_xlsx_path = f"{base}_格式1{ext or '.xlsx'}"
+_FORMAT1_COLUMNS = ["题目", "选项", "答案"]
+_OPTION_LETTERS = ("A", "B", "C", "D")
 
-    df_raw = pd.read_excel(input_path, header=None, dtype=str, sheet_name=sheet_name)
 
-    def is_header_row(row) -> bool:
-        vals = [_normalize_cell(x) for x in row.tolist()]
-        return any(v in ("标题", "题目") for v in vals)
+def _normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Column-wise equivalent of :func:`_normalize_cell` over a whole frame."""
+    return df.apply(lambda column: column.fillna("").astype(str).str.strip())
 
-    header_idx = None
-    for i in range(len(df_raw)):
-        if is_header_row(df_raw.iloc[i]):
-            header_idx = i
-            break
-    if header_idx is None:
-        raise ValueError("未找到表头行（包含“标题/题目”）。")
 
-    header_vals = [_normalize_cell(x) for x in df_raw.iloc[header_idx].tolist()]
-    df = df_raw.iloc[header_idx + 1 :].copy()
-    df.columns = range(df.shape[1])
+def _format2_columns(header_vals: list[str]) -> tuple[int, dict[str, Optional[int]], set[int]]:
+    """Locate the title and option columns in a 格式2 header row."""
 
     def find_idx_exact(text: str) -> int | None:
-        for j, v in enumerate(header_vals):
-            if v == text:
-                return j
-        return None
+        return header_vals.index(text) if text in header_vals else None
 
     title_idx = find_idx_exact("标题") or find_idx_exact("题目")
     if title_idx is None:
         title_idx = 0
 
-    opt_idx = {
-        "A": find_idx_exact("选项A"),
-        "B": find_idx_exact("选项B"),
-        "C": find_idx_exact("选项C"),
-        "D": find_idx_exact("选项D"),
-    }
-
+    opt_idx = {letter: find_idx_exact(f"选项{letter}") for letter in _OPTION_LETTERS}
     used = {title_idx} | {i for i in opt_idx.values() if i is not None}
+    return title_idx, opt_idx, used
 
-    def norm_cell_upper(x) -> str:
-        return _normalize_cell(x).upper()
 
-    ans_pattern = re.compile(r"^[A-D]+$")
+def format2_to_format1_frame(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Vectorized core of :func:`convert_format2_to_format1` on a raw ``header=None`` sheet."""
+    norm = _normalize_frame(df_raw)
+    header_mask = norm.isin(("标题", "题目")).any(axis=1).to_numpy()
+    if not header_mask.any():
+        raise ValueError("未找到表头行（包含“标题/题目”）。")
+    header_idx = int(header_mask.argmax())
+
+    header_vals = norm.iloc[header_idx].tolist()
+    body = norm.iloc[header_idx + 1 :]
+    title_idx, opt_idx, used = _format2_columns(header_vals)
 
     best_ans_idx = None
     best_score = float("-inf")
-
-    for j in range(df.shape[1]):
+    for j in range(body.shape[1]):
         if j in used:
             continue
-        col = df.iloc[:, j].map(norm_cell_upper)
+        col = body.iloc[:, j].str.upper()
         non_empty = col[col != ""]
         if len(non_empty) == 0:
             continue
-        match_rate = non_empty.map(lambda s: bool(ans_pattern.match(re.sub(r"[^A-D]", "", s)))).mean()
-        avg_len = non_empty.map(len).mean()
+        match_rate = non_empty.str.contains("[A-D]", regex=True).mean()
+        avg_len = non_empty.str.len().mean()
         score = match_rate - 0.02 * max(0, avg_len - 4)
         if score > best_score:
             best_score = score
             best_ans_idx = j
 
     if best_ans_idx is None:
-        non_empty_counts = [
-            (j, df.iloc[:, j].notna().sum()) for j in range(df.shape[1]) if j not in used
-        ]
-        if not non_empty_counts:
-            raise ValueError("未找到答案列候选列。")
-        best_ans_idx = max(non_empty_counts, key=lambda t: (t[1], t[0]))[0]
+        filled = df_raw.iloc[header_idx + 1 :].notna().sum().tolist()
+        best_ans_idx = _fallback_answer_column(filled, used)
+
+    kept = body[body.iloc[:, title_idx] != ""]
+    answer = kept.iloc[:, best_ans_idx].str.upper().str.replace("[^A-D]", "", regex=True)
+    qtype = answer.str.len().le(1).map({True: "单选题", False: "多选题"})
+    numbers = pd.Series(range(1, len(kept) + 1), index=kept.index).astype(str)
+    stem = qtype + "  " + numbers + ". " + kept.iloc[:, title_idx]
+
+    options = qtype
+    for letter in _OPTION_LETTERS:
+        idx = opt_idx[letter]
+        if idx is None:
+            continue
+        value = kept.iloc[:, idx]
+        options = options.where(value == "", options + f", {letter}." + value)
+
+    out_df = pd.DataFrame({"题目": stem, "选项": options, "答案": answer}, columns=_FORMAT1_COLUMNS)
+    return out_df.reset_index(drop=True)
+
+
+def _stream_cell(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def iter_sheet_rows(input_xlsx_path: str | Path, sheet_name: str | int | None = 0) -> Iterator[tuple]:
+    """Yield raw cell values row by row from a read-only workbook."""
+    path = Path(input_xlsx_path)
+    if path.suffix.lower() not in _STREAM_SUFFIXES:
+        raise ValueError(f"流式转换只支持 .xlsx/.xlsm 文件：{path.name}")
 
-    rows: list[dict[str, str]] = []
-    for k in range(len(df)):
-        title = _normalize_cell(df.iat[k, title_idx])
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if isinstance(sheet_name, str):
+            sheet = workbook[sheet_name]
+        else:
+            sheet = workbook.worksheets[sheet_name or 0]
+        # 部分导出工具写入的 dimension 不准确，按实际单元格读取
+        sheet.reset_dimensions()
+        yield from sheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _fallback_answer_column(filled: list[int], used: set[int]) -> int:
+    """Candidate column with the most filled raw cells, the rightmost on a tie.
+
+    Used when no candidate has a non-blank value to score; ``filled[j]``
+    counts the cells of column ``j`` that were not empty in the sheet.
+    """
+    candidates = [(count, j) for j, count in enumerate(filled) if j not in used]
+    if not candidates:
+        raise ValueError("未找到答案列候选列。")
+    return max(candidates)[1]
+
+
+def _sample_answer_column(
+    body: list[list[str]], used: set[int], width: int, filled: list[int]
+) -> int:
+    """Score candidate answer columns on a bounded sample, like the frame version."""
+    best_ans_idx = None
+    best_score = float("-inf")
+    for j in range(width):
+        if j in used:
+            continue
+        non_empty = [row[j].upper() for row in body if row[j]]
+        if not non_empty:
+            continue
+        match_rate = sum(1 for value in non_empty if _RE_CHOICE.search(value)) / len(non_empty)
+        avg_len = sum(len(value) for value in non_empty) / len(non_empty)
+        score = match_rate - 0.02 * max(0, avg_len - 4)
+        if score > best_score:
+            best_score = score
+            best_ans_idx = j
+    if best_ans_idx is None:
+        best_ans_idx = _fallback_answer_column(filled, used)
+    return best_ans_idx
+
+
+def iter_format2_rows(rows: Iterable[Iterable]) -> Iterator[tuple[str, str, str]]:
+    """Stream 格式2 sheet rows into ``(题目, 选项, 答案)`` rows.
+
+    The header must appear within the first ``_SAMPLE_ROWS`` rows, and the
+    answer column is chosen from the ``_SAMPLE_ROWS`` rows after it; every
+    other row is converted and released as it is read.
+    """
+    rows = iter(rows)
+    sample: list[list[str]] = []
+    # 每行原始非空单元格的列号；只含空白的单元格也算，与 DataFrame 版的 notna 一致
+    present: list[list[int]] = []
+    header_idx: Optional[int] = None
+    for raw in rows:
+        raw = tuple(raw)
+        sample.append([_stream_cell(value) for value in raw])
+        present.append([j for j, value in enumerate(raw) if value is not None])
+        if header_idx is None:
+            if any(cell in ("标题", "题目") for cell in sample[-1]):
+                header_idx = len(sample) - 1
+            elif len(sample) >= _SAMPLE_ROWS:
+                break
+        elif len(sample) - header_idx > _SAMPLE_ROWS:
+            break
+    if header_idx is None:
+        raise ValueError("未找到表头行（包含“标题/题目”）。")
+
+    width = max(len(row) for row in sample)
+    for row in sample:
+        row.extend([""] * (width - len(row)))
+    title_idx, opt_idx, used = _format2_columns(sample[header_idx])
+    body = sample[header_idx + 1 :]
+    filled = [0] * width
+    for columns in present[header_idx + 1 :]:
+        for j in columns:
+            filled[j] += 1
+    answer_idx = _sample_answer_column(body, used, width, filled)
+    option_columns = [(letter, idx) for letter, idx in opt_idx.items() if idx is not None]
+    del sample, present
+
+    def cell(row: list[str], idx: int) -> str:
+        return row[idx] if idx < len(row) else ""
+
+    rest = ([_stream_cell(value) for value in raw] for raw in rows)
+    number = 0
+    for row in chain(body, rest):
+        title = cell(row, title_idx)
         if not title:
             continue
+        number += 1
+        answer = _RE_NON_CHOICE.sub("", cell(row, answer_idx).upper())
+        qtype = "单选题" if len(answer) <= 1 else "多选题"
+        options = qtype + "".join(
+            f", {letter}.{value}" for letter, idx in option_columns if (value := cell(row, idx))
+        )
+        yield f"{qtype}  {number}. {title}", options, answer
 
-        def get_opt(letter: str) -> str:
-            idx = opt_idx.get(letter)
-            if idx is None:
-                return ""
-            return _normalize_cell(df.iat[k, idx])
 
-        ans_raw = norm_cell_upper(df.iat[k, best_ans_idx])
-        answer = re.sub(r"[^A-D]", "", ans_raw)
-        qtype = "单选题" if len(answer) <= 1 else "多选题"
-        stem = f"{qtype}  {len(rows) + 1}. {title}"
+def convert_format2_to_format1(
+    input_xlsx_path: str,
+    output_xlsx_path: str | None = None,
+    sheet_name: str | int | None = 0,
+    *,
+    streaming: bool = False,
+) -> str:
+    """Convert the raw bank (格式2) into a normalized Excel file.
 
-        option_parts = []
-        for letter in ("A", "B", "C", "D"):
-            value = get_opt(letter)
-            if value:
-                option_parts.append(f"{letter}.{value}")
-        options = ", ".join([qtype, *option_parts]) if option_parts else qtype
+    With ``streaming`` the sheet is read row by row and written with a
+    write-only workbook, so memory stays flat for very large exports.
+    """
+    input_path = Path(input_xlsx_path)
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+
+    if output_xlsx_path is None:
+        base, ext = os.path.splitext(str(input_path))
+        output_xlsx_path = f"{base}{OUTPUT_SUFFIX}{ext or '.xlsx'}"
 
-        rows.append({"题目": stem, "选项": options, "答案": answer})
+    if streaming:
+        rows = iter_format2_rows(iter_sheet_rows(input_path, sheet_name))
+        write_xlsx_rows(output_xlsx_path, _FORMAT1_COLUMNS, rows)
+        return output_xlsx_path
 
-    out_df = pd.DataFrame(rows, columns=["题目", "选项", "答案"])
+    df_raw = pd.read_excel(input_path, header=None, dtype=str, sheet_name=sheet_name)
+    out_df = format2_to_format1_frame(df_raw)
     out_df.to_excel(output_xlsx_path, index=False)
     return output_xlsx_path
 
 
-_RE_NUM = re.compile(r'^\s*"?\s*(\d+)\s*[：:\.、]?\s*')
-_RE_TRAIL_QTYPE = re.compile(r'（[^（）]*?(单选题|多选题)[^（）]*?）\s*$', re.S)
-_RE_QTYPE_INNER = re.compile(r'（([^（）]*)）\s*$', re.S)
-_RE_OPT_LINE = re.compile(r'^\s*([A-D])\s*[\.\．、]\s*(.+?)\s*$')
-_RE_OPT_INLINE = re.compile(
-    r'([A-D])\s*[\.\．、]\s*'
-    r'(.+?)'
-    r'(?=(?:\s*[A-D]\s*[\.\．、]\s*)|$)',
-    re.S,
-)
+_RE_SPACES = re.compile(r'[ \t]+')
+_RE_NON_CHOICE = re.compile(r'[^A-D]')
+_RE_CHOICE = re.compile(r'[A-D]')
+# 选项标记：字母、可选空白、分隔符
+_RE_MARKER = re.compile(r'[A-D]\s*[\.\．、]')
+# 括号内同时出现时以多选题为准
+_DECLARED_QTYPES = ("多选题", "单选题")
 
 
 def _clean_text(text) -> str:
-    if text is None:
+    if text is None or text != text:  # None / NaN
         return ""
     value = str(text).strip()
     if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
         value = value[1:-1]
     value = value.replace("\r\n", "\n").replace("\r", "\n")
-    value = re.sub(r'[ \t]+', ' ', value)
+    value = _RE_SPACES.sub(' ', value)
     return value.strip()
 
 
-def _strip_trailing_qtype(text: str) -> str:
-    return _RE_TRAIL_QTYPE.sub('', text).strip()
+def _split_trailing_qtype(text: str) -> tuple[str, str]:
+    """Split a trailing ``（…单选题…）`` group off ``text``.
+
+    Returns the remaining text and the declared type, or ``(text, "")`` when
+    the text does not end with such a group.
+    """
+    if not text.endswith("）"):
+        return text, ""
+    open_pos = text.rfind("（")
+    if open_pos < 0:
+        return text, ""
+    inner = text[open_pos + 1 : -1]
+    if "）" in inner:
+        return text, ""
+    for qtype in _DECLARED_QTYPES:
+        if qtype in inner:
+            return text[:open_pos].strip(), qtype
+    return text, ""
+
+
+def _parse_embedded_cell(text: str, answer: str, fallback_index: int) -> tuple[str, str]:
+    """Parse one cleaned question cell into the ``题目`` and ``选项`` strings.
+
+    The cell is tokenized once into option markers (``A.`` / ``B、`` …);
+    the number prefix, the stem and both option layouts are then read off
+    the marker positions. Options are taken line by line (``A. xxx`` on its
+    own line); when no line yields an option the inline layout
+    (``A.xxx B.xxx`` in running text) is used instead, each option running
+    up to the whitespace before the next marker.
+    """
+    text, qtype = _split_trailing_qtype(text)
+    if not qtype:
+        qtype = "多选题" if len(answer) > 1 else "单选题"
+    size = len(text)
+    markers = [(match.start(), match.end()) for match in _RE_MARKER.finditer(text)]
+
+    # 题号：空白、可选引号、数字、可选分隔符
+    pos = 0
+    while pos < size and text[pos].isspace():
+        pos += 1
+    if pos < size and text[pos] == '"':
+        pos += 1
+        while pos < size and text[pos].isspace():
+            pos += 1
+    digits_end = pos
+    while digits_end < size and text[digits_end].isdecimal():
+        digits_end += 1
+    number = fallback_index
+    body_start = 0
+    if digits_end > pos:
+        number = int(text[pos:digits_end])
+        body_start = digits_end
+        while body_start < size and text[body_start].isspace():
+            body_start += 1
+        if body_start < size and text[body_start] in "：:.、":
+            body_start += 1
+        while body_start < size and text[body_start].isspace():
+            body_start += 1
+
+    # 题干到第一个前面有空白的选项标记为止
+    stem_end = size
+    for start, _ in markers:
+        if start > body_start and text[start - 1].isspace():
+            stem_end = start - 1
+            break
+    stem = text[body_start:stem_end].strip()
+    if "\n" in stem:
+        stem = " ".join(part for part in (line.strip() for line in stem.split("\n")) if part)
+
+    options = ["", "", "", ""]
+    for start, end in markers:
+        line_start = text.rfind("\n", 0, start) + 1
+        line_end = text.find("\n", start)
+        if line_end < 0:
+            line_end = size
+        if end > line_end or (line_start < start and not text[line_start:start].isspace()):
+            continue
+        value = text[end:line_end].strip()
+        if value:
+            options[ord(text[start]) - 65] = value
+    if not any(options):
+        following = 0
+        resume = 0
+        for start, end in markers:
+            if start < resume:
+                continue
+            value_start = end
+            while value_start < size and text[value_start].isspace():
+                value_start += 1
+            if value_start == size:
+                if end < size:
+                    # 标记后只剩空白：内容是最后一个空白字符，清理后为空
+                    options[ord(text[start]) - 65] = ""
+                    resume = size
+                continue
+            # 选项内容至少一个字符，延伸到下一个标记前的空白为止
+            while following < len(markers) and markers[following][0] <= value_start:
+                following += 1
+            value_end = size
+            if following < len(markers):
+                value_end = markers[following][0]
+                while value_end > value_start + 1 and text[value_end - 1].isspace():
+                    value_end -= 1
+            options[ord(text[start]) - 65] = " ".join(text[value_start:value_end].split())
+            resume = value_end
+
+    option_parts = [qtype]
+    for letter, value in zip("ABCD", options):
+        if value:
+            option_parts.append(f"{letter}.{value}")
+    return f"{qtype}  {number}. {stem}", ", ".join(option_parts)
+
+
+def iter_embedded_rows(cells: Iterable[tuple[object, object]]) -> Iterator[tuple[str, str, str]]:
+    """Parse ``(question, answer)`` cell pairs into ``(题目, 选项, 答案)`` rows lazily."""
+    kept = 0
+    for question_cell, answer_cell in cells:
+        cleaned_question = _clean_text(question_cell)
+        if not cleaned_question:
+            continue
+        kept += 1
+        answer = _RE_NON_CHOICE.sub('', _clean_text(answer_cell).upper())
+        prompt, options_text = _parse_embedded_cell(cleaned_question, answer, kept)
+        yield prompt, options_text, answer
+
 
+def embedded_to_format1_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Core of :func:`convert_embedded_question_format` on a ``dtype=str`` sheet."""
+    df = df.rename(columns=lambda col: str(col).strip())
 
-def _extract_qtype(text: str, answer: str) -> str:
-    match = _RE_QTYPE_INNER.search(text)
-    if match:
-        inner = match.group(1)
-        if "多选题" in inner:
-            return "多选题"
-        if "单选题" in inner:
-            return "单选题"
-    return "多选题" if len(answer) > 1 else "单选题"
+    question_col = "题目" if "题目" in df.columns else df.columns[0]
+    answer_col: Optional[str]
+    if "答案" in df.columns:
+        answer_col = "答案"
+    elif len(df.columns) > 1:
+        answer_col = df.columns[1]
+    else:
+        answer_col = None
 
+    questions = df[question_col].tolist()
+    if answer_col is not None:
+        answer_series = df[answer_col].fillna("").astype(str).str.upper()
+        answers = answer_series.str.replace(_RE_NON_CHOICE, "", regex=True).tolist()
+    else:
+        answers = [""] * len(questions)
 
-def _extract_number_and_stem(text: str, fallback_index: int) -> tuple[int, str]:
-    number = fallback_index
-    match = _RE_NUM.match(text)
-    if match:
-        number = int(match.group(1))
-        text = text[match.end():].lstrip()
-    opt_match = re.search(r'(?:\n|\s)([A-D])\s*[\.\．、]\s*', text)
-    if opt_match:
-        stem = text[:opt_match.start()].strip()
+    prompts: list[str] = []
+    option_texts: list[str] = []
+    kept_answers: list[str] = []
+    for question_cell, answer in zip(questions, answers):
+        cleaned_question = _clean_text(question_cell)
+        if not cleaned_question:
+            continue
+        prompt, options_text = _parse_embedded_cell(cleaned_question, answer, len(prompts) + 1)
+        prompts.append(prompt)
+        option_texts.append(options_text)
+        kept_answers.append(answer)
+
+    return pd.DataFrame(
+        {"题目": prompts, "选项": option_texts, "答案": kept_answers}, columns=_FORMAT1_COLUMNS
+    )
+
+
+def iter_embedded_sheet_rows(rows: Iterable[Iterable]) -> Iterator[tuple[str, str, str]]:
+    """Streaming counterpart of :func:`embedded_to_format1_frame` over raw sheet rows."""
+    rows = iter(rows)
+    header = [_stream_cell(value) for value in next(rows, ())]
+    question_idx = header.index("题目") if "题目" in header else 0
+    if "答案" in header:
+        answer_idx: Optional[int] = header.index("答案")
+    elif len(header) > 1:
+        answer_idx = 1
     else:
-        stem = text.strip()
-    stem = re.sub(r'\s*\n\s*', ' ', stem).strip()
-    return number, stem
-
-
-def _parse_options_block(text: str) -> dict[str, str]:
-    options = {letter: "" for letter in "ABCD"}
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    for line in lines:
-        match = _RE_OPT_LINE.match(line)
-        if match:
-            options[match.group(1)] = match.group(2).strip()
-    if all(value == "" for value in options.values()):
-        for match in _RE_OPT_INLINE.finditer(text):
-            letter = match.group(1)
-            value = re.sub(r'\s+', ' ', match.group(2)).strip()
-            options[letter] = value
-    return options
+        answer_idx = None
+
+    def cells() -> Iterator[tuple[object, object]]:
+        for row in rows:
+            question = row[question_idx] if question_idx < len(row) else None
+            answer = row[answer_idx] if answer_idx is not None and answer_idx < len(row) else None
+            yield question, answer
+
+    return iter_embedded_rows(cells())
 
 
 def convert_embedded_question_format(
     input_xlsx_path: str,
     output_xlsx_path: str | None = None,
     sheet_name: str | int | None = 0,
+    *,
+    streaming: bool = False,
 ) -> str:
     """Handle source Excel where question text includes options and metadata in single cell."""
 
@@ -207,51 +467,149 @@ def convert_embedded_question_format(
 
     if output_xlsx_path is None:
         base, ext = os.path.splitext(str(input_path))
-        output_xlsx_path = f"{base}_格式1{ext or '.xlsx'}"
+        output_xlsx_path = f"{base}{OUTPUT_SUFFIX}{ext or '.xlsx'}"
+
+    if streaming:
+        rows = iter_embedded_sheet_rows(iter_sheet_rows(input_path, sheet_name))
+        write_xlsx_rows(output_xlsx_path, _FORMAT1_COLUMNS, rows)
+        return output_xlsx_path
 
     df = pd.read_excel(input_path, sheet_name=sheet_name, dtype=str)
-    df.columns = [str(col).strip() for col in df.columns]
+    out_df = embedded_to_format1_frame(df)
+    out_df.to_excel(output_xlsx_path, index=False)
+    return output_xlsx_path
 
-    question_col = "题目" if "题目" in df.columns else df.columns[0]
-    answer_col: Optional[str]
-    if "答案" in df.columns:
-        answer_col = "答案"
-    elif len(df.columns) > 1:
-        answer_col = df.columns[1]
-    else:
-        answer_col = None
 
-    rows: list[dict[str, str]] = []
-    fallback_index = 0
-    for _, record in df.iterrows():
-        question_cell = record.get(question_col, "")
-        answer_cell = record.get(answer_col, "") if answer_col else ""
-        cleaned_question = _clean_text(question_cell)
-        if not cleaned_question:
-            continue
+CONVERTERS: dict[str, Callable[..., str]] = {
+    "format2": convert_format2_to_format1,
+    "embedded": convert_embedded_question_format,
+}
+_SNIFF_ROWS = 20
 
-        fallback_index += 1
-        answer = re.sub(r'[^A-D]', '', _clean_text(answer_cell).upper())
-        qtype = _extract_qtype(cleaned_question, answer)
-        question_wo_qtype = _strip_trailing_qtype(cleaned_question)
-        number, stem = _extract_number_and_stem(question_wo_qtype, fallback_index)
-        options = _parse_options_block(question_wo_qtype)
-
-        option_parts = [qtype]
-        for letter in "ABCD":
-            value = options[letter]
-            if value:
-                option_parts.append(f"{letter}.{value}")
-        options_text = ", ".join(option_parts)
-
-        rows.append(
-            {
-                "题目": f"{qtype}  {number}. {stem}",
-                "选项": options_text,
-                "答案": answer,
-            }
-        )
 
-    out_df = pd.DataFrame(rows, columns=["题目", "选项", "答案"])
-    out_df.to_excel(output_xlsx_path, index=False)
-    return output_xlsx_path
+def detect_format(
+    input_xlsx_path: str | Path, sheet_name: str | int | None = 0, *, streaming: bool = False
+) -> str:
+    """Guess the layout of a raw bank: ``format2``, ``embedded`` or ``format1``."""
+    if streaming:
+        rows = [
+            [_stream_cell(value) for value in row]
+            for row in islice(iter_sheet_rows(input_xlsx_path, sheet_name), _SNIFF_ROWS)
+        ]
+    else:
+        df = pd.read_excel(
+            input_xlsx_path, header=None, dtype=str, sheet_name=sheet_name, nrows=_SNIFF_ROWS
+        )
+        rows = [[_normalize_cell(value) for value in row] for row in df.to_numpy().tolist()]
+    cells = {cell for row in rows for cell in row}
+    if "标题" in cells or "选项A" in cells:
+        return "format2"
+    header = set(rows[0]) if rows else set()
+    if {"题目", "选项", "答案"} <= header:
+        return "format1"
+    return "embedded"
+
+
+@dataclass(frozen=True)
+class ConversionResult:
+    input_path: str
+    output_path: str
+    converter: str
+    status: str
+    seconds: float
+    error: str = ""
+
+
+def _default_output(input_path: Path, output_dir: Optional[Path]) -> Path:
+    name = f"{input_path.stem}{OUTPUT_SUFFIX}{input_path.suffix or '.xlsx'}"
+    return (output_dir or input_path.parent) / name
+
+
+def iter_bank_inputs(patterns: Iterable[str], *, include_outputs: bool = False) -> Iterator[Path]:
+    """Expand directories and glob patterns into workbook paths, skipping outputs by default."""
+    seen: set[Path] = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = sorted(path.glob("*.xls*"))
+        else:
+            candidates = sorted(Path(p) for p in glob.glob(pattern)) or [path]
+        for candidate in candidates:
+            if candidate.name.startswith("~$"):
+                continue
+            if candidate.stem.endswith(OUTPUT_SUFFIX) and not include_outputs:
+                continue
+            resolved = candidate.resolve()
+            if resolved not in seen:
+                seen.add(resolved)
+                yield candidate
+
+
+def _convert_one(
+    input_path: str, output_path: str, converter: str, sheet_name, streaming: bool = False
+) -> ConversionResult:
+    start = time.perf_counter()
+    status, error = "converted", ""
+    try:
+        if converter == "auto":
+            converter = detect_format(input_path, sheet_name, streaming=streaming)
+        if converter == "format1":
+            status = "skipped"
+        else:
+            CONVERTERS[converter](
+                input_path, output_path, sheet_name=sheet_name, streaming=streaming
+            )
+    except Exception as exc:  # pylint: disable=broad-except
+        status, error = "error", str(exc)
+    return ConversionResult(
+        input_path, output_path, converter, status, time.perf_counter() - start, error
+    )
+
+
+def convert_many(
+    inputs: Iterable[str | Path],
+    *,
+    output_dir: str | Path | None = None,
+    converter: str = "auto",
+    workers: Optional[int] = None,
+    force: bool = False,
+    sheet_name: str | int | None = 0,
+    streaming: bool = False,
+) -> Iterator[ConversionResult]:
+    """Convert many raw banks in a process pool, yielding results as they finish.
+
+    Outputs that are newer than their input are reported as ``up-to-date``
+    unless ``force`` is set. ``workers=1`` converts in-process. ``streaming``
+    is passed on to the converters.
+    """
+    if converter != "auto" and converter not in CONVERTERS:
+        raise ValueError(f"Unknown converter: {converter}")
+    out_dir = Path(output_dir) if output_dir is not None else None
+    if out_dir is not None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs: list[tuple[str, str, str, str | int | None, bool]] = []
+    for raw in inputs:
+        input_path = Path(raw)
+        output_path = _default_output(input_path, out_dir)
+        if not input_path.exists():
+            yield ConversionResult(
+                str(input_path), str(output_path), converter, "error", 0.0, "文件不存在"
+            )
+            continue
+        up_to_date = (
+            output_path.exists() and output_path.stat().st_mtime >= input_path.stat().st_mtime
+        )
+        if up_to_date and not force:
+            yield ConversionResult(str(input_path), str(output_path), converter, "up-to-date", 0.0)
+            continue
+        jobs.append((str(input_path), str(output_path), converter, sheet_name, streaming))
+
+    if workers == 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield _convert_one(*job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_convert_one, *job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,250 @@
+"""Near-duplicate detection across question banks with MinHash/LSH."""
+
+from __future__ import annotations
+
+import random
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from .cache import read_bank_table
+from .records import QuestionRecord, build_records
+from .workbook import write_xlsx_table
+
+MERSENNE_PRIME = 4294967311  # 最小的大于 2**32 的素数
+_MAX_HASH = np.uint64(MERSENNE_PRIME - 1)
+_GRAM_BASE = np.uint64(1 << 21)  # Unicode 码位不超过 21 位
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_RE_NOISE = re.compile(r"[\s\W_]+")
+
+
+@dataclass(frozen=True)
+class BankQuestion:
+    bank: Path
+    record: QuestionRecord
+
+    @property
+    def correct_texts(self) -> frozenset[str]:
+        """Normalized text of the correct options, independent of option order."""
+        letters = set(self.record.answer_letters)
+        texts = frozenset(
+            normalize_text(text) for letter, text in self.record.options if letter in letters
+        )
+        return texts or frozenset(self.record.answer_letters)
+
+
+@dataclass
+class DuplicateCluster:
+    indices: list[int]
+    members: list[BankQuestion]
+    similarity: float
+    conflict: bool = field(default=False)
+
+
+def normalize_text(text: str) -> str:
+    """Drop whitespace and punctuation so formatting changes do not matter."""
+    return _RE_NOISE.sub("", text).lower()
+
+
+def question_text(record: QuestionRecord) -> str:
+    return normalize_text(record.stem) + "|" + "|".join(
+        sorted(normalize_text(text) for _, text in record.options)
+    )
+
+
+def shingle_hashes(texts: Sequence[str], size: int = 3) -> tuple[np.ndarray, np.ndarray]:
+    """Hash every ``size``-character shingle of every text in one pass.
+
+    Returns the concatenated 32-bit hashes and the number of shingles per
+    text. Texts shorter than ``size`` count as a single shingle and empty
+    texts have none. Repeated shingles are kept; MinHash only needs the
+    minimum, so they do not change a signature.
+    """
+    padded = [text.ljust(size, "\0") if text else "" for text in texts]
+    lengths = np.fromiter((len(text) for text in padded), dtype=np.int64, count=len(padded))
+    counts = np.where(lengths > 0, lengths - size + 1, 0)
+    codes = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    text_starts = np.cumsum(lengths) - lengths
+    shingle_starts = np.cumsum(counts) - counts
+    positions = np.repeat(text_starts - shingle_starts, counts) + np.arange(counts.sum())
+    combined = np.zeros(len(positions), dtype=np.uint64)
+    for offset in range(size):
+        combined = combined * _GRAM_BASE + codes[positions + offset]
+    return (combined * _GOLDEN) >> np.uint64(32), counts
+
+
+class MinHasher:
+    """``num_perm`` universal hashes ``(a * x + b) mod p`` over 32-bit shingle hashes."""
+
+    def __init__(self, num_perm: int = 128, *, seed: int = 1) -> None:
+        rng = random.Random(seed)
+        # a < 2**32 keeps a * x + b inside uint64 for 32-bit x
+        self.a = np.array([rng.randrange(1, 1 << 32) for _ in range(num_perm)], dtype=np.uint64)
+        self.b = np.array([rng.randrange(0, 1 << 32) for _ in range(num_perm)], dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signatures(self, shingles: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Return an ``(n, num_perm)`` signature matrix; texts without shingles get all-max rows."""
+        signatures = np.full((len(counts), self.num_perm), _MAX_HASH, dtype=np.uint64)
+        nonempty = np.flatnonzero(counts)
+        if not len(nonempty):
+            return signatures
+        values, inverse = np.unique(shingles, return_inverse=True)
+        offsets = (np.cumsum(counts) - counts)[nonempty]
+        prime = np.uint64(MERSENNE_PRIME)
+        for column in range(self.num_perm):
+            # 只对不同的 shingle 计算一次哈希，再按出现位置展开
+            hashed = ((values * self.a[column] + self.b[column]) % prime)[inverse]
+            signatures[nonempty, column] = np.minimum.reduceat(hashed, offsets)
+        return signatures
+
+
+class _UnionFind:
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, left: int, right: int) -> None:
+        left, right = self.find(left), self.find(right)
+        if left != right:
+            self.parent[max(left, right)] = min(left, right)
+
+
+def load_questions(paths: Iterable[str | Path]) -> list[BankQuestion]:
+    questions: list[BankQuestion] = []
+    for path in paths:
+        path = Path(path)
+        table = read_bank_table(path)
+        rows = len(next(iter(table.values()), ()))
+        columns = [table.get(name, [""] * rows) for name in ("题目", "选项", "答案")]
+        records = build_records(range(rows), *columns)
+        questions.extend(BankQuestion(path, record) for record in records)
+    return questions
+
+
+def find_duplicates(
+    questions: Sequence[BankQuestion],
+    *,
+    threshold: float = 0.7,
+    num_perm: int = 128,
+    bands: int = 32,
+    shingle_size: int = 3,
+    seed: int = 1,
+) -> list[DuplicateCluster]:
+    """Group near-duplicate questions.
+
+    Signatures are split into ``bands`` bands; rows sharing any band are
+    candidates, and a candidate joins its bucket's first member only when the
+    estimated Jaccard similarity reaches ``threshold``. Clusters are the
+    connected components of those links, largest first.
+    """
+    if num_perm % bands:
+        raise ValueError("num_perm must be a multiple of bands")
+    shingles, counts = shingle_hashes([question_text(q.record) for q in questions], shingle_size)
+    signatures = MinHasher(num_perm, seed=seed).signatures(shingles, counts)
+    rows = num_perm // bands
+    candidates = np.flatnonzero(counts)
+    mixers = (np.arange(1, rows + 1, dtype=np.uint64) * _GOLDEN) | np.uint64(1)
+    heads: list[np.ndarray] = []
+    others: list[np.ndarray] = []
+    for band in range(bands):
+        # 把一段签名折叠成一个 64 位键；偶发碰撞会在相似度校验时被排除
+        keys = signatures[candidates, band * rows : (band + 1) * rows] @ mixers
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        boundary = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+        starts = np.flatnonzero(boundary)
+        bucket = np.cumsum(boundary) - 1
+        # 每个桶只与桶内第一题比较，避免桶内两两比较
+        followers = np.flatnonzero(~boundary)
+        heads.append(candidates[order[starts[bucket[followers]]]])
+        others.append(candidates[order[followers]])
+
+    links = _UnionFind(len(questions))
+    best: dict[int, float] = {}
+    if heads:
+        size = np.int64(len(questions))
+        pairs = np.unique(np.concatenate(heads).astype(np.int64) * size + np.concatenate(others))
+        for chunk in range(0, len(pairs), 65536):
+            head, other = np.divmod(pairs[chunk : chunk + 65536], size)
+            similarity = (signatures[head] == signatures[other]).mean(axis=1)
+            for left, right, value in zip(
+                head[similarity >= threshold].tolist(),
+                other[similarity >= threshold].tolist(),
+                similarity[similarity >= threshold].tolist(),
+            ):
+                links.union(left, right)
+                best[left] = min(best.get(left, 1.0), value)
+                best[right] = min(best.get(right, 1.0), value)
+
+    groups: dict[int, list[int]] = {}
+    for item in best:
+        groups.setdefault(links.find(item), []).append(item)
+    clusters = []
+    for members in groups.values():
+        members.sort()
+        answers = {questions[i].correct_texts for i in members}
+        clusters.append(
+            DuplicateCluster(
+                indices=members,
+                members=[questions[i] for i in members],
+                similarity=min(best[i] for i in members),
+                conflict=len(answers) > 1,
+            )
+        )
+    clusters.sort(key=lambda cluster: (-len(cluster.members), cluster.similarity))
+    return clusters
+
+
+def merge_banks(
+    questions: Sequence[BankQuestion],
+    clusters: Sequence[DuplicateCluster],
+    output_path: str | Path,
+    *,
+    keep_conflicts: bool = True,
+) -> tuple[Path, int]:
+    """Write a format-1 bank keeping one question per cluster.
+
+    The first member (earliest input bank, lowest row) is kept. Clusters whose
+    answers disagree are kept in full when ``keep_conflicts`` is set, so a
+    wrong answer never silently replaces a right one. Returns the output path
+    and the number of rows dropped.
+    """
+    dropped: set[int] = set()
+    for cluster in clusters:
+        if cluster.conflict and keep_conflicts:
+            continue
+        dropped.update(cluster.indices[1:])
+    kept = [q for i, q in enumerate(questions) if i not in dropped]
+    output = Path(output_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    write_xlsx_table(
+        output,
+        {
+            "题目": [q.record.prompt for q in kept],
+            "选项": [q.record.options_text for q in kept],
+            "答案": [q.record.answer for q in kept],
+        },
+    )
+    return output, len(questions) - len(kept)
+
+
+def format_cluster(cluster: DuplicateCluster, *, width: int = 40) -> str:
+    flag = "  [答案冲突]" if cluster.conflict else ""
+    lines = [f"{len(cluster.members)} 题，相似度 ≥ {cluster.similarity:.2f}{flag}"]
+    for member in cluster.members:
+        record = member.record
+        number: Optional[int] = record.number
+        label = f"{number}." if number is not None else f"第{record.index + 1}行"
+        stem = record.stem if len(record.stem) <= width else record.stem[:width] + "…"
+        lines.append(f"  - {member.bank.stem} {label} {stem}（答案 {record.answer}）")
+    return "\n".join(lines)
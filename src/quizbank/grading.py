@@ -0,0 +1,222 @@
+"""Headless grading of whole answer sheets against a bank."""
+
+from __future__ import annotations
+
+import csv
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .records import QuestionRecord
+from .utils import answer_mask, mask_to_letters
+from .workbook import Table, read_xlsx_table
+
+# 表头形如 "12"、"Q12"、"第12题"、"题12" 的列视为题目列
+_RE_QUESTION_COLUMN = re.compile(r"^\s*(?:第|题|Q|q|#)?\s*(\d+)\s*(?:题)?\s*$")
+_MASK_VALUES = 1 << 5  # 选项 A-E 共 5 位
+
+
+@dataclass
+class GradeReport:
+    """Result of :func:`grade_batch`.
+
+    ``masks`` holds each student's answer per question as an option bitmask
+    (0 for blank), ``keys`` the bank's answers in the same encoding.
+    """
+
+    students: list[str]
+    labels: list[str]
+    records: list[QuestionRecord]
+    masks: np.ndarray
+    keys: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.correct = (self.masks == self.keys) & (self.keys != 0)
+
+    @property
+    def scores(self) -> np.ndarray:
+        return self.correct.sum(axis=1)
+
+    @property
+    def blanks(self) -> np.ndarray:
+        return (self.masks == 0).sum(axis=1)
+
+    @property
+    def difficulty(self) -> np.ndarray:
+        """Share of students answering each question correctly (higher is easier)."""
+        if not len(self.students):
+            return np.zeros(len(self.labels))
+        return self.correct.mean(axis=0)
+
+    def choice_counts(self) -> np.ndarray:
+        """``(questions, 32)`` counts of every answer bitmask per question."""
+        questions = len(self.labels)
+        offsets = np.arange(questions, dtype=np.int64) * _MASK_VALUES
+        flat = (self.masks.astype(np.int64) + offsets).ravel()
+        counts = np.bincount(flat, minlength=questions * _MASK_VALUES)
+        return counts.reshape(questions, _MASK_VALUES)
+
+    def common_wrong(self) -> list[str]:
+        """Most frequent non-blank wrong answer per question, or ``""``."""
+        counts = self.choice_counts()
+        counts[:, 0] = 0
+        counts[np.arange(len(self.labels)), self.keys] = 0
+        top = counts.argmax(axis=1)
+        return [
+            "".join(mask_to_letters(int(mask))) if counts[row, mask] else ""
+            for row, mask in enumerate(top.tolist())
+        ]
+
+    def student_rows(self) -> list[list]:
+        total = len(self.labels)
+        return [
+            [student, score, total, round(score / total * 100, 1) if total else 0.0, blank]
+            for student, score, blank in zip(
+                self.students, self.scores.tolist(), self.blanks.tolist()
+            )
+        ]
+
+    def question_rows(self) -> list[list]:
+        return [
+            [label, record.number, record.answer, round(rate, 4), wrong, record.stem]
+            for label, record, rate, wrong in zip(
+                self.labels, self.records, self.difficulty.tolist(), self.common_wrong()
+            )
+        ]
+
+    def write(self, output_path: str | Path) -> Path:
+        """Write scores and difficulty to ``.xlsx`` (two sheets) or ``.csv`` (two files)."""
+        output = Path(output_path)
+        student_header = ["学生", "得分", "满分", "得分率%", "未作答"]
+        question_header = ["题目列", "题号", "答案", "正确率", "最常见错选", "题干"]
+        if output.suffix.lower() == ".csv":
+            questions = output.with_name(f"{output.stem}_题目{output.suffix}")
+            for path, header, rows in (
+                (output, student_header, self.student_rows()),
+                (questions, question_header, self.question_rows()),
+            ):
+                with open(path, "w", encoding="utf-8-sig", newline="") as handle:
+                    writer = csv.writer(handle)
+                    writer.writerow(header)
+                    writer.writerows(rows)
+            return output
+
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        for title, header, rows in (
+            ("成绩", student_header, self.student_rows()),
+            ("题目难度", question_header, self.question_rows()),
+        ):
+            sheet = workbook.create_sheet(title)
+            sheet.append(header)
+            for row in rows:
+                sheet.append(row)
+        workbook.save(output)
+        return output
+
+
+def read_answer_sheet(path: str | Path) -> Table:
+    """Read a ``.csv`` or Excel answer sheet into a column-major table."""
+    path = Path(path)
+    if path.suffix.lower() != ".csv":
+        return read_xlsx_table(path)
+    with open(path, "r", encoding="utf-8-sig", newline="") as handle:
+        rows = list(csv.reader(handle))
+    if not rows:
+        return {}
+    header, body = rows[0], rows[1:]
+    return {
+        name: [row[position] if position < len(row) else None for row in body]
+        for position, name in enumerate(header)
+    }
+
+
+def encode_answers(values: Sequence) -> np.ndarray:
+    """Bitmask-encode raw answer cells, normalizing each distinct value only once."""
+    codes: dict[object, int] = {}
+    uniques: list[int] = []
+
+    def code(value) -> int:
+        found = codes.get(value)
+        if found is None:
+            found = codes[value] = len(uniques)
+            text = "" if value is None or value != value else str(value)
+            uniques.append(answer_mask(text))
+        return found
+
+    inverse = np.fromiter((code(value) for value in values), dtype=np.int64, count=len(values))
+    return np.asarray(uniques, dtype=np.uint8)[inverse] if len(values) else np.zeros(0, np.uint8)
+
+
+def _question_positions(labels: Sequence[str], records: Sequence[QuestionRecord]) -> list[int]:
+    """Map numbered sheet columns to record positions.
+
+    Columns match the question number in the prompt when every record has a
+    distinct one, otherwise the 1-based row position in the bank.
+    """
+    numbers = [record.number for record in records]
+    by_number = len(set(numbers)) == len(numbers) and None not in numbers
+    lookup = (
+        {number: position for position, number in enumerate(numbers)}
+        if by_number
+        else {position + 1: position for position in range(len(records))}
+    )
+    positions, missing = [], []
+    for label in labels:
+        # 从 Excel 读到的表头可能是整数
+        label = str(label)
+        number = int(_RE_QUESTION_COLUMN.match(label).group(1))
+        if number in lookup:
+            positions.append(lookup[number])
+        else:
+            missing.append(label)
+    if missing:
+        raise ValueError(f"题库中没有这些题目：{', '.join(missing[:10])}")
+    return positions
+
+
+def grade_batch(
+    bank,
+    answers,
+    *,
+    id_column: Optional[str] = None,
+) -> GradeReport:
+    """Grade every student in ``answers`` against ``bank``.
+
+    ``bank`` is a bank path or any object with ``records``; ``answers`` is an
+    answer-sheet path or a column-major table with one row per student.
+    Columns headed by a question number are graded; ``id_column`` (default:
+    the first other column) names the students.
+    """
+    if isinstance(bank, (str, Path)):
+        from .question_bank import load_records
+
+        records = load_records(bank)
+    else:
+        records = list(bank.records)
+    table = read_answer_sheet(answers) if isinstance(answers, (str, Path)) else answers
+
+    labels = [name for name in table if _RE_QUESTION_COLUMN.match(str(name))]
+    if not labels:
+        raise ValueError("答题表中没有题号列（表头应为题号，例如 1、2、3）。")
+    if id_column is not None and id_column not in table:
+        raise ValueError(f"列 '{id_column}' 不存在。")
+    rows = len(next(iter(table.values()), ()))
+    others = [name for name in table if name not in labels]
+    id_name = id_column or (others[0] if others else None)
+    if id_name is None:
+        students = [str(row + 1) for row in range(rows)]
+    else:
+        students = ["" if value is None else str(value) for value in table[id_name]]
+
+    positions = _question_positions(labels, records)
+    picked = [records[position] for position in positions]
+    # 按列拼接后一次编码，全表相同的作答只规范化一次
+    cells = [value for label in labels for value in table[label]]
+    masks = encode_answers(cells).reshape(len(labels), rows).T.copy()
+    keys = np.fromiter((record.answer_mask for record in picked), dtype=np.uint8, count=len(picked))
+    return GradeReport(students, [str(label) for label in labels], picked, masks, keys)
@@ -4,16 +4,21 @@ import random
 import sys
 from pathlib import Path
 
-from PyQt5.QtCore import Qt, QSize
+from typing import Callable
+
+from PyQt5.QtCore import QObject, QRunnable, QSize, Qt, QThreadPool, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QIntValidator
 from PyQt5.QtWidgets import (
     QApplication,
     QCheckBox,
     QComboBox,
+    QDialog,
     QGroupBox,
     QHBoxLayout,
     QLineEdit,
     QLabel,
+    QListWidget,
+    QListWidgetItem,
     QMainWindow,
     QMessageBox,
     QPushButton,
@@ -22,12 +27,50 @@ from PyQt5.QtWidgets import (
     QWidget,
 )
 
-from .question_bank import QuestionBank, QuestionSelection
-from .utils import answers_match, normalize_answers, parse_options_text
+from . import instrument
+from .question_bank import SQLITE_SUFFIXES, QuestionBank, QuestionSelection, open_bank
+from .scheduler import POLICIES
+from .search import SearchHit, SearchIndex
+from .sqlite_bank import SQLiteQuestionBank
+from .utils import VALID_CHOICES, normalize_answers
+from .watcher import FileWatcher
 
 DEFAULT_WINDOW_SIZE = QSize(1024, 640)
 DEFAULT_FONT_POINT_SIZE = 13
 BASE_LOGICAL_DPI = 96.0
+WRITE_DEBOUNCE_MS = 1500
+
+
+class _TaskSignals(QObject):
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+
+class _WatchSignals(QObject):
+    changed = pyqtSignal(str)
+
+
+class _BankTask(QRunnable):
+    """Run ``func(report)`` on the window's I/O pool.
+
+    Results and progress messages carry the ``generation`` the task was
+    started with, so the window can ignore work it has since superseded.
+    """
+
+    def __init__(self, generation: int, func: Callable[[Callable[[str], None]], object]) -> None:
+        super().__init__()
+        self.generation = generation
+        self.func = func
+        self.signals = _TaskSignals()
+
+    def run(self) -> None:
+        try:
+            result = self.func(lambda text: self.signals.progress.emit(self.generation, text))
+        except Exception as exc:  # pylint: disable=broad-except
+            self.signals.failed.emit(self.generation, str(exc))
+        else:
+            self.signals.finished.emit(self.generation, result)
 
 
 class QuizWindow(QMainWindow):
@@ -42,13 +85,37 @@ class QuizWindow(QMainWindow):
 
         self.app_root = self._resolve_app_root()
         self.quiz_dir = self.app_root / "题库"
-        self.bank: QuestionBank | None = None
+        self.bank: QuestionBank | SQLiteQuestionBank | None = None
         self.current_selection: QuestionSelection | None = None
         self.current_recorded = False
+        self.current_missed = False
         self.awaiting_next = False
         self.rng = random.Random()
         self.current_bank_path: Path | None = None
         self.threshold_value = 5
+        self.search_index: SearchIndex | None = None
+        self._search_generation = 0
+        # 预取的下一题：(题库, 抽到的题, 解析好的选项)
+        self._prefetched: tuple[object, QuestionSelection, list[tuple[str, str]]] | None = None
+        # 抽题在 I/O 线程池里进行；预取失效或又换了一题后，旧的抽题结果按代数丢弃
+        self._prefetch_generation = 0
+        self._load_generation = 0
+        # 所有文件读写都在这个单线程池里按提交顺序执行，界面线程从不等待 I/O
+        self._io_pool = QThreadPool(self)
+        self._io_pool.setMaxThreadCount(1)
+        # 搜索索引另用一个单线程池：重建大索引时不耽误加载题目，连续搜索也不会并发重建
+        self._search_pool = QThreadPool(self)
+        self._search_pool.setMaxThreadCount(1)
+        self._tasks: set[_BankTask] = set()
+        self._generation = 0
+        self._write_timer = QTimer(self)
+        self._write_timer.setSingleShot(True)
+        self._write_timer.setInterval(WRITE_DEBOUNCE_MS)
+        self._write_timer.timeout.connect(self._flush_progress)
+        # 监视线程只负责发信号，刷新题库仍在 I/O 线程池中进行
+        self._watch_signals = _WatchSignals(self)
+        self._watch_signals.changed.connect(self._on_bank_file_changed)
+        self._watcher = FileWatcher(lambda path: self._watch_signals.changed.emit(str(path)))
 
         self._build_ui()
         self._load_available_banks()
@@ -81,12 +148,26 @@ class QuizWindow(QMainWindow):
         controls_row.addWidget(self.threshold_label)
         controls_row.addWidget(self.threshold_input)
 
+        self.policy_label = QLabel("抽题：")
+        self.policy_combo = QComboBox()
+        for policy, label in POLICIES.items():
+            self.policy_combo.addItem(label, policy)
+        self.policy_combo.currentIndexChanged.connect(self.handle_policy_changed)
+        controls_row.addWidget(self.policy_label)
+        controls_row.addWidget(self.policy_combo)
+
         self.reset_button = QPushButton("重置进度")
         self.reset_button.setEnabled(False)
         self.reset_button.clicked.connect(self.reset_progress)
         controls_row.addWidget(self.reset_button)
         controls_row.addStretch(1)
 
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("搜索全部题库（回车）")
+        self.search_input.setMinimumWidth(240)
+        self.search_input.returnPressed.connect(self.search_questions)
+        controls_row.addWidget(self.search_input)
+
         layout.addLayout(file_row)
         layout.addLayout(controls_row)
 
@@ -105,6 +186,13 @@ class QuizWindow(QMainWindow):
         self.options_box = QGroupBox("选项")
         self.options_layout = QVBoxLayout(self.options_box)
         self.options_layout.setSpacing(6)
+        # 选项控件复用：一次建好，换题时只改文字和可见性
+        self.options_notice = QLabel("此题没有提供选项，请在题干中查看。")
+        self.options_notice.hide()
+        self.options_layout.addWidget(self.options_notice)
+        self._option_pool: list[QCheckBox] = []
+        self.options_layout.addStretch(1)
+        self._grow_option_pool(len(VALID_CHOICES))
         self.scroll_layout.addWidget(self.options_box)
         self.scroll_layout.addStretch(1)
 
@@ -161,7 +249,12 @@ class QuizWindow(QMainWindow):
         excel_files = []
         if self.quiz_dir.exists() and self.quiz_dir.is_dir():
             excel_files = sorted(
-                [p for p in self.quiz_dir.glob("*.xls*") if p.is_file()],
+                [
+                    p
+                    for p in self.quiz_dir.iterdir()
+                    if p.is_file()
+                    and (p.suffix.lower().startswith(".xls") or p.suffix.lower() in SQLITE_SUFFIXES)
+                ],
                 key=lambda p: p.name.lower(),
             )
 
@@ -174,7 +267,10 @@ class QuizWindow(QMainWindow):
         else:
             self.bank_combo.addItem("请选择题库", None)
             for path in excel_files:
-                self.bank_combo.addItem(path.stem, path)
+                label = path.stem
+                if path.suffix.lower() in SQLITE_SUFFIXES:
+                    label = f"{label}（SQLite）"
+                self.bank_combo.addItem(label, path)
             self.bank_combo.setEnabled(True)
             self.feedback_label.setText("请选择题库开始练习。")
             self.answer_input.setPlaceholderText("请选择题库开始练习")
@@ -187,7 +283,6 @@ class QuizWindow(QMainWindow):
         self.submit_button.setEnabled(False)
         self.awaiting_next = False
         self.current_selection = None
-        self.option_checkboxes.clear()
         self._clear_options()
         self.question_label.setText("")
         self.correct_answer_label.setText("正确答案：")
@@ -204,28 +299,50 @@ class QuizWindow(QMainWindow):
             return
         self._load_bank(data)
 
-    def _load_bank(self, file_path: Path) -> None:
+    def _load_bank(self, file_path: Path, *, notice: str = "") -> None:
         if not file_path.exists():
             QMessageBox.warning(self, "提示", f"题库文件不存在：{file_path}")
             self.reset_button.setEnabled(False)
             return
         threshold = self._sync_threshold_from_input()
-        try:
-            self.bank = QuestionBank(file_path, max_correct=threshold)
-        except Exception as exc:  # pylint: disable=broad-except
-            QMessageBox.critical(self, "加载失败", f"无法打开题库：{exc}")
-            self.bank = None
+        is_sqlite = file_path.suffix.lower() in SQLITE_SUFFIXES
+        # SQLite 题库只支持加权随机
+        policy = "weighted" if is_sqlite else self.policy_combo.currentData()
+        self._close_bank()
+        self._generation += 1
+        generation = self._generation
+        self.current_bank_path = file_path
+        self._set_busy(f"正在加载题库：{file_path.name}……")
+
+        def load(report: Callable[[str], None]):
+            if generation != self._generation:
+                return None  # 排队期间又选了别的题库
+            report(f"正在读取并解析：{file_path.name}……")
+            return open_bank(file_path, max_correct=threshold, policy=policy)
+
+        def loaded(bank) -> None:
+            self._on_bank_loaded(file_path, bank, is_sqlite, notice)
+
+        def failed(message: str) -> None:
+            self.current_bank_path = None
             self.file_label.setText("未选择文件")
-            self.reset_button.setEnabled(False)
-            return
+            self.feedback_label.setText("")
+            QMessageBox.critical(self, "加载失败", f"无法打开题库：{message}")
+
+        self._submit(load, loaded, failed, discard=lambda bank: bank and bank.close())
 
+    def _on_bank_loaded(self, file_path: Path, bank, is_sqlite: bool, notice: str) -> None:
+        if bank is None:
+            return
+        self.bank = bank
         self.current_bank_path = file_path
+        self.policy_combo.setEnabled(not is_sqlite)
         self.file_label.setText(str(file_path))
         self.feedback_label.setText("题库加载成功，正在抽取题目……")
         self.status_label.setText("")
         self.current_selection = None
         self.current_recorded = False
-        self.option_checkboxes.clear()
+        self.current_missed = False
         self._clear_options()
         self.question_label.setText("")
         self.correct_answer_label.setText("正确答案：")
@@ -236,14 +353,200 @@ class QuizWindow(QMainWindow):
         self.awaiting_next = False
         self.reset_button.setEnabled(True)
         self.threshold_input.setText(str(self.bank.max_correct))
-        self.load_next_question()
-        
+        if not is_sqlite:
+            self._watcher.watch(file_path)
+            self._watcher.start()
+        self.load_next_question(notice)
+
+    def _on_bank_file_changed(self, path: str) -> None:
+        bank = self.bank
+        current = self.current_bank_path
+        if bank is None or current is None or Path(path) != Path(current).absolute():
+            return
+
+        def failed(message: str) -> None:
+            # 多半是文件还在保存中，下一次变动时会再试
+            self.feedback_label.setText(f"题库文件已变动，但暂时无法读取：{message}")
+
+        self._submit(
+            lambda report: bank.refresh(),
+            lambda changes: self._apply_bank_changes(bank, changes),
+            failed,
+        )
+
+    def _apply_bank_changes(self, bank, changes) -> None:
+        """Re-point the current question after the bank was edited on disk."""
+        if changes is None or bank is not self.bank or not changes.changed:
+            return
+        self._invalidate_prefetch()
+        summary = (
+            f"题库文件已更新：新增 {len(changes.added)} 题，删除 {len(changes.removed)} 题，"
+            f"修改 {len(changes.edited)} 题"
+        )
+        selection = self.current_selection
+        if selection is not None:
+            updated = bank.remap_selection(selection, changes)
+            if updated is None and not self.awaiting_next:
+                self.load_next_question(f"{summary}；当前题目已被删除，已换下一题。")
+                return
+            self.current_selection = updated
+            if updated is not None and updated.index in changes.edited and not self.awaiting_next:
+                self._render_question()
+        self._refresh_status()
+        self.feedback_label.setText(f"{summary}。")
+
+    def _submit(
+        self,
+        func: Callable[[Callable[[str], None]], object],
+        done: Callable[[object], None] | None = None,
+        failed: Callable[[str], None] | None = None,
+        *,
+        discard: Callable[[object], None] | None = None,
+        tracked: bool = True,
+        pool: QThreadPool | None = None,
+    ) -> None:
+        """Queue ``func`` on ``pool`` (the I/O pool by default); callbacks run on the UI thread.
+
+        For ``tracked`` tasks ``done`` and ``failed`` only fire if no newer
+        bank was requested in the meantime; a superseded result is handed to
+        ``discard`` instead. Untracked tasks (closing a bank) always report.
+        """
+        task = _BankTask(self._generation, func)
+        self._tasks.add(task)
+
+        def current(generation: int) -> bool:
+            return not tracked or generation == self._generation
+
+        def on_progress(generation: int, text: str) -> None:
+            if current(generation):
+                self.feedback_label.setText(text)
+
+        def on_finished(generation: int, result) -> None:
+            self._tasks.discard(task)
+            if not current(generation):
+                if discard is not None:
+                    self._submit(lambda report: discard(result), tracked=False)
+            elif done is not None:
+                done(result)
+
+        def on_failed(generation: int, message: str) -> None:
+            self._tasks.discard(task)
+            if current(generation) and failed is not None:
+                failed(message)
+
+        task.signals.progress.connect(on_progress)
+        task.signals.finished.connect(on_finished)
+        task.signals.failed.connect(on_failed)
+        (pool or self._io_pool).start(task)
+
+    def _set_busy(self, message: str) -> None:
+        self.feedback_label.setText(message)
+        self.status_label.setText("")
+        self.current_selection = None
+        self._clear_options()
+        self.question_label.setText("")
+        self.next_button.setEnabled(False)
+        self.submit_button.setEnabled(False)
+        self.reset_button.setEnabled(False)
+        self.answer_input.setEnabled(False)
+
+    def _schedule_write(self) -> None:
+        """Coalesce progress writes: a burst of answers produces one sync."""
+        self._write_timer.start()
+
+    def _flush_progress(self) -> None:
+        bank = self.bank
+        if bank is None:
+            return
+
+        def failed(message: str) -> None:
+            self.feedback_label.setText(f"进度写入失败：{message}")
+
+        self._submit(lambda report: bank.sync(), failed=failed, tracked=False)
+
+    def _draw(
+        self,
+        drawn: Callable[[QuestionSelection | None, list[tuple[str, str]]], None],
+        current: Callable[[], bool],
+    ) -> None:
+        """Select and parse a question on the I/O pool.
+
+        SQLite banks query the database to draw, so this never runs on the UI
+        thread. ``drawn`` only runs if ``current()`` still holds by then.
+        """
+        bank, rng = self.bank, self.rng
+
+        def draw(report: Callable[[str], None]):
+            selection = bank.select_question(rng)
+            options = list(QuestionBank.describe(selection)["options"]) if selection else []
+            return selection, options
+
+        def done(result) -> None:
+            if bank is self.bank and current():
+                drawn(*result)
+
+        def failed(message: str) -> None:
+            if current():
+                self.feedback_label.setText(f"抽题失败：{message}")
 
-    def load_next_question(self) -> None:
+        self._submit(draw, done, failed)
+
+    def _prefetch_next(self) -> None:
+        """Select and parse the next question while the current answer is shown."""
+        if self.bank is None or self._prefetched is not None or not self.awaiting_next:
+            return
+        bank = self.bank
+        generation = self._prefetch_generation
+
+        def drawn(selection: QuestionSelection | None, options: list[tuple[str, str]]) -> None:
+            if selection is not None and self.awaiting_next:
+                self._prefetched = (bank, selection, options)
+
+        self._draw(drawn, lambda: generation == self._prefetch_generation)
+
+    def _invalidate_prefetch(self) -> None:
+        self._prefetched = None
+        self._prefetch_generation += 1  # 还在排队的预取也作废
+
+    def _take_prefetched(self) -> tuple[QuestionSelection, list[tuple[str, str]]] | None:
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched is None or prefetched[0] is not self.bank:
+            return None
+        selection = prefetched[1]
+        # 改阈值、重置和重新作答都会让预取失效；这里再防一次已达标的题
+        if selection.correct_count >= self.bank.max_correct:
+            return None
+        return selection, prefetched[2]
+
+    @instrument.timed("gui.load_next_question")
+    def load_next_question(self, notice: str = "") -> None:
+        """Show the prefetched question or draw one on the I/O pool.
+
+        ``notice`` replaces the usual hint once the question is shown.
+        """
         if self.bank is None:
             QMessageBox.information(self, "提示", "请先选择题库。")
             return
-        selection = self.bank.select_question(self.rng)
+        prefetched = self._take_prefetched()
+        self._invalidate_prefetch()
+        self._load_generation += 1
+        generation = self._load_generation
+        if prefetched is not None:
+            self._show_question(*prefetched, notice)
+            return
+        self.submit_button.setEnabled(False)
+        self.feedback_label.setText("正在抽取题目……")
+        self._draw(
+            lambda selection, options: self._show_question(selection, options, notice),
+            lambda: generation == self._load_generation,
+        )
+
+    def _show_question(
+        self,
+        selection: QuestionSelection | None,
+        options: list[tuple[str, str]],
+        notice: str = "",
+    ) -> None:
         if selection is None:
             self.current_selection = None
             self._clear_options()
@@ -258,9 +561,10 @@ class QuizWindow(QMainWindow):
             return
         self.current_selection = selection
         self.current_recorded = False
-        self._render_question()
+        self.current_missed = False
+        self._render_question(options)
         self.submit_button.setEnabled(True)
-        self.feedback_label.setText("勾选选项或输入数字后提交。")
+        self.feedback_label.setText(notice or "勾选选项或输入数字后提交。")
         self._refresh_status()
         self.awaiting_next = False
         self.answer_input.clear()
@@ -268,37 +572,46 @@ class QuizWindow(QMainWindow):
         self.answer_input.setFocus()
         self.correct_answer_label.setText("正确答案：")
 
-    def _render_question(self) -> None:
+    @instrument.timed("gui.render_question")
+    def _render_question(self, options: list[tuple[str, str]] | None = None) -> None:
         if not self.current_selection:
             return
         self.question_label.setText(self.current_selection.prompt)
-        _, options = parse_options_text(self.current_selection.options)
+        if options is None:
+            options = list(QuestionBank.describe(self.current_selection)["options"])
         self._populate_options(options)
-        
 
+    def _grow_option_pool(self, size: int) -> None:
+        while len(self._option_pool) < size:
+            checkbox = QCheckBox()
+            checkbox.hide()
+            # 插在提示标签之后、末尾伸缩项之前
+            self.options_layout.insertWidget(len(self._option_pool) + 1, checkbox)
+            self._option_pool.append(checkbox)
+
+    @instrument.timed("gui.populate_options")
     def _populate_options(self, options: list[tuple[str, str]]) -> None:
-        self._clear_options()
-        if not options:
-            notice = QLabel("此题没有提供选项，请在题干中查看。")
-            self.options_layout.addWidget(notice)
-            self.option_checkboxes = {}
-            self.options_layout.addStretch(1)
-            return
+        self._grow_option_pool(len(options))
         self.option_checkboxes = {}
-        for letter, text in options:
-            checkbox = QCheckBox(f"{letter}. {text}")
+        self.options_notice.setVisible(not options)
+        for position, checkbox in enumerate(self._option_pool):
+            if position >= len(options):
+                checkbox.hide()
+                continue
+            letter, text = options[position]
+            checkbox.blockSignals(True)
+            checkbox.setChecked(False)
+            checkbox.blockSignals(False)
+            checkbox.setText(f"{letter}. {text}")
             checkbox.setProperty("letter", letter)
-            self.options_layout.addWidget(checkbox)
+            checkbox.show()
             self.option_checkboxes[letter] = checkbox
-        self.options_layout.addStretch(1)
-        
 
     def _clear_options(self) -> None:
-        while self.options_layout.count():
-            item = self.options_layout.takeAt(0)
-            widget = item.widget()
-            if widget is not None:
-                widget.deleteLater()
+        self.options_notice.hide()
+        for checkbox in self._option_pool:
+            checkbox.hide()
+        self.option_checkboxes = {}
 
     def submit_answer(self) -> None:
         letters = self._collect_checked_letters()
@@ -306,20 +619,56 @@ class QuizWindow(QMainWindow):
             self._handle_submission(letters)
 
     def _refresh_status(self) -> None:
-        if self.bank is None or self.current_selection is None:
+        """Show the counts carried by the current selection; it never queries the bank."""
+        selection = self.current_selection
+        if self.bank is None or selection is None:
             self.status_label.setText("")
             return
-        current_correct = self.bank.data.at[self.current_selection.index, self.bank.correct_column]
-        remaining_total = len(self.bank.remaining_questions())
         self.status_label.setText(
-            f"当前题目正确次数：{current_correct} | 剩余未完成题目：{remaining_total}"
+            f"当前题目正确次数：{selection.correct_count} | "
+            f"剩余未完成题目：{selection.remaining_count}"
         )
 
+    def _reload_status(self) -> None:
+        """Re-read the current question's counts on the I/O pool."""
+        bank, selection = self.bank, self.current_selection
+        if bank is None or selection is None:
+            self._refresh_status()
+            return
+        self._submit(lambda report: bank.reselect(selection), self._update_selection)
+
+    def _store_answer(self, correct: bool) -> None:
+        """Write the answer just marked to the progress store on the I/O pool.
+
+        Locking the store, writing and any flush happen there; the stored
+        count, which includes other processes' answers, then replaces the
+        one shown.
+        """
+        bank, selection = self.bank, self.current_selection
+
+        def failed(message: str) -> None:
+            self.feedback_label.setText(f"进度写入失败：{message}")
+
+        self._submit(
+            lambda report: bank.store_answer(selection, correct), self._update_selection, failed
+        )
+
+    def _update_selection(self, updated: QuestionSelection | None) -> None:
+        current = self.current_selection
+        # 结果回来前可能已经换了题，或题库刷新后题目换了位置（会另行重新定位）
+        if updated is None or current is None or updated.record is not current.record:
+            return
+        if updated.index == current.index:
+            self.current_selection = updated
+            self._refresh_status()
+
     def _prepare_for_next_input(self) -> None:
         self.awaiting_next = True
         self.answer_input.clear()
         self.answer_input.setPlaceholderText("按回车进入下一题，或输入重新作答")
         self.answer_input.setFocus()
+        # 等界面刷新完再预取，用户看答案的时间里下一题就准备好了
+        QTimer.singleShot(0, self._prefetch_next)
 
     def _mark_correct_answers(self, expected_letters: list[str]) -> None:
         if not self.option_checkboxes:
@@ -342,27 +691,37 @@ class QuizWindow(QMainWindow):
             return None
         return chosen
 
+    @instrument.timed("gui.handle_submission")
     def _handle_submission(self, user_letters: list[str]) -> None:
         if self.bank is None or self.current_selection is None:
             QMessageBox.information(self, "提示", "请先选择题库。")
             return
 
-        is_correct = answers_match(user_letters, self.current_selection.answer)
-        expected_letters = normalize_answers(self.current_selection.answer)
+        # 重新作答会改变进度，之前的预取不再可靠
+        self._invalidate_prefetch()
+        is_correct = self.current_selection.is_correct(user_letters)
+        expected_letters = self.current_selection.answer_letters
         correct_text = "".join(expected_letters) if expected_letters else self.current_selection.answer
 
+        # 界面线程只更新内存中的抽题器，写进度存储在 I/O 线程池里进行
         if is_correct:
             if not self.current_recorded:
-                self.bank.record_correct(self.current_selection)
-                self.bank.save()
+                self.current_selection = self.bank.mark_answer(self.current_selection, True)
+                self._store_answer(True)
+                self._schedule_write()
                 self.current_recorded = True
-            updated = self.bank.data.at[self.current_selection.index, self.bank.correct_column]
+            updated = self.current_selection.correct_count
             self.feedback_label.setText(f"回答正确！当前题目正确次数：{updated}")
             if updated >= self.bank.max_correct:
                 self.feedback_label.setText(
                     self.feedback_label.text() + " 已达到阈值，可以切换下一题。"
                 )
         else:
+            if not self.current_recorded and not self.current_missed:
+                self.current_selection = self.bank.mark_answer(self.current_selection, False)
+                self._store_answer(False)
+                self._schedule_write()
+                self.current_missed = True
             self.feedback_label.setText(f"回答错误，正确答案是：{correct_text}")
         display_letters = " ".join(expected_letters) if expected_letters else correct_text
         self.correct_answer_label.setText(f"正确答案：{display_letters}")
@@ -374,17 +733,77 @@ class QuizWindow(QMainWindow):
         value = self._sync_threshold_from_input()
         if self.bank is not None:
             self.bank.max_correct = value
+            self._invalidate_prefetch()
             if self.current_selection is not None:
-                current_count = self.bank.data.at[self.current_selection.index, self.bank.correct_column]
-                if current_count >= value:
-                    self.feedback_label.setText(
+                if self.current_selection.correct_count >= value:
+                    self.awaiting_next = False
+                    self.load_next_question(
                         f"目标正确次数已更新为 {value} 次，当前题目已达标，已切换下一题。"
                     )
-                    self.awaiting_next = False
-                    self.load_next_question()
                     return
             self.feedback_label.setText(f"目标正确次数已更新为 {value} 次。")
-            self._refresh_status()
+            # 剩余题数随阈值变化，SQLite 题库要查库，放到 I/O 线程池
+            self._reload_status()
+
+    def handle_policy_changed(self, index: int) -> None:
+        policy = self.policy_combo.itemData(index)
+        if self.bank is None or self.current_bank_path is None or self.bank.policy == policy:
+            return
+        self._load_bank(self.current_bank_path, notice=f"抽题策略已切换为：{POLICIES[policy]}")
+
+    def search_questions(self) -> None:
+        query = self.search_input.text().strip()
+        if not query:
+            return
+        if self.search_index is None:
+            self.search_index = SearchIndex.from_directory(self.quiz_dir)
+        index = self.search_index
+        # 只有最后一次搜索会弹出结果
+        self._search_generation += 1
+        generation = self._search_generation
+        self.feedback_label.setText("正在更新搜索索引……")
+
+        def refresh(report: Callable[[str], None]) -> None:
+            index.refresh()
+
+        def refreshed(_) -> None:
+            if generation == self._search_generation:
+                self._show_search_results(query, index.search(query, limit=50, refresh=False))
+
+        def failed(message: str) -> None:
+            if generation == self._search_generation:
+                QMessageBox.warning(self, "搜索失败", f"无法建立搜索索引：{message}")
+
+        self._submit(refresh, refreshed, failed, tracked=False, pool=self._search_pool)
+
+    def _show_search_results(self, query: str, hits: list[SearchHit]) -> None:
+        if not hits:
+            self.feedback_label.setText(f"没有找到与“{query}”相关的题目。")
+            return
+        self.feedback_label.setText(f"找到 {len(hits)} 条与“{query}”相关的题目。")
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"搜索：{query}（{len(hits)} 条）")
+        dialog.resize(720, 480)
+        results = QListWidget(dialog)
+        results.setWordWrap(True)
+        for hit in hits:
+            options = "  ".join(f"{letter}. {text}" for letter, text in hit.options)
+            item = QListWidgetItem(f"{hit.location}\n{hit.stem}\n{options}\n答案：{hit.answer}")
+            item.setData(Qt.UserRole, hit.path)
+            results.addItem(item)
+
+        def open_bank_of(item: QListWidgetItem) -> None:
+            index = self.bank_combo.findData(item.data(Qt.UserRole))
+            if index >= 0:
+                self.bank_combo.setCurrentIndex(index)
+            dialog.accept()
+
+        results.itemDoubleClicked.connect(open_bank_of)
+        dialog_layout = QVBoxLayout(dialog)
+        dialog_layout.addWidget(QLabel("双击切换到该题所在题库"))
+        dialog_layout.addWidget(results)
+        dialog.exec_()
 
     def reset_progress(self) -> None:
         if self.bank is None:
@@ -399,13 +818,25 @@ class QuizWindow(QMainWindow):
         )
         if confirm != QMessageBox.Yes:
             return
-        self.bank.data.loc[:, self.bank.correct_column] = 0
-        self.bank.save()
-        self.bank.reload()
-        self.feedback_label.setText("已重置正确次数。")
-        self.current_recorded = False
-        self.awaiting_next = False
-        self.load_next_question()
+        self._invalidate_prefetch()
+        self._write_timer.stop()
+        bank = self.bank
+        self._set_busy("正在重置进度……")
+
+        def done(_result) -> None:
+            self.current_recorded = False
+            self.current_missed = False
+            self.awaiting_next = False
+            self.next_button.setEnabled(True)
+            self.reset_button.setEnabled(True)
+            self.answer_input.setEnabled(True)
+            self.load_next_question("已重置正确次数。")
+
+        def failed(message: str) -> None:
+            QMessageBox.warning(self, "重置失败", f"无法写回题库进度：{message}")
+            done(None)
+
+        self._submit(lambda report: bank.reset_progress(), done, failed)
 
     def _sync_threshold_from_input(self) -> int:
         text = self.threshold_input.text().strip()
@@ -448,6 +879,30 @@ class QuizWindow(QMainWindow):
 
         self._handle_submission(letters)
 
+    def _close_bank(self) -> None:
+        """Detach the current bank and compact it in the background."""
+        self._invalidate_prefetch()
+        self._write_timer.stop()
+        bank, self.bank = self.bank, None
+        if bank is None:
+            return
+        if isinstance(bank, QuestionBank):
+            self._watcher.unwatch(bank.path)
+
+        def failed(message: str) -> None:
+            QMessageBox.warning(self, "保存失败", f"无法写回题库进度：{message}")
+
+        self._submit(lambda report: bank.close(), failed=failed, tracked=False)
+
+    def closeEvent(self, event) -> None:  # pylint: disable=invalid-name
+        self._generation += 1  # 丢弃尚未开始的加载
+        self._watcher.stop()
+        self._close_bank()
+        self._search_pool.clear()  # 排队的索引刷新不必再做
+        # 退出前必须等进度落盘，这是唯一一处在界面线程上等待 I/O
+        self._io_pool.waitForDone()
+        super().closeEvent(event)
+
     def resizeEvent(self, event) -> None:  # pylint: disable=invalid-name
         super().resizeEvent(event)
         # 缩放仅影响布局，无需调整字体
@@ -456,6 +911,7 @@ class QuizWindow(QMainWindow):
 
 
 def run_gui() -> None:
+    instrument.enable_from_env()
     app = QApplication(sys.argv)
     window = QuizWindow()
     window.show()
@@ -1,64 +1,173 @@
 from __future__ import annotations
 
+import csv
 import re
+import zipfile
+import xml.etree.ElementTree as ET
+from itertools import islice
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator, Optional, Sequence
 
 import pandas as pd
 
-try:
-    from docx import Document
-except ImportError as exc:
-    Document = None  # type: ignore[assignment]
-
-
-def _ensure_docx_available() -> None:
-    if Document is None:
-        raise ImportError("python-docx 未安装，无法处理 Word 文档。")
-
-
-def extract_from_docx(word_file: str | Path) -> pd.DataFrame:
-    _ensure_docx_available()
-    doc = Document(word_file)
-
-    questions: list[str] = []
-    answers: list[str] = []
+from .question_bank import SQLITE_SUFFIXES
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY = f"{_W_NS}body"
+_W_P = f"{_W_NS}p"
+_W_T = f"{_W_NS}t"
+_W_TAB = f"{_W_NS}tab"
+_W_BR = f"{_W_NS}br"
+_W_CR = f"{_W_NS}cr"
+_W_TEXTBOX = f"{_W_NS}txbxContent"
+_W_TYPE = f"{_W_NS}type"
+_RUN_BREAKS = {_W_TAB: "\t", _W_BR: "\n", _W_CR: "\n"}
+DOCX_COLUMNS = ("题目", "答案")
+
+
+def _paragraph_text(paragraph: ET.Element) -> str:
+    """Concatenate run text the way python-docx's ``Paragraph.text`` does."""
+    parts: list[str] = []
+    stack = list(reversed(list(paragraph)))
+    while stack:
+        node = stack.pop()
+        if node.tag == _W_TEXTBOX:
+            continue
+        if node.tag == _W_T:
+            parts.append(node.text or "")
+        elif node.tag in _RUN_BREAKS:
+            # 分页符、分栏符在 python-docx 中不产生文本，只有换行符算作 "\n"
+            if node.tag != _W_BR or node.get(_W_TYPE, "textWrapping") == "textWrapping":
+                parts.append(_RUN_BREAKS[node.tag])
+        else:
+            stack.extend(reversed(list(node)))
+    return "".join(parts)
+
+
+def iter_docx_paragraphs(word_file: str | Path) -> Iterator[str]:
+    """Stream the text of body-level paragraphs from ``word/document.xml``.
+
+    Elements are discarded as soon as they are read, so memory stays flat no
+    matter how long the document is.
+    """
+    with zipfile.ZipFile(word_file) as archive, archive.open("word/document.xml") as xml:
+        body: Optional[ET.Element] = None
+        depth = 0
+        body_depth = -1
+        for event, elem in ET.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if elem.tag == _W_BODY:
+                    body = elem
+                    body_depth = depth
+                continue
+            depth -= 1
+            if body is None or depth != body_depth:
+                continue
+            if elem.tag == _W_P:
+                yield _paragraph_text(elem)
+            body.clear()
+
+
+def iter_docx_questions(word_file: str | Path) -> Iterator[dict[str, str]]:
+    """Yield ``{"题目", "答案"}`` records from a Word document, one at a time."""
     current_question_lines: list[str] = []
-
-    for paragraph in doc.paragraphs:
-        text = paragraph.text.strip()
+    for paragraph in iter_docx_paragraphs(word_file):
+        text = paragraph.strip()
         if not text:
             continue
         if text.startswith("正确答案"):
-            questions.append("\n".join(current_question_lines).strip())
             answer = text.split("：", 1)[1] if "：" in text else text.split(":", 1)[-1]
-            answers.append(answer.strip())
+            yield {"题目": "\n".join(current_question_lines).strip(), "答案": answer.strip()}
             current_question_lines = []
         else:
             current_question_lines.append(text)
 
-    df = pd.DataFrame({"题目": questions, "答案": answers})
-    return df
 
+def write_records(
+    records: Iterable[dict[str, str]],
+    output_path: str | Path,
+    *,
+    columns: Sequence[str] = DOCX_COLUMNS,
+    chunk_size: int = 1000,
+) -> Path:
+    """Write records to ``.xlsx``, ``.csv`` or a SQLite bank without materializing them.
 
-def extract_from_marked_text(text_file: str | Path, *, encoding: str = "utf-8") -> pd.DataFrame:
-    with open(text_file, "r", encoding=encoding) as handle:
-        content = handle.read()
+    Raw ``题目/答案`` records written to a SQLite bank are normalized with the
+    embedded-question parser first.
+    """
+    output = Path(output_path)
+    suffix = output.suffix.lower()
+    rows = ([record.get(column, "") for column in columns] for record in records)
+    if suffix == ".csv":
+        with open(output, "w", encoding="utf-8-sig", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(columns)
+            for chunk in iter(lambda: list(islice(rows, chunk_size)), []):
+                writer.writerows(chunk)
+        return output
+    if suffix in SQLITE_SUFFIXES:
+        from .converters import iter_embedded_rows
+        from .sqlite_bank import import_records
+
+        cells = ((record.get("题目", ""), record.get("答案", "")) for record in records)
+        bank_rows = ((*row, 0) for row in iter_embedded_rows(cells))
+        return import_records(output, bank_rows, overwrite=True)
+
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(columns))
+    for chunk in iter(lambda: list(islice(rows, chunk_size)), []):
+        for row in chunk:
+            sheet.append(row)
+    workbook.save(output)
+    return output
 
-    pattern = r"(\d+\.\s*.*?)(?=\d+\.|\Z)"
-    matches = re.findall(pattern, content, flags=re.DOTALL)
 
-    rows: list[dict[str, str]] = []
-    for block in matches:
-        lines = [line.strip() for line in block.strip().splitlines() if line.strip()]
-        if not lines:
-            continue
-        title = lines[0]
-        options = ", ".join(lines[1:-1]) if len(lines) > 2 else ""
-        answer = lines[-1] if len(lines) > 1 else ""
-        rows.append({"题目": title, "选项": options, "答案": answer})
+def extract_from_docx(word_file: str | Path) -> pd.DataFrame:
+    return pd.DataFrame(list(iter_docx_questions(word_file)), columns=list(DOCX_COLUMNS))
+
+
+_RE_MARKED_START = re.compile(r"\s*\d+\.")
+MARKED_COLUMNS = ("题目", "选项", "答案")
+
+
+def _marked_block_record(lines: list[str]) -> dict[str, str]:
+    title = lines[0]
+    options = ", ".join(lines[1:-1]) if len(lines) > 2 else ""
+    answer = lines[-1] if len(lines) > 1 else ""
+    return {"题目": title, "选项": options, "答案": answer}
 
-    return pd.DataFrame(rows)
+
+def iter_marked_text(text_file: str | Path, *, encoding: str = "utf-8") -> Iterator[dict[str, str]]:
+    """Stream ``题目/选项/答案`` records from a numbered plain-text dump.
+
+    A question starts at a line beginning with ``<digits>.``; the following
+    lines are its options and the last one its answer. The file is read line
+    by line, so memory use does not depend on the file size and numbers
+    inside a stem no longer split the question.
+    """
+    lines: list[str] = []
+    with open(text_file, "r", encoding=encoding) as handle:
+        for raw in handle:
+            if _RE_MARKED_START.match(raw):
+                if lines:
+                    yield _marked_block_record(lines)
+                lines = []
+            elif not lines:
+                continue
+            line = raw.strip()
+            if line:
+                lines.append(line)
+    if lines:
+        yield _marked_block_record(lines)
+
+
+def extract_from_marked_text(text_file: str | Path, *, encoding: str = "utf-8") -> pd.DataFrame:
+    rows = list(iter_marked_text(text_file, encoding=encoding))
+    return pd.DataFrame(rows, columns=list(MARKED_COLUMNS))
 
 
 def save_to_excel(df: pd.DataFrame, output_path: str | Path) -> Path:
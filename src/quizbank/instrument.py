@@ -0,0 +1,234 @@
+"""Opt-in timing spans and event hooks for hot paths.
+
+Everything is a no-op until :func:`enable` is called (``--profile`` on the
+CLI, ``QUIZBANK_PROFILE=1`` for the GUI). When enabled, every span is timed,
+forwarded to registered hooks and summarized as a p50/p95/p99 table at exit;
+``output`` additionally writes a cProfile dump (``.prof``) or a speedscope
+trace of the spans (``.json``).
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+from typing import Callable, Optional, TypeVar
+
+ENV_PROFILE = "QUIZBANK_PROFILE"
+ENV_PROFILE_OUTPUT = "QUIZBANK_PROFILE_OUTPUT"
+
+Hook = Callable[[str, float], None]
+F = TypeVar("F", bound=Callable)
+
+_enabled = False
+_hooks: list[Hook] = []
+_samples: dict[str, list[float]] = defaultdict(list)
+_events: Optional[list[tuple[int, str, str, float]]] = None
+_profiler = None
+_output: Optional[str] = None
+_origin = 0.0
+_lock = threading.Lock()
+_atexit_registered = False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+        if _events is not None:
+            _events.append((threading.get_ident(), "O", self.name, self.start))
+
+    def __exit__(self, *exc) -> None:
+        _record(self.name, self.start, time.perf_counter())
+
+
+def _record(name: str, start: float, end: float) -> None:
+    elapsed = end - start
+    with _lock:
+        _samples[name].append(elapsed)
+        if _events is not None:
+            _events.append((threading.get_ident(), "C", name, end))
+    for hook in tuple(_hooks):
+        hook(name, elapsed)
+
+
+def span(name: str):
+    """Context manager timing ``name``; free when instrumentation is off."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator form of :func:`span`."""
+
+    def decorator(func: F) -> F:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def add_hook(hook: Hook) -> None:
+    """Call ``hook(name, seconds)`` after every finished span."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(*, output: Optional[str] = None, report: bool = True) -> None:
+    global _enabled, _events, _profiler, _output, _origin, _atexit_registered
+    _enabled = True
+    _output = output
+    _origin = time.perf_counter()
+    if output and output.endswith(".json"):
+        _events = []
+    elif output:
+        import cProfile
+
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    if report and not _atexit_registered:
+        atexit.register(finish)
+        _atexit_registered = True
+
+
+def enable_from_env() -> bool:
+    if os.environ.get(ENV_PROFILE, "").strip().lower() in ("", "0", "false", "no"):
+        return False
+    enable(output=os.environ.get(ENV_PROFILE_OUTPUT) or None)
+    return True
+
+
+def disable() -> None:
+    global _enabled, _events, _profiler
+    _enabled = False
+    if _profiler is not None:
+        _profiler.disable()
+    _profiler = None
+    _events = None
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summary() -> dict[str, dict[str, float]]:
+    with _lock:
+        snapshot = {name: sorted(values) for name, values in _samples.items() if values}
+    return {
+        name: {
+            "count": len(values),
+            "total_ms": sum(values) * 1000,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": values[-1] * 1000,
+        }
+        for name, values in snapshot.items()
+    }
+
+
+def format_report(stats: dict[str, dict[str, float]]) -> str:
+    lines = [
+        f"{'operation':<28} {'count':>7} {'total ms':>10} "
+        f"{'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+    ]
+    for name, row in sorted(stats.items(), key=lambda item: -item[1]["total_ms"]):
+        lines.append(
+            f"{name:<28} {row['count']:>7} {row['total_ms']:>10.1f} {row['p50_ms']:>9.2f} "
+            f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['max_ms']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def _write_speedscope(path: str, events: list[tuple[int, str, str, float]]) -> None:
+    frames: dict[str, int] = {}
+    profiles = []
+    end = time.perf_counter()
+    for thread in sorted({event[0] for event in events}):
+        thread_events = [
+            {
+                "type": kind,
+                "frame": frames.setdefault(name, len(frames)),
+                "at": (at - _origin) * 1000,
+            }
+            for ident, kind, name, at in events
+            if ident == thread
+        ]
+        profiles.append(
+            {
+                "type": "evented",
+                "name": f"thread {thread}",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": (end - _origin) * 1000,
+                "events": thread_events,
+            }
+        )
+    document = {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": [{"name": name} for name in frames]},
+        "profiles": profiles,
+        "name": "quizbank",
+        "exporter": "quizbank.instrument",
+    }
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(document, handle)
+
+
+def finish() -> None:
+    """Print the latency table and write the requested dump."""
+    if not _enabled:
+        return
+    events, profiler, output = _events, _profiler, _output
+    disable()
+    stats = summary()
+    if stats:
+        print(format_report(stats), file=sys.stderr)
+    if output and profiler is not None:
+        profiler.dump_stats(output)
+    elif output and events is not None:
+        _write_speedscope(output, events)
+    if output:
+        print(f"性能数据已写入：{output}", file=sys.stderr)
@@ -0,0 +1,249 @@
+"""Randomized practice papers drawn from a bank."""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .records import QuestionRecord
+from .utils import VALID_CHOICES
+from .workbook import write_xlsx_rows
+
+PAPER_FORMATS = ("xlsx", "docx")
+_CHINESE_NUMERALS = "一二三四五六七八九十"
+
+
+def question_type(record: QuestionRecord) -> str:
+    """The declared type, or 单选题/多选题 guessed from the answer."""
+    if record.qtype:
+        return record.qtype
+    return "多选题" if len(record.answer_letters) > 1 else "单选题"
+
+
+@dataclass(frozen=True)
+class PaperQuestion:
+    record: QuestionRecord
+    qtype: str
+    options: tuple[tuple[str, str], ...]
+    answer: str
+
+
+# 交给导出进程的题目只含纯数据：(题型, 题干, 选项, 答案)
+_Item = tuple[str, str, tuple[tuple[str, str], ...], str]
+
+
+def _format1_rows(items: Sequence[_Item]) -> list[tuple[str, str, str]]:
+    rows = []
+    for position, (qtype, stem, options, answer) in enumerate(items, start=1):
+        marked = [f"{letter}.{text}" for letter, text in options]
+        rows.append((f"{qtype}  {position}. {stem}", ", ".join([qtype, *marked]), answer))
+    return rows
+
+
+@dataclass
+class Paper:
+    number: int
+    questions: list[PaperQuestion]
+
+    @property
+    def answers(self) -> list[str]:
+        return [question.answer for question in self.questions]
+
+    def items(self) -> list[_Item]:
+        return [
+            (question.qtype, question.record.stem, question.options, question.answer)
+            for question in self.questions
+        ]
+
+    def rows(self) -> list[tuple[str, str, str]]:
+        """Format-1 ``(题目, 选项, 答案)`` rows, so a paper is itself a bank."""
+        return _format1_rows(self.items())
+
+
+def shuffle_options(
+    record: QuestionRecord, rng: np.random.Generator
+) -> tuple[tuple[tuple[str, str], ...], str]:
+    """Shuffle the options of ``record`` and relabel the answer letters to match."""
+    options = record.options
+    if len(options) < 2 or len(options) > len(VALID_CHOICES):
+        return options, record.answer
+    correct = set(record.answer_letters)
+    order = rng.permutation(len(options)).tolist()
+    shuffled = tuple((VALID_CHOICES[i], options[j][1]) for i, j in enumerate(order))
+    answer = "".join(VALID_CHOICES[i] for i, j in enumerate(order) if options[j][0] in correct)
+    return shuffled, answer
+
+
+def generate_papers(
+    records: Sequence[QuestionRecord],
+    count: int,
+    quota: Mapping[str, int],
+    *,
+    seed: int = 0,
+    max_overlap: Optional[float] = 0.5,
+    shuffle: bool = True,
+    attempts: int = 50,
+) -> list[Paper]:
+    """Draw ``count`` papers with ``quota[qtype]`` questions of each type.
+
+    Questions are picked least-used first with random tie-breaking, so
+    exposure stays even across papers. ``max_overlap`` caps the share of a
+    paper that any earlier paper may also contain; a draw that breaks it is
+    retried with more randomness, up to ``attempts`` times. Everything,
+    including option order, is reproducible from ``seed``.
+    """
+    quota = {qtype: number for qtype, number in quota.items() if number > 0}
+    size = sum(quota.values())
+    if count < 1 or size < 1:
+        raise ValueError("试卷数量和每卷题数都必须大于 0。")
+    pools: dict[str, np.ndarray] = {}
+    for qtype, number in quota.items():
+        pool = np.array(
+            [pos for pos, record in enumerate(records) if question_type(record) == qtype],
+            dtype=np.int64,
+        )
+        if len(pool) < number:
+            raise ValueError(f"题库中只有 {len(pool)} 道{qtype}，不足每卷 {number} 道。")
+        pools[qtype] = pool
+
+    rng = np.random.default_rng(seed)
+    limit = size if max_overlap is None else int(max_overlap * size)
+    usage = np.zeros(len(records), dtype=np.int64)
+    membership = np.zeros((count, len(records)), dtype=bool)
+    papers: list[Paper] = []
+    for number in range(1, count + 1):
+        for attempt in range(attempts):
+            # 每次重试放大随机扰动，让抽题逐步偏离“最少使用优先”
+            spread = 1.0 + attempt
+            chosen = []
+            for qtype, quota_count in quota.items():
+                pool = pools[qtype]
+                keys = usage[pool] + rng.random(len(pool)) * spread
+                picked = pool[np.argpartition(keys, quota_count - 1)[:quota_count]]
+                chosen.append(picked[rng.permutation(quota_count)])
+            positions = np.concatenate(chosen)
+            shared = membership[: number - 1][:, positions].sum(axis=1)
+            if not len(shared) or shared.max() <= limit:
+                break
+        else:
+            raise ValueError(
+                f"第 {number} 套试卷无法满足重叠上限 {max_overlap:.0%}，"
+                "请减少试卷数量或放宽重叠限制。"
+            )
+        membership[number - 1, positions] = True
+        usage[positions] += 1
+        questions = []
+        for pos in positions.tolist():
+            record = records[pos]
+            options, answer = (
+                shuffle_options(record, rng) if shuffle else (record.options, record.answer)
+            )
+            questions.append(PaperQuestion(record, question_type(record), options, answer))
+        papers.append(Paper(number, questions))
+    return papers
+
+
+def paper_name(number: int, total: int) -> str:
+    return f"试卷{number:0{max(3, len(str(total)))}d}"
+
+
+def _docx_document():
+    try:
+        from docx import Document
+    except ImportError as exc:
+        raise ImportError("python-docx 未安装，无法导出 Word 试卷。") from exc
+    return Document()
+
+
+def _write_docx(path: Path, title: str, items: Sequence[_Item]) -> None:
+    """Questions grouped under 一、二、… type headings, answer key on the last page."""
+    document = _docx_document()
+    document.add_heading(title, level=1)
+    sections = 0
+    current = None
+    for position, (qtype, stem, options, _) in enumerate(items, start=1):
+        if qtype != current:
+            current = qtype
+            numeral = (
+                _CHINESE_NUMERALS[sections] if sections < len(_CHINESE_NUMERALS) else sections + 1
+            )
+            document.add_heading(f"{numeral}、{qtype}", level=2)
+            sections += 1
+        document.add_paragraph(f"{position}. {stem}")
+        for letter, text in options:
+            document.add_paragraph(f"{letter}. {text}")
+    document.add_page_break()
+    document.add_heading("参考答案", level=2)
+    document.add_paragraph(
+        "  ".join(f"{position}. {item[3]}" for position, item in enumerate(items, start=1))
+    )
+    document.save(path)
+
+
+def _export_batch(
+    jobs: list[tuple[str, list[_Item]]], output_dir: str, formats: tuple[str, ...]
+) -> list[str]:
+    written = []
+    for name, items in jobs:
+        if "xlsx" in formats:
+            path = Path(output_dir) / f"{name}.xlsx"
+            write_xlsx_rows(path, ["题目", "选项", "答案"], _format1_rows(items))
+            written.append(str(path))
+        if "docx" in formats:
+            path = Path(output_dir) / f"{name}.docx"
+            _write_docx(path, name, items)
+            written.append(str(path))
+    return written
+
+
+def export_papers(
+    papers: Sequence[Paper],
+    output_dir: str | Path,
+    *,
+    formats: Iterable[str] = ("xlsx",),
+    workers: Optional[int] = None,
+    batch_size: int = 20,
+) -> list[Path]:
+    """Write every paper plus a ``答案.xlsx`` key, exporting in a process pool.
+
+    Paper workbooks use the 题目/选项/答案 layout, so each one can be practised
+    or graded as a bank. The key has one row per paper and one column per
+    question, the layout ``quizbank grade`` reads. ``workers=1`` exports
+    in-process.
+    """
+    formats = tuple(dict.fromkeys(formats))
+    unknown = [fmt for fmt in formats if fmt not in PAPER_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown paper format: {unknown[0]}")
+    if "docx" in formats:
+        _docx_document()  # 在启动进程池前就报告缺少 python-docx
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+
+    total = len(papers)
+    jobs = [(paper_name(paper.number, total), paper.items()) for paper in papers]
+    batches = [jobs[i : i + batch_size] for i in range(0, len(jobs), batch_size)]
+    written: list[Path] = []
+    if workers == 1 or len(batches) <= 1:
+        for batch in batches:
+            written.extend(Path(path) for path in _export_batch(batch, str(output), formats))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_export_batch, batch, str(output), formats) for batch in batches]
+            for future in as_completed(futures):
+                written.extend(Path(path) for path in future.result())
+    written.sort()
+
+    width = max((len(paper.questions) for paper in papers), default=0)
+    key = output / "答案.xlsx"
+    write_xlsx_rows(
+        key,
+        ["试卷", *range(1, width + 1)],
+        ([name, *paper.answers] for (name, _), paper in zip(jobs, papers)),
+    )
+    written.append(key)
+    return written
@@ -0,0 +1,301 @@
+"""Content-addressed correct counts shared by every bank in a folder.
+
+The store is a set of memory-mapped segment files beside the banks. The
+first starts with a 16-byte header; every segment holds 16-byte slots of
+``(question key, count)``. Keys come from
+:func:`~quizbank.records.question_key`, so a count follows its question
+through re-conversion, reordering and merging instead of living in a
+workbook row.
+
+Several processes may share the store. Appending keys and changing counts
+happen under a lock file, and a segment is sized once when it is created,
+never while another process maps it (Windows refuses to resize a mapped
+file), so the store grows by adding segments twice as large as the last.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+from .utils import SIDECAR_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DURABILITY_MODES: tuple[str, ...] = ("always", "batch", "none")
+PROGRESS_FILE = "progress.bin"
+_MAGIC = b"QBPROG\x00\x02"
+_HEADER = struct.Struct("<8sII")  # magic, 已用槽位数, 保留
+_SLOT = struct.Struct("<QiI")  # 题目键, 正确次数, 保留
+_COUNT = struct.Struct("<i")
+_SEGMENT_SLOTS = 1024  # 第 k 段有 _SEGMENT_SLOTS << k 个槽位
+
+
+def progress_store_path(bank_path: str | Path) -> Path:
+    """The store shared by ``bank_path`` and every other bank in its folder."""
+    return Path(bank_path).parent / SIDECAR_DIR / PROGRESS_FILE
+
+
+def _segment_of(slot: int) -> tuple[int, int]:
+    """``(segment, slot within the segment)`` of a global slot number."""
+    segment = (slot // _SEGMENT_SLOTS + 1).bit_length() - 1
+    return segment, slot - _SEGMENT_SLOTS * ((1 << segment) - 1)
+
+
+def _segment_start(segment: int) -> int:
+    return _HEADER.size if segment == 0 else 0
+
+
+def _segment_size(segment: int) -> int:
+    return _segment_start(segment) + (_SEGMENT_SLOTS << segment) * _SLOT.size
+
+
+def _segment_path(path: Path, segment: int) -> Path:
+    return path if segment == 0 else path.with_name(f"{path.name}.{segment}")
+
+
+def read_saved_counts(path: str | Path, keys: Iterable[int]) -> dict[int, int]:
+    """Counts stored for ``keys``, read without creating, locking or mapping anything."""
+    path = Path(path)
+    wanted = set(keys)
+    found: dict[int, int] = {}
+    try:
+        with open(path, "rb") as handle:
+            magic, used, _ = _HEADER.unpack(handle.read(_HEADER.size))
+    except (OSError, struct.error):
+        return found
+    if magic != _MAGIC:
+        return found
+    remaining = used
+    segment = 0
+    while remaining > 0 and wanted:
+        take = min(remaining, _SEGMENT_SLOTS << segment)
+        try:
+            with open(_segment_path(path, segment), "rb") as handle:
+                handle.seek(_segment_start(segment))
+                data = handle.read(take * _SLOT.size)
+        except OSError:
+            break
+        for key, count, _ in _SLOT.iter_unpack(data[: len(data) - len(data) % _SLOT.size]):
+            if key in wanted:
+                found[key] = count
+                wanted.discard(key)
+        remaining -= take
+        segment += 1
+    return found
+
+
+class ProgressStore:
+    """Correct counts keyed by question, backed by memory-mapped files.
+
+    :meth:`slots` resolves keys to slot numbers once; :meth:`get`,
+    :meth:`add` and :meth:`set` then work on slots. ``durability`` controls
+    how often the mappings are forced to disk: ``"always"`` after every
+    update, ``"batch"`` every ``fsync_interval`` updates and on
+    :meth:`flush`, ``"none"`` leaves writeback to the operating system.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        durability: str = "batch",
+        fsync_interval: int = 32,
+    ) -> None:
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
+        self.path = Path(path)
+        self.durability = durability
+        self.fsync_interval = max(1, fsync_interval)
+        self._lock = threading.Lock()
+        self._index: dict[int, int] = {}
+        self._indexed = 0
+        self._unsynced = 0
+        self._maps: list[mmap.mmap] = []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = self.path.with_name(self.path.name + ".lock")
+        self._lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            with self._file_lock():
+                self._map_segment(0)
+                self._catch_up()
+        except BaseException:
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return self._indexed
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._index
+
+    def slots(self, keys: Sequence[int], defaults: Sequence[int]) -> list[int]:
+        """Slot of every key, adding missing keys with the matching default count."""
+        with self._lock:
+            result = [self._index.get(key, -1) for key in keys]
+            if -1 not in result:
+                return result
+            with self._file_lock():
+                # 其他进程可能刚追加过同一道题
+                self._catch_up()
+                used = self._indexed
+                for position, key in enumerate(keys):
+                    slot = self._index.get(key)
+                    if slot is None:
+                        slot = self._index[key] = used
+                        used += 1
+                        segment, offset = self._locate(slot)
+                        _SLOT.pack_into(self._maps[segment], offset, key, defaults[position], 0)
+                    result[position] = slot
+                # 先写槽位再更新槽位数，崩溃时最多丢掉尚未登记的新题
+                _HEADER.pack_into(self._maps[0], 0, _MAGIC, used, 0)
+                self._written(used - self._indexed)
+                self._indexed = used
+            return result
+
+    def get(self, slot: int) -> int:
+        segment, offset = self._locate(slot)
+        return _COUNT.unpack_from(self._maps[segment], offset + 8)[0]
+
+    def add(self, slot: int, delta: int) -> int:
+        """Add ``delta`` to the stored count and return the result.
+
+        The read and the write happen under the lock file, so increments
+        made by other processes sharing the store are never lost.
+        """
+        with self._lock, self._file_lock():
+            segment, offset = self._locate(slot)
+            count = _COUNT.unpack_from(self._maps[segment], offset + 8)[0] + delta
+            _COUNT.pack_into(self._maps[segment], offset + 8, count)
+            self._written(1)
+        return count
+
+    def set(self, slot: int, count: int) -> None:
+        self.set_many([(slot, count)])
+
+    def set_many(self, entries: Iterable[tuple[int, int]]) -> None:
+        """Write several ``(slot, count)`` pairs with a single durability check."""
+        with self._lock, self._file_lock():
+            written = 0
+            for slot, count in entries:
+                segment, offset = self._locate(slot)
+                _COUNT.pack_into(self._maps[segment], offset + 8, count)
+                written += 1
+            if written:
+                self._written(written)
+
+    def counts(self, slots: Sequence[int]) -> list[int]:
+        return [self.get(slot) for slot in slots]
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._unsynced and self.durability != "none":
+                for mapping in self._maps:
+                    mapping.flush()
+            self._unsynced = 0
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            for mapping in self._maps:
+                mapping.close()
+            self._maps = []
+            if self._lock_fd >= 0:
+                os.close(self._lock_fd)
+                self._lock_fd = -1
+
+    def __enter__(self) -> "ProgressStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _locate(self, slot: int) -> tuple[int, int]:
+        """Segment and byte offset of ``slot``, mapping the segment if needed."""
+        segment, local = _segment_of(slot)
+        while len(self._maps) <= segment:
+            self._map_segment(len(self._maps))
+        return segment, _segment_start(segment) + local * _SLOT.size
+
+    def _written(self, entries: int) -> None:
+        self._unsynced += entries
+        if self.durability == "always" or (
+            self.durability == "batch" and self._unsynced >= self.fsync_interval
+        ):
+            for mapping in self._maps:
+                mapping.flush()
+            self._unsynced = 0
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            return
+        os.lseek(self._lock_fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                # LK_LOCK 自己会重试约 10 秒，超时后继续等
+                msvcrt.locking(self._lock_fd, msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            os.lseek(self._lock_fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._lock_fd, msvcrt.LK_UNLCK, 1)
+
+    def _map_segment(self, segment: int) -> None:
+        """Map the next segment, creating it at full size if needed.
+
+        Called with the lock file held whenever the segment may not exist
+        yet; a short file has never been mapped by anyone, so extending it
+        here is safe on every platform.
+        """
+        path = _segment_path(self.path, segment)
+        size = _segment_size(segment)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+                if self.durability != "none":
+                    os.fsync(fd)
+            mapping = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        if segment == 0:
+            magic, used, _ = _HEADER.unpack_from(mapping, 0)
+            if magic == bytes(len(_MAGIC)) and not used:
+                _HEADER.pack_into(mapping, 0, _MAGIC, 0, 0)
+            elif magic != _MAGIC:
+                mapping.close()
+                raise ValueError(f"进度文件格式不正确：{self.path}")
+        self._maps.append(mapping)
+
+    def _catch_up(self) -> None:
+        """Index slots other processes appended since the last look."""
+        _, used, _ = _HEADER.unpack_from(self._maps[0], 0)
+        slot = self._indexed
+        while slot < used:
+            segment, local = _segment_of(slot)
+            offset = self._locate(slot)[1]
+            take = min(used - slot, (_SEGMENT_SLOTS << segment) - local)
+            data = self._maps[segment][offset : offset + take * _SLOT.size]
+            for position, (key, _, _) in enumerate(_SLOT.iter_unpack(data), start=slot):
+                self._index.setdefault(key, position)
+            slot += take
+        self._indexed = max(self._indexed, used)
@@ -1,12 +1,32 @@
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
-import pandas as pd
+from typing import TYPE_CHECKING, Mapping, Optional, Sequence
 import random
+import threading
 
-from .utils import parse_options_text, parse_prompt
+from .cache import read_bank_table
+from .instrument import timed
+from .progress import ProgressStore, progress_store_path, read_saved_counts
+from .records import QuestionRecord, build_records, content_hash, question_keys
+from .sampler import ProgressSampler
+from .scheduler import Scheduler, create_scheduler
+from .utils import (
+    answers_match,
+    normalize_answers,
+    parse_options_text,
+    parse_prompt,
+    sidecar_path,
+    stat_key,
+)
+from .workbook import Table
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .papers import Paper
 
 
 @dataclass(frozen=True)
@@ -17,10 +37,41 @@ class QuestionSelection:
     answer: str
     correct_count: int
     remaining_count: int
+    record: Optional[QuestionRecord] = None
+
+    def is_correct(self, letters: list[str]) -> bool:
+        if self.record is not None:
+            return self.record.check(letters)
+        return answers_match(letters, self.answer)
+
+    @property
+    def answer_letters(self) -> list[str]:
+        if self.record is not None:
+            return self.record.answer_letters
+        return normalize_answers(self.answer)
 
 
 class QuestionBank:
-    """Wrapper around the Excel question bank with helper utilities."""
+    """Wrapper around the Excel question bank with helper utilities.
+
+    Correct counts live in the folder's :class:`~quizbank.progress.ProgressStore`,
+    keyed by question content and joined to the rows at load, so the
+    workbook is only ever read. A ``正确次数`` column left by older versions
+    seeds the questions the store has not seen yet.
+
+    ``policy`` picks the :mod:`~quizbank.scheduler` used by
+    :meth:`select_question`; the default ``"weighted"`` keeps the original
+    inverse-count random draw.
+
+    In-memory state is guarded by one lock and file I/O by another, so
+    :meth:`store_answer`, :meth:`sync`, :meth:`save` and :meth:`close` may
+    run on a worker thread while the UI thread keeps selecting questions and
+    marking answers (:meth:`mark_answer`).
+
+    Loading never imports pandas: the sheet is read as a column table (see
+    :mod:`~quizbank.workbook`) and correct counts live in the sampler.
+    :attr:`data` builds a DataFrame on demand for callers that want one.
+    """
 
     def __init__(
         self,
@@ -28,63 +79,382 @@ class QuestionBank:
         *,
         correct_column: str = "正确次数",
         max_correct: int = 5,
+        durability: str = "batch",
+        cache: str = "auto",
+        policy: str = "weighted",
     ) -> None:
         self.path = Path(excel_path)
         if not self.path.exists():
             raise FileNotFoundError(f"Question bank not found: {self.path}")
         self.correct_column = correct_column
-        self.max_correct = max_correct
-        self._data = self._load()
+        self._max_correct = max_correct
+        self.cache = cache
+        self.policy = policy
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self._disk_key = stat_key(self.path)
+        self._table, file_counts = self._load()
+        self._row_keys = self._hash_rows(self._table)
+        self._records = self._build_records()
+        self._keys = question_keys(self._records)
+        self._store = ProgressStore(progress_store_path(self.path), durability=durability)
+        self._slots = self._join_progress(file_counts)
+        self._sampler = self._build_sampler(self._store.counts(self._slots))
+        self._scheduler = self._build_scheduler()
+        if self.cache == "rebuild":
+            # 只在首次加载时强制重建，之后的 reload 照常使用快照
+            self.cache = "auto"
+
+    @timed("bank.load")
+    def _load(self) -> tuple[Table, list[int]]:
+        table = dict(read_bank_table(self.path, cache=self.cache))
+        return table, self._file_counts(table)
+
+    def _join_progress(self, file_counts: list[int]) -> list[int]:
+        """Store slot of every row; rows new to the store start from the sheet's counts."""
+        return self._store.slots(self._keys, file_counts)
+
+    def _file_counts(self, table: Table) -> list[int]:
+        """Counts written in the sheet; adds an all-zero column when it is missing."""
+        rows = len(next(iter(table.values()), ()))
+        raw = table.get(self.correct_column)
+        if raw is None:
+            table[self.correct_column] = raw = [0] * rows
+        return _count_values(raw)
+
+    @staticmethod
+    def _hash_rows(table: Table) -> list[int]:
+        rows = len(next(iter(table.values()), ()))
+        empty = [""] * rows
+        return [
+            content_hash(prompt, options, answer)
+            for prompt, options, answer in zip(
+                table.get("题目", empty), table.get("选项", empty), table.get("答案", empty)
+            )
+        ]
+
+    def _build_records(self) -> list[QuestionRecord]:
+        return _table_records(self._table)
+
+    def _build_sampler(self, counts) -> ProgressSampler:
+        return ProgressSampler(counts, self._max_correct)
+
+    def _snapshot(self) -> Table:
+        """Copy of the sheet with current counts; call with the state lock held."""
+        table = dict(self._table)
+        table[self.correct_column] = list(self._sampler.counts)
+        return table
+
+    def _build_scheduler(self) -> Scheduler:
+        return create_scheduler(
+            self.policy, self._sampler, sidecar_path(self.path, self.policy), self._keys
+        )
+
+    @property
+    def data(self) -> "pd.DataFrame":
+        """A DataFrame copy of the bank with current counts (imports pandas)."""
+        import pandas as pd
 
-    def _load(self) -> pd.DataFrame:
-        df = pd.read_excel(self.path)
-        if self.correct_column not in df.columns:
-            df[self.correct_column] = 0
-        df[self.correct_column] = df[self.correct_column].fillna(0).astype(int)
-        return df
+        with self._lock:
+            return pd.DataFrame(self._snapshot())
 
     @property
-    def data(self) -> pd.DataFrame:
-        return self._data
+    def max_correct(self) -> int:
+        return self._max_correct
 
-    def remaining_questions(self) -> pd.DataFrame:
-        return self._data[self._data[self.correct_column] < self.max_correct]
+    @max_correct.setter
+    def max_correct(self, value: int) -> None:
+        with self._lock:
+            self._max_correct = value
+            self._sampler.max_correct = value
+            self._scheduler.rebuild()
 
+    @property
+    def remaining_count(self) -> int:
+        return self._sampler.remaining
+
+    @property
+    def scheduler(self) -> Scheduler:
+        return self._scheduler
+
+    @property
+    def records(self) -> list[QuestionRecord]:
+        return self._records
+
+    def correct_count(self, index: int) -> int:
+        return self._sampler.count(index)
+
+    @timed("bank.remaining_questions")
+    def remaining_questions(self) -> "pd.DataFrame":
+        df = self.data
+        return df[df[self.correct_column] < self.max_correct]
+
+    @timed("bank.select_question")
     def select_question(self, rng: Optional[random.Random] = None) -> Optional[QuestionSelection]:
         rng = rng or random.Random()
-        remaining = self.remaining_questions()
-        if remaining.empty:
-            return None
-        weights = 1 / (remaining[self.correct_column] + 1)
-        weights = weights / weights.sum()
-        chosen_index = rng.choices(remaining.index.tolist(), weights=weights.tolist(), k=1)[0]
-        row = self._data.loc[chosen_index]
-        prompt = row.get("题目", "")
-        options = row.get("选项", "")
-        answer = str(row.get("答案", "")).strip()
-        correct_count = int(row[self.correct_column])
-        remaining_count = len(remaining)
+        with self._lock:
+            position = self._scheduler.next(rng)
+            if position is None:
+                return None
+            return self._selection(position)
+
+    def _selection(self, position: int) -> QuestionSelection:
+        record = self._records[position]
         return QuestionSelection(
-            index=chosen_index,
-            prompt=prompt,
-            options=options,
-            answer=answer,
-            correct_count=correct_count,
-            remaining_count=remaining_count,
+            index=record.index,
+            prompt=record.prompt,
+            options=record.options_text,
+            answer=record.answer,
+            correct_count=self._sampler.count(position),
+            remaining_count=self._sampler.remaining,
+            record=record,
         )
 
+    def remap_selection(
+        self, selection: QuestionSelection, changes: BankChanges
+    ) -> Optional[QuestionSelection]:
+        """``selection`` as it reads after ``changes``, or ``None`` if its row was removed."""
+        position = changes.position(selection.index)
+        if position is None:
+            return None
+        with self._lock:
+            return self._selection(position)
+
+    def reselect(self, selection: QuestionSelection) -> Optional[QuestionSelection]:
+        """``selection`` with its current count, or ``None`` if its row is gone."""
+        with self._lock:
+            position = self._position(selection)
+            return None if position is None else self._selection(position)
+
+    def _position(self, selection: QuestionSelection) -> Optional[int]:
+        """Current row of ``selection``; call with the state lock held.
+
+        :meth:`refresh` keeps the records of unchanged rows and moves their
+        ``index``, so a selection follows its row until the row is removed
+        or edited.
+        """
+        record = selection.record
+        if record is None:
+            return selection.index if selection.index < len(self._records) else None
+        position = record.index
+        if position < len(self._records) and self._records[position] is record:
+            return position
+        return None
+
+    @timed("bank.record_correct")
     def record_correct(self, selection: QuestionSelection, *, increment: int = 1) -> None:
-        idx = selection.index
-        self._data.at[idx, self.correct_column] = int(self._data.at[idx, self.correct_column]) + increment
+        selection = self.mark_answer(selection, True, increment=increment)
+        self.store_answer(selection, True, increment=increment)
+
+    def record_incorrect(self, selection: QuestionSelection) -> None:
+        """Tell the scheduler about a wrong answer; the count is unchanged."""
+        self.store_answer(self.mark_answer(selection, False), False)
+
+    def mark_answer(
+        self, selection: QuestionSelection, correct: bool, *, increment: int = 1
+    ) -> QuestionSelection:
+        """Apply an answer to the sampler and scheduler in memory only.
+
+        :meth:`store_answer` writes it out afterwards and may run on a
+        worker thread, so the UI thread never waits for the store's file
+        lock; :meth:`record_correct` and :meth:`record_incorrect` do both.
+        """
+        with self._lock:
+            position = self._position(selection)
+            if position is None:
+                return selection
+            self._scheduler.answered(position, correct)
+            if correct:
+                self._sampler.set_count(position, self._sampler.count(position) + increment)
+            return self._selection(position)
+
+    @timed("bank.store_answer")
+    def store_answer(
+        self, selection: QuestionSelection, correct: bool, *, increment: int = 1
+    ) -> Optional[QuestionSelection]:
+        """Write an answer applied by :meth:`mark_answer`; return the question as stored.
+
+        Returns ``None`` if a :meth:`refresh` removed or edited the row in
+        between, in which case the answer is dropped.
+        """
+        with self._io_lock:
+            with self._lock:
+                position = self._position(selection)
+                if position is None:
+                    return None
+                slot = self._slots[position]
+            # 文件锁在状态锁之外获取，等锁期间界面线程照常抽题
+            count = self._store.add(slot, increment) if correct else None
+            with self._lock:
+                if count is not None:
+                    # 以存储中的次数为准，其他进程同时练习同一题时不会互相覆盖
+                    self._sampler.set_count(position, count)
+                if self._store.durability == "always":
+                    self._scheduler.flush()
+                return self._selection(position)
+
+    def reset_progress(self) -> None:
+        with self._lock:
+            self._sampler = self._build_sampler([0] * len(self._records))
+            self._store.set_many((slot, 0) for slot in self._slots)
+            self._scheduler = self._build_scheduler()
+            self._scheduler.reset()
+        self.save()
 
+    @timed("bank.sync")
+    def sync(self) -> None:
+        """Persist scheduling state.
+
+        Counts are written straight into the store's shared mapping, so they
+        already survive the process; ``durability`` decides how often they
+        are forced to disk.
+        """
+        with self._io_lock:
+            with self._lock:
+                self._scheduler.flush()
+
+    @timed("bank.save")
     def save(self) -> None:
-        self._data.to_excel(self.path, index=False)
+        """Force progress to disk and rewrite scheduling state in its smallest form."""
+        with self._io_lock:
+            with self._lock:
+                self._scheduler.compact()
+            self._store.flush()
+
+    def close(self) -> None:
+        with self._io_lock:
+            with self._lock:
+                self._scheduler.close()
+            self._store.close()
 
     def reload(self) -> None:
-        self._data = self._load()
+        with self._io_lock, self._lock:
+            self._scheduler.flush()
+            self._store.flush()
+            self._disk_key = stat_key(self.path)
+            self._table, file_counts = self._load()
+            self._row_keys = self._hash_rows(self._table)
+            self._records = self._build_records()
+            self._keys = question_keys(self._records)
+            self._slots = self._join_progress(file_counts)
+            self._sampler = self._build_sampler(self._store.counts(self._slots))
+            self._scheduler = self._build_scheduler()
+
+    @timed("bank.refresh")
+    def refresh(self) -> Optional[BankChanges]:
+        """Apply edits made to the workbook on disk without losing progress.
+
+        Rows are matched by :func:`~quizbank.records.content_hash`. An
+        unmatched row right after a matched one pairs with the old row in the
+        same place and counts as edited. Matched rows keep their in-memory
+        count and scheduling state, except edited rows whose answer changed,
+        which start over. Those and added rows take the progress store's
+        count for their content (the sheet's for questions it has never
+        seen). Carried counts are written under each row's new key; the
+        workbook the user is editing is never written to.
+
+        Returns ``None`` when the file has not changed since it was last
+        loaded, saved or refreshed. Selections taken earlier refer to old
+        positions; map them with :meth:`BankChanges.position`.
+        """
+        with self._io_lock:
+            disk_key = stat_key(self.path)
+            if disk_key is None or disk_key == self._disk_key:
+                return None
+            # 读文件时不持有状态锁，界面线程可以继续抽题答题
+            table = dict(read_bank_table(self.path, cache=self.cache))
+            file_counts = self._file_counts(table)
+            new_keys = self._hash_rows(table)
+            empty = [""] * len(new_keys)
+            with self._lock:
+                old_records = self._records
+                mapping, edited = _match_rows(self._row_keys, new_keys)
+                # 只解析修改过和新增的行，其余行沿用原来的 QuestionRecord
+                fresh = sorted({*edited, *(pos for pos, old in enumerate(mapping) if old is None)})
+                columns = [table.get(name, empty) for name in ("题目", "选项", "答案")]
+                built = {
+                    record.index: record
+                    for record in build_records(
+                        fresh, *([column[pos] for pos in fresh] for column in columns)
+                    )
+                }
+                reset = [
+                    pos
+                    for pos in edited
+                    if built[pos].answer_mask != old_records[mapping[pos]].answer_mask
+                ]
+                carry = list(mapping)
+                for pos in reset:
+                    carry[pos] = None
+                new_records = []
+                for pos, old in enumerate(mapping):
+                    record = built.get(pos)
+                    if record is None:
+                        record = old_records[old]
+                        record.index = pos
+                    new_records.append(record)
+                keys = question_keys(new_records)
+                slots = self._store.slots(keys, file_counts)
+                counts = self._store.counts(slots)
+                # 改了题干、答案未变的行换了键，把原键下的次数搬到新键下
+                moved = []
+                for pos, old in enumerate(carry):
+                    if old is not None and slots[pos] != self._slots[old]:
+                        counts[pos] = self._store.get(self._slots[old])
+                        moved.append((slots[pos], counts[pos]))
+                self._store.set_many(moved)
+
+                if len(counts) == len(self._sampler.counts):
+                    # 行数不变时只更新变动的行，抽题用的树原地修改
+                    for pos, count in enumerate(counts):
+                        if count != self._sampler.count(pos):
+                            self._sampler.set_count(pos, count)
+                else:
+                    self._sampler = self._build_sampler(counts)
+                self._scheduler.remap(self._sampler, carry, keys)
+                self._table = table
+                self._row_keys = new_keys
+                self._records = new_records
+                self._keys = keys
+                self._slots = slots
+                self._disk_key = disk_key
+        matched = {old for old in mapping if old is not None}
+        return BankChanges(
+            mapping=tuple(mapping),
+            added=tuple(pos for pos, old in enumerate(mapping) if old is None),
+            removed=tuple(old for old in range(len(old_records)) if old not in matched),
+            edited=tuple(edited),
+            reset=tuple(reset),
+        )
+
+    def generate_papers(
+        self,
+        count: int,
+        quota: Mapping[str, int],
+        *,
+        seed: int = 0,
+        max_overlap: Optional[float] = 0.5,
+        shuffle: bool = True,
+    ) -> list["Paper"]:
+        """Draw practice papers from this bank; see :func:`quizbank.papers.generate_papers`."""
+        from .papers import generate_papers
+
+        with self._lock:
+            records = list(self._records)
+        return generate_papers(
+            records, count, quota, seed=seed, max_overlap=max_overlap, shuffle=shuffle
+        )
 
     @staticmethod
     def describe(selection: QuestionSelection) -> dict[str, object]:
+        record = selection.record
+        if record is not None:
+            return {
+                "type": record.qtype,
+                "number": record.number,
+                "stem": record.stem,
+                "options": list(record.options),
+            }
         prompt_type, prompt_number, prompt_stem = parse_prompt(selection.prompt)
         options_type, options_list = parse_options_text(selection.options)
         qtype = prompt_type or options_type or ""
@@ -94,3 +464,131 @@ class QuestionBank:
             "stem": prompt_stem,
             "options": options_list,
         }
+
+
+@dataclass(frozen=True)
+class BankChanges:
+    """What :meth:`QuestionBank.refresh` found; positions are row offsets.
+
+    ``mapping[new]`` is the old position of each new row (``None`` if
+    added). ``edited`` and ``added`` use new positions, ``removed`` old ones;
+    ``reset`` lists the edited rows whose answer changed and whose progress
+    therefore restarted.
+    """
+
+    mapping: tuple[Optional[int], ...]
+    added: tuple[int, ...]
+    removed: tuple[int, ...]
+    edited: tuple[int, ...]
+    reset: tuple[int, ...]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.edited) or any(
+            old != new for new, old in enumerate(self.mapping)
+        )
+
+    def position(self, old: int) -> Optional[int]:
+        """New position of the row that was at ``old``, or ``None`` if it was removed."""
+        for new, previous in enumerate(self.mapping):
+            if previous == old:
+                return new
+        return None
+
+
+def _match_rows(
+    old_keys: Sequence[int], new_keys: Sequence[int]
+) -> tuple[list[Optional[int]], list[int]]:
+    """Match rows by content hash; returns ``(new -> old mapping, edited new rows)``."""
+    queues: dict[int, deque[int]] = {}
+    for pos, key in enumerate(old_keys):
+        queues.setdefault(key, deque()).append(pos)
+    mapping: list[Optional[int]] = [None] * len(new_keys)
+    taken = bytearray(len(old_keys))
+    for pos, key in enumerate(new_keys):
+        queue = queues.get(key)
+        if queue:
+            old = queue.popleft()
+            mapping[pos] = old
+            taken[old] = 1
+    edited: list[int] = []
+    for pos in range(len(new_keys)):
+        if mapping[pos] is not None:
+            continue
+        # 紧跟在已匹配行后的新行，若旧表同一位置的行没有着落，就视为原地修改
+        if pos == 0:
+            old = 0
+        elif mapping[pos - 1] is not None:
+            old = mapping[pos - 1] + 1
+        else:
+            continue
+        if old < len(old_keys) and not taken[old]:
+            mapping[pos] = old
+            taken[old] = 1
+            edited.append(pos)
+    return mapping, edited
+
+
+def _table_records(table: Table) -> list[QuestionRecord]:
+    rows = len(next(iter(table.values()), ()))
+    empty = [""] * rows
+    columns = [table.get(name, empty) for name in ("题目", "选项", "答案")]
+    return build_records(range(rows), *columns)
+
+
+def _count_values(raw: Sequence) -> list[int]:
+    return [int(value) if isinstance(value, (int, float)) and value == value else 0 for value in raw]
+
+
+SQLITE_SUFFIXES: tuple[str, ...] = (".sqlite", ".sqlite3", ".db")
+
+
+def open_bank(path: str | Path, **options):
+    """Open an Excel or SQLite bank depending on the file suffix."""
+    if Path(path).suffix.lower() in SQLITE_SUFFIXES:
+        from .sqlite_bank import SQLiteQuestionBank
+
+        if options.get("policy", "weighted") != "weighted":
+            raise ValueError("SQLite 题库目前只支持加权随机抽题")
+
+        return SQLiteQuestionBank(path, max_correct=options.get("max_correct", 5))
+    return QuestionBank(path, **options)
+
+
+def load_records(path: str | Path, *, cache: str = "auto") -> list[QuestionRecord]:
+    """Question records of an Excel or SQLite bank, for tools that never record answers.
+
+    Unlike :func:`open_bank` this leaves progress alone: no store is
+    created, joined or migrated.
+    """
+    path = Path(path)
+    if path.suffix.lower() in SQLITE_SUFFIXES:
+        from .sqlite_bank import SQLiteQuestionBank
+
+        bank = SQLiteQuestionBank(path)
+        try:
+            return list(bank.records)
+        finally:
+            bank.close()
+    if not path.exists():
+        raise FileNotFoundError(f"Question bank not found: {path}")
+    return _table_records(read_bank_table(path, cache=cache))
+
+
+def saved_counts(
+    path: str | Path, *, correct_column: str = "正确次数", cache: str = "auto"
+) -> tuple[list[QuestionRecord], list[int]]:
+    """Records of an Excel bank and the counts :class:`QuestionBank` would start from.
+
+    The progress store and the sheet's ``correct_column`` are consulted as
+    at load, but nothing is written.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Question bank not found: {path}")
+    table = read_bank_table(path, cache=cache)
+    records = _table_records(table)
+    counts = _count_values(table.get(correct_column, [0] * len(records)))
+    keys = question_keys(records)
+    stored = read_saved_counts(progress_store_path(path), keys)
+    return records, [stored.get(key, count) for key, count in zip(keys, counts)]
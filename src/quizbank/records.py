@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Iterable, Sequence
+
+from .utils import answer_mask, letters_to_mask, mask_to_letters, parse_options_text, parse_prompt
+
+
+def _cell_text(value) -> str:
+    if value is None or value != value:  # NaN
+        return ""
+    return str(value)
+
+
+class QuestionRecord:
+    """A question parsed once at load time.
+
+    ``answer_mask`` has bit ``i`` set for option letter ``"ABCDE"[i]``, so
+    grading a response is a single integer comparison.
+    """
+
+    __slots__ = (
+        "index",
+        "prompt",
+        "options_text",
+        "answer",
+        "qtype",
+        "number",
+        "stem",
+        "options",
+        "answer_mask",
+    )
+
+    def __init__(self, index: int, prompt: str, options_text: str, answer: str) -> None:
+        self.index = index
+        self.prompt = prompt
+        self.options_text = options_text
+        self.answer = answer
+        prompt_type, self.number, self.stem = parse_prompt(prompt)
+        options_type, options = parse_options_text(options_text)
+        self.qtype: str = prompt_type or options_type or ""
+        self.options: tuple[tuple[str, str], ...] = tuple(options)
+        self.answer_mask = answer_mask(answer)
+
+    @classmethod
+    def from_cells(cls, index: int, prompt, options, answer) -> "QuestionRecord":
+        return cls(index, _cell_text(prompt), _cell_text(options), _cell_text(answer).strip())
+
+    @property
+    def answer_letters(self) -> list[str]:
+        return mask_to_letters(self.answer_mask)
+
+    def check(self, letters: Iterable[str]) -> bool:
+        return letters_to_mask(letters) == self.answer_mask
+
+    def __repr__(self) -> str:
+        return f"QuestionRecord(index={self.index!r}, qtype={self.qtype!r}, number={self.number!r})"
+
+
+def content_hash(prompt, options, answer) -> int:
+    """Stable 64-bit hash of a question's cells, independent of its row."""
+    text = "\x1f".join(_cell_text(value).strip() for value in (prompt, options, answer))
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def question_key(record: QuestionRecord, occurrence: int = 0) -> int:
+    """Stable 64-bit identity of a question for progress tracking.
+
+    Hashes the stem without its type and number, the options and the
+    answer, ignoring whitespace, so renumbering, re-converting or moving the
+    question to another bank keeps the key. ``occurrence`` tells identical
+    questions within one bank apart.
+    """
+    options = "\0".join(letter + text for letter, text in record.options)
+    # str.split() 去掉所有空白；分隔符用 \0，它不算空白
+    text = "".join(f"{record.stem}\0{options}\0{record.answer_mask}".split())
+    if occurrence:
+        text += f"\0{occurrence}"
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def question_keys(records: Iterable[QuestionRecord]) -> list[int]:
+    """:func:`question_key` of every record, numbering repeats of the same question."""
+    seen: dict[int, int] = {}
+    keys = []
+    for record in records:
+        key = question_key(record)
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        keys.append(question_key(record, occurrence) if occurrence else key)
+    return keys
+
+
+def build_records(
+    index: Sequence[int],
+    prompts: Sequence,
+    options: Sequence,
+    answers: Sequence,
+) -> list[QuestionRecord]:
+    return [
+        QuestionRecord.from_cells(idx, prompt, opts, answer)
+        for idx, prompt, opts, answer in zip(index, prompts, options, answers)
+    ]
+
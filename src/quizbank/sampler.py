@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import math
+import random
+from array import array
+from functools import lru_cache
+from typing import Mapping, Optional, Sequence
+
+_RANDOM_BITS = 53
+
+
+@lru_cache(maxsize=None)
+def weight_scale(max_correct: int) -> int:
+    """``lcm(1..max_correct)``: the smallest scale keeping every weight an integer."""
+    return math.lcm(*range(1, max_correct + 1)) if max_correct > 0 else 1
+
+
+def count_weight(count: int, max_correct: int) -> int:
+    """Integer weight ``scale / (count + 1)`` of a question, 0 once it is mastered."""
+    if count >= max_correct:
+        return 0
+    return weight_scale(max_correct) // (max(count, 0) + 1)
+
+
+def draw_target(rng: random.Random, total: int) -> int:
+    """Map one ``rng.random()`` onto ``[0, total)`` exactly as ``random.choices`` would."""
+    # random() is k / 2**53; comparing integers keeps the draw exact.
+    k = int(rng.random() * (1 << _RANDOM_BITS))
+    return (k * total) >> _RANDOM_BITS
+
+
+class FenwickTree:
+    """Binary indexed tree over non-negative integer weights."""
+
+    def __init__(self, weights: Sequence[int]) -> None:
+        self._size = len(weights)
+        self._weights = list(weights)
+        tree = [0, *self._weights]
+        for i in range(1, self._size + 1):
+            parent = i + (i & -i)
+            if parent <= self._size:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._total = sum(self._weights)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def weight(self, index: int) -> int:
+        return self._weights[index]
+
+    def update(self, index: int, weight: int) -> None:
+        delta = weight - self._weights[index]
+        if not delta:
+            return
+        self._weights[index] = weight
+        self._total += delta
+        i = index + 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def find(self, target: int) -> int:
+        """Return the first index whose prefix sum exceeds ``target``."""
+        pos = 0
+        step = 1 << (self._size.bit_length() - 1) if self._size else 0
+        while step:
+            nxt = pos + step
+            if nxt <= self._size and self._tree[nxt] <= target:
+                pos = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+
+class ProgressSampler:
+    """Inverse-count weighted sampler over questions below ``max_correct``.
+
+    Weights are ``1 / (count + 1)`` scaled by ``lcm(1..max_correct)`` so they
+    stay exact integers under incremental updates. A draw consumes exactly one
+    ``rng.random()`` and picks the same row ``random.choices`` would for the
+    normalized weights, in O(log n).
+    """
+
+    def __init__(self, counts: Sequence[int], max_correct: int) -> None:
+        self._counts = array("l", (int(c) for c in counts))
+        self._max_correct = max_correct
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._tree = FenwickTree([self._weight(c) for c in self._counts])
+        self._remaining = sum(1 for c in self._counts if c < self._max_correct)
+
+    def _weight(self, count: int) -> int:
+        return count_weight(count, self._max_correct)
+
+    @property
+    def max_correct(self) -> int:
+        return self._max_correct
+
+    @max_correct.setter
+    def max_correct(self, value: int) -> None:
+        if value != self._max_correct:
+            self._max_correct = value
+            self._rebuild()
+
+    @property
+    def remaining(self) -> int:
+        return self._remaining
+
+    @property
+    def counts(self) -> array:
+        """Per-question correct counts; treat as read-only."""
+        return self._counts
+
+    def count(self, index: int) -> int:
+        return self._counts[index]
+
+    def set_count(self, index: int, count: int) -> None:
+        old = self._counts[index]
+        self._counts[index] = count
+        self._remaining += (count < self._max_correct) - (old < self._max_correct)
+        self._tree.update(index, self._weight(count))
+
+    def draw(self, rng: random.Random) -> Optional[int]:
+        total = self._tree.total
+        if total <= 0:
+            return None
+        index = self._tree.find(draw_target(rng, total))
+        if index >= len(self._tree):
+            index = self._tree.find(total - 1)
+        return index
+
+
+class OverlaySampler:
+    """Counts layered over a shared, read-only :class:`ProgressSampler`.
+
+    Only counts that differ from the base are stored, together with a sparse
+    Fenwick tree of weight differences, so memory grows with the questions
+    a user has answered rather than with the bank. Draws pick the same row
+    a full :class:`ProgressSampler` holding the same counts would.
+    """
+
+    def __init__(self, base: ProgressSampler, counts: Optional[Mapping[int, int]] = None) -> None:
+        self._base = base
+        self._counts: dict[int, int] = {}
+        self._delta: dict[int, int] = {}
+        self._total = base._tree.total
+        self._remaining = base.remaining
+        for index, count in (counts or {}).items():
+            self.set_count(index, count)
+
+    @property
+    def max_correct(self) -> int:
+        return self._base.max_correct
+
+    @property
+    def remaining(self) -> int:
+        return self._remaining
+
+    @property
+    def overrides(self) -> dict[int, int]:
+        """Counts that differ from the base, by row; treat as read-only."""
+        return self._counts
+
+    def count(self, index: int) -> int:
+        count = self._counts.get(index)
+        return self._base.count(index) if count is None else count
+
+    def set_count(self, index: int, count: int) -> None:
+        old = self.count(index)
+        if count == old:
+            return
+        if count == self._base.count(index):
+            del self._counts[index]
+        else:
+            self._counts[index] = count
+        limit = self.max_correct
+        self._remaining += (count < limit) - (old < limit)
+        delta = count_weight(count, limit) - count_weight(old, limit)
+        if not delta:
+            return
+        self._total += delta
+        size = len(self._base._tree)
+        i = index + 1
+        while i <= size:
+            value = self._delta.get(i, 0) + delta
+            if value:
+                self._delta[i] = value
+            else:
+                del self._delta[i]
+            i += i & -i
+
+    def _find(self, target: int) -> int:
+        tree = self._base._tree
+        size = len(tree)
+        pos = 0
+        step = 1 << (size.bit_length() - 1) if size else 0
+        while step:
+            nxt = pos + step
+            if nxt <= size:
+                node = tree._tree[nxt] + self._delta.get(nxt, 0)
+                if node <= target:
+                    pos = nxt
+                    target -= node
+            step >>= 1
+        return pos
+
+    def draw(self, rng: random.Random) -> Optional[int]:
+        total = self._total
+        if total <= 0:
+            return None
+        index = self._find(draw_target(rng, total))
+        if index >= len(self._base._tree):
+            index = self._find(total - 1)
+        return index
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import heapq
+import os
+import random
+import time
+from array import array
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from .sampler import ProgressSampler
+
+DAY_SECONDS = 86400.0
+
+
+class Scheduler:
+    """Decides which question a :class:`QuestionBank` shows next.
+
+    Positions are row offsets into the bank. Correct counts stay owned by the
+    bank's :class:`ProgressSampler`; a scheduler only orders the rows that are
+    still below ``max_correct``.
+    """
+
+    name = ""
+
+    def __init__(self, sampler: ProgressSampler) -> None:
+        self.sampler = sampler
+
+    def next(self, rng: random.Random) -> Optional[int]:
+        raise NotImplementedError
+
+    def answered(self, position: int, correct: bool) -> None:
+        """Called after every graded answer (before the count is updated)."""
+
+    def rebuild(self) -> None:
+        """Called when ``max_correct`` or the counts change wholesale."""
+
+    def reset(self) -> None:
+        """Forget all scheduling state."""
+
+    def remap(
+        self, sampler: ProgressSampler, mapping: Sequence[Optional[int]], keys: Sequence[int]
+    ) -> None:
+        """Follow rows to new positions after the bank was edited.
+
+        ``mapping[new]`` is the old position of row ``new``, or ``None`` for
+        a row whose state starts fresh; ``keys`` are the rows' new
+        :func:`~quizbank.records.question_key` values.
+        """
+        self.sampler = sampler
+        self.rebuild()
+
+    def flush(self) -> None:
+        """Persist changes made since the last flush."""
+
+    def compact(self) -> None:
+        """Rewrite persisted state in its smallest form."""
+
+    def close(self) -> None:
+        self.flush()
+
+
+class WeightedScheduler(Scheduler):
+    """The original policy: random draw weighted by ``1 / (count + 1)``."""
+
+    name = "weighted"
+
+    def next(self, rng: random.Random) -> Optional[int]:
+        return self.sampler.draw(rng)
+
+
+class SM2Scheduler(Scheduler):
+    """SM-2 style spaced repetition with a min-heap keyed by due time.
+
+    Each row keeps ``interval`` (seconds), ``ease`` and ``reps``. A correct
+    answer grows the interval (1 day, 6 days, then ``interval * ease``); a
+    wrong one resets ``reps`` and brings the row back after
+    ``relearn_seconds``. Unseen rows are due immediately, in an order
+    shuffled by the ``rng`` of the first :meth:`next` call, so a seeded rng
+    reproduces a session.
+
+    The heap uses lazy deletion: rescheduling pushes a new entry and stale
+    ones are discarded when they reach the top, so each pick is amortized
+    O(log n). When nothing is due yet the earliest row is returned anyway.
+
+    State for rows that have been answered is appended to ``state_path`` as
+    ``<key> <interval> <ease> <reps> <due>`` lines (last one wins) and
+    rewritten in full on :meth:`compact`. ``key`` is the row's
+    :func:`~quizbank.records.question_key`, so the state follows a question
+    when the bank is reordered or re-converted; lines for questions no
+    longer in the bank are dropped.
+    """
+
+    name = "sm2"
+
+    def __init__(
+        self,
+        sampler: ProgressSampler,
+        state_path: str | Path,
+        keys: Sequence[int],
+        *,
+        clock: Callable[[], float] = time.time,
+        relearn_seconds: float = 60.0,
+        initial_ease: float = 2.5,
+    ) -> None:
+        super().__init__(sampler)
+        self.path = Path(state_path)
+        self.clock = clock
+        self.relearn_seconds = relearn_seconds
+        self.initial_ease = initial_ease
+        self._keys = list(keys)
+        size = len(sampler.counts)
+        self._interval = array("d", bytes(8 * size))
+        self._ease = array("d", [initial_ease]) * size
+        self._reps = array("l", bytes(array("l").itemsize * size))
+        self._due = array("d", bytes(8 * size))
+        self._seen = bytearray(size)
+        self._dirty: set[int] = set()
+        self._heap: list[tuple[float, int, int]] = []
+        self._order = list(range(size))
+        self._shuffled = False
+        if self._replay():
+            # 文件里有已删除题目的状态，重写一次把它们去掉
+            self.compact()
+        self.rebuild()
+
+    def _replay(self) -> bool:
+        """Load saved state; returns whether any line named a question no longer in the bank."""
+        if not self.path.exists():
+            return False
+        positions = {key: row for row, key in enumerate(self._keys)}
+        stale = False
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                if not line.endswith("\n"):
+                    break
+                parts = line.split()
+                if len(parts) != 5:
+                    continue
+                try:
+                    key = int(parts[0])
+                    values = (float(parts[1]), float(parts[2]), int(parts[3]), float(parts[4]))
+                except ValueError:
+                    continue
+                row = positions.get(key)
+                if row is None:
+                    stale = True
+                    continue
+                self._interval[row], self._ease[row], self._reps[row], self._due[row] = values
+                self._seen[row] = 1
+        return stale
+
+    def rebuild(self) -> None:
+        counts = self.sampler.counts
+        limit = self.sampler.max_correct
+        self._heap = [
+            (self._due[row], self._order[row], row)
+            for row in range(len(counts))
+            if counts[row] < limit
+        ]
+        heapq.heapify(self._heap)
+
+    def next(self, rng: random.Random) -> Optional[int]:
+        if not self._shuffled:
+            # 同时到期的题目按这个顺序出题，由调用方的 rng 打乱才能用 --seed 复现
+            rng.shuffle(self._order)
+            self._shuffled = True
+            self.rebuild()
+        heap = self._heap
+        counts = self.sampler.counts
+        limit = self.sampler.max_correct
+        while heap:
+            due, _, row = heap[0]
+            if due == self._due[row] and counts[row] < limit:
+                return row
+            heapq.heappop(heap)
+        return None
+
+    def answered(self, position: int, correct: bool) -> None:
+        now = self.clock()
+        quality = 4 if correct else 1
+        ease = self._ease[position] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+        self._ease[position] = max(1.3, ease)
+        if correct:
+            reps = self._reps[position]
+            if reps == 0:
+                interval = DAY_SECONDS
+            elif reps == 1:
+                interval = 6 * DAY_SECONDS
+            else:
+                interval = self._interval[position] * self._ease[position]
+            self._reps[position] = reps + 1
+        else:
+            self._reps[position] = 0
+            interval = self.relearn_seconds
+        self._interval[position] = interval
+        # 保证新的到期时间与旧堆条目不同，旧条目才会被惰性丢弃
+        due = max(now + interval, self._due[position] + 1e-6)
+        self._due[position] = due
+        self._seen[position] = 1
+        self._dirty.add(position)
+        heapq.heappush(self._heap, (due, self._order[position], position))
+
+    def state(self, position: int) -> dict[str, float]:
+        return {
+            "interval": self._interval[position],
+            "ease": self._ease[position],
+            "reps": self._reps[position],
+            "due": self._due[position],
+        }
+
+    def _line(self, row: int) -> str:
+        return (
+            f"{self._keys[row]} {self._interval[row]!r} {self._ease[row]!r} "
+            f"{self._reps[row]} {self._due[row]!r}\n"
+        )
+
+    def flush(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write("".join(self._line(row) for row in sorted(self._dirty)))
+        self._dirty.clear()
+
+    def compact(self) -> None:
+        self._dirty.clear()
+        rows = [row for row in range(len(self._seen)) if self._seen[row]]
+        if not rows:
+            if self.path.exists():
+                self.path.unlink()
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            handle.write("".join(self._line(row) for row in rows))
+        os.replace(tmp_path, self.path)
+
+    def remap(
+        self, sampler: ProgressSampler, mapping: Sequence[Optional[int]], keys: Sequence[int]
+    ) -> None:
+        # 未写出的改动按旧位置记录，先用旧键写出
+        self.flush()
+        size = len(mapping)
+        interval = array("d", bytes(8 * size))
+        ease = array("d", [self.initial_ease]) * size
+        reps = array("l", bytes(array("l").itemsize * size))
+        due = array("d", bytes(8 * size))
+        seen = bytearray(size)
+        # 改了题干的题目换了键，删掉的题目留下了无主的行，这两种情况才需要重写状态文件
+        rewrite = False
+        carried = 0
+        for new, old in enumerate(mapping):
+            if old is not None and self._seen[old]:
+                interval[new], ease[new] = self._interval[old], self._ease[old]
+                reps[new], due[new], seen[new] = self._reps[old], self._due[old], 1
+                rewrite = rewrite or keys[new] != self._keys[old]
+                carried += 1
+        rewrite = rewrite or carried < sum(self._seen)
+        self._interval, self._ease, self._reps, self._due, self._seen = interval, ease, reps, due, seen
+        self._keys = list(keys)
+        self._order = list(range(size))
+        self._shuffled = False
+        self.sampler = sampler
+        if rewrite:
+            self.compact()
+        self.rebuild()
+
+    def reset(self) -> None:
+        size = len(self._seen)
+        self._interval = array("d", bytes(8 * size))
+        self._ease = array("d", [self.initial_ease]) * size
+        self._reps = array("l", bytes(array("l").itemsize * size))
+        self._due = array("d", bytes(8 * size))
+        self._seen = bytearray(size)
+        self._dirty.clear()
+        if self.path.exists():
+            self.path.unlink()
+        self.rebuild()
+
+
+POLICIES: dict[str, str] = {
+    WeightedScheduler.name: "加权随机",
+    SM2Scheduler.name: "间隔重复（SM-2）",
+}
+
+
+def create_scheduler(
+    policy: str, sampler: ProgressSampler, state_path: str | Path, keys: Sequence[int]
+) -> Scheduler:
+    if policy == WeightedScheduler.name:
+        return WeightedScheduler(sampler)
+    if policy == SM2Scheduler.name:
+        return SM2Scheduler(sampler, state_path, keys)
+    raise ValueError(f"Unknown scheduling policy: {policy}")
@@ -0,0 +1,296 @@
+"""Character n-gram inverted index over every bank in a directory."""
+
+from __future__ import annotations
+
+import os
+import pickle
+import re
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+from .records import QuestionRecord
+from .utils import sidecar_path
+
+if TYPE_CHECKING:
+    import numpy as np
+
+GRAM_SIZE = 2
+_INDEX_VERSION = 2
+_RE_NOISE = re.compile(r"[\s\W_]+")
+_BANK_SUFFIXES = (".xlsx", ".xlsm", ".xls", ".sqlite", ".sqlite3", ".db")
+_SEGMENT_FIELDS = (
+    "rows", "numbers", "stems", "options", "answers", "texts", "stem_ends", "spans", "docs"
+)
+
+
+def normalize(text: str) -> str:
+    return _RE_NOISE.sub("", text).lower()
+
+
+def grams(text: str, size: int = GRAM_SIZE) -> set[str]:
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    bank: str
+    path: Path
+    row: int
+    number: Optional[int]
+    stem: str
+    options: tuple[tuple[str, str], ...]
+    answer: str
+    score: float
+
+    @property
+    def location(self) -> str:
+        """Human-readable position; ``row`` is the 1-based sheet row."""
+        if self.number is not None:
+            return f"{self.bank} 第{self.row}行（{self.number}题）"
+        return f"{self.bank} 第{self.row}行"
+
+
+def iter_bank_rows(path: str | Path) -> Iterator[tuple[int, str, str, str]]:
+    """Yield ``(sheet_row, prompt, options, answer)`` without going through pandas."""
+    path = Path(path)
+    if path.suffix.lower() in (".sqlite", ".sqlite3", ".db"):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            for row in conn.execute("SELECT id, prompt, options, answer FROM questions ORDER BY id"):
+                yield row[0] + 1, row[1], row[2], row[3]
+        finally:
+            conn.close()
+        return
+    if path.suffix.lower() == ".xls":
+        yield from _iter_xls_rows(path)
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        # 与 read_xlsx_table 一致读第一个工作表，而不是保存时激活的那个
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        columns = [header.index(name) if name in header else None for name in ("题目", "选项", "答案")]
+        for sheet_row, values in enumerate(rows, start=2):
+            cells = [
+                values[col] if col is not None and col < len(values) else None for col in columns
+            ]
+            if all(cell is None for cell in cells):
+                continue
+            yield (sheet_row, *cells)
+    finally:
+        workbook.close()
+
+
+def _iter_xls_rows(path: Path) -> Iterator[tuple[int, str, str, str]]:
+    """Legacy ``.xls`` banks: openpyxl cannot open them, so go through pandas."""
+    from .workbook import read_xlsx_table
+
+    table = read_xlsx_table(path)
+    columns = [table.get(name) for name in ("题目", "选项", "答案")]
+    size = max((len(values) for values in table.values()), default=0)
+    for position in range(size):
+        cells = [values[position] if values is not None else None for values in columns]
+        if all(cell is None for cell in cells):
+            continue
+        yield (position + 2, *cells)
+
+
+class _Segment:
+    """Index for one bank file, stored in that bank's sidecar directory."""
+
+    def __init__(self, path: Path, key: tuple[int, int]) -> None:
+        self.path = path
+        self.key = key
+        self.rows: list[int] = []
+        self.numbers: list[Optional[int]] = []
+        self.stems: list[str] = []
+        self.options: list[tuple[tuple[str, str], ...]] = []
+        self.answers: list[str] = []
+        self.texts: list[str] = []
+        self.stem_ends: list[int] = []
+        # 倒排表按 CSR 存放：gram -> (起, 止) 切片到同一个 docs 数组
+        self.spans: dict[str, tuple[int, int]] = {}
+        # numpy 只在建索引和查询时导入；空段没有 docs
+        self.docs: Optional["np.ndarray"] = None
+
+    @classmethod
+    def build(cls, path: Path, key: tuple[int, int]) -> "_Segment":
+        import numpy as np
+
+        segment = cls(path, key)
+        lists: dict[str, list[int]] = {}
+        for doc, (sheet_row, prompt, options, answer) in enumerate(iter_bank_rows(path)):
+            record = QuestionRecord.from_cells(sheet_row, prompt, options, answer)
+            stem = normalize(record.stem)
+            text = stem + normalize("".join(option for _, option in record.options))
+            segment.rows.append(sheet_row)
+            segment.numbers.append(record.number)
+            segment.stems.append(record.stem)
+            segment.options.append(record.options)
+            segment.answers.append(record.answer)
+            segment.texts.append(text)
+            segment.stem_ends.append(len(stem))
+            for gram in grams(text):
+                lists.setdefault(gram, []).append(doc)
+        start = 0
+        for gram, docs in lists.items():
+            segment.spans[gram] = (start, start + len(docs))
+            start += len(docs)
+        segment.docs = np.fromiter(
+            (doc for docs in lists.values() for doc in docs), dtype=np.int32, count=start
+        )
+        return segment
+
+    @classmethod
+    def load(cls, path: Path, key: tuple[int, int]) -> Optional["_Segment"]:
+        index_path = sidecar_path(path, "search")
+        try:
+            with open(index_path, "rb") as handle:
+                payload = pickle.load(handle)
+        except Exception:  # pylint: disable=broad-except
+            return None
+        if not isinstance(payload, dict) or payload.get("version") != _INDEX_VERSION:
+            return None
+        if tuple(payload.get("key", ())) != key:
+            return None
+        segment = cls(path, key)
+        for name in _SEGMENT_FIELDS:
+            setattr(segment, name, payload[name])
+        return segment
+
+    def store(self) -> None:
+        index_path = sidecar_path(self.path, "search")
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": _INDEX_VERSION, "key": self.key}
+        payload.update((name, getattr(self, name)) for name in _SEGMENT_FIELDS)
+        tmp_path = index_path.with_name(index_path.name + ".tmp")
+        with open(tmp_path, "wb") as handle:
+            pickle.dump(payload, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, index_path)
+
+    def search(self, query: str, query_grams: list[str], limit: int) -> list[tuple[float, int]]:
+        """Score documents by the share of query n-grams they contain.
+
+        A verbatim match adds 1, and another 0.5 when it falls in the stem.
+        Queries shorter than an n-gram fall back to a substring scan.
+        """
+        if len(query) < GRAM_SIZE:
+            matches = [doc for doc, text in enumerate(self.texts) if query in text]
+            return [(self._bonus(query, doc) + 1.0, doc) for doc in matches]
+        spans = [self.spans[gram] for gram in query_grams if gram in self.spans]
+        hits = [self.docs[start:end] for start, end in spans]
+        if not hits:
+            return []
+        import numpy as np
+
+        counts = np.bincount(np.concatenate(hits), minlength=len(self.texts))
+        # 至少命中一半的 n-gram 才算候选，避免只沾一两个字的噪声结果
+        floor = max(1, (len(query_grams) + 1) // 2)
+        candidates = np.flatnonzero(counts >= floor)
+        if len(candidates) > limit * 4:
+            top = np.argpartition(-counts[candidates], limit * 4)[: limit * 4]
+            candidates = candidates[top]
+        return [
+            (int(counts[doc]) / len(query_grams) + self._bonus(query, doc), doc)
+            for doc in candidates.tolist()
+        ]
+
+    def _bonus(self, query: str, doc: int) -> float:
+        position = self.texts[doc].find(query)
+        if position < 0:
+            return 0.0
+        if position + len(query) <= self.stem_ends[doc]:
+            return 1.5
+        return 1.0
+
+
+class SearchIndex:
+    """Incrementally maintained search index over a set of bank files.
+
+    Each bank has its own segment pickled next to it (see
+    :func:`~quizbank.utils.sidecar_path`) and keyed by file size and mtime;
+    :meth:`refresh` only re-reads banks whose key changed.
+    """
+
+    def __init__(
+        self, paths: Iterable[str | Path] = (), *, directory: str | Path | None = None
+    ) -> None:
+        self.paths = [Path(path) for path in paths]
+        self.directory = Path(directory) if directory is not None else None
+        self._segments: dict[Path, _Segment] = {}
+
+    @classmethod
+    def from_directory(cls, directory: str | Path) -> "SearchIndex":
+        """Index every bank currently in ``directory``, picking up new files on refresh."""
+        return cls(directory=directory)
+
+    def _bank_paths(self) -> list[Path]:
+        if self.directory is None:
+            return self.paths
+        return sorted(
+            path
+            for path in self.directory.iterdir()
+            if path.is_file()
+            and path.suffix.lower() in _BANK_SUFFIXES
+            and not path.name.startswith(("~$", "."))
+        )
+
+    def refresh(self) -> list[Path]:
+        """Bring every segment up to date; return the banks that were re-indexed."""
+        rebuilt: list[Path] = []
+        current: dict[Path, _Segment] = {}
+        for path in self._bank_paths():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            key = (stat.st_size, stat.st_mtime_ns)
+            segment = self._segments.get(path)
+            if segment is None or segment.key != key:
+                segment = _Segment.load(path, key)
+            if segment is None:
+                segment = _Segment.build(path, key)
+                try:
+                    segment.store()
+                except OSError:
+                    pass
+                rebuilt.append(path)
+            current[path] = segment
+        self._segments = current
+        return rebuilt
+
+    def __len__(self) -> int:
+        return sum(len(segment.texts) for segment in self._segments.values())
+
+    def search(self, query: str, *, limit: int = 20, refresh: bool = True) -> list[SearchHit]:
+        if refresh:
+            self.refresh()
+        text = normalize(query)
+        if not text:
+            return []
+        query_grams = sorted(grams(text))
+        scored = []
+        for segment in self._segments.values():
+            for score, doc in segment.search(text, query_grams, limit):
+                scored.append((score, -len(segment.texts[doc]), segment, doc))
+        scored.sort(key=lambda item: item[:2], reverse=True)
+        return [
+            SearchHit(
+                bank=segment.path.stem,
+                path=segment.path,
+                row=segment.rows[doc],
+                number=segment.numbers[doc],
+                stem=segment.stems[doc],
+                options=segment.options[doc],
+                answer=segment.answers[doc],
+                score=score,
+            )
+            for score, _, segment, doc in scored[:limit]
+        ]
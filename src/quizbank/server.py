@@ -0,0 +1,426 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import struct
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from .question_bank import SQLITE_SUFFIXES, load_records
+from .records import QuestionRecord, question_keys
+from .sampler import OverlaySampler, ProgressSampler
+from .utils import normalize_answers, sidecar_path
+
+_MAX_BODY = 64 * 1024
+_USER_MAGIC = b"QBUSER\x00\x01"
+_USER_ENTRY = struct.Struct("<Qq")  # 题目键, 正确次数
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class SharedBank:
+    """Question content loaded once and shared by every user."""
+
+    name: str
+    path: Path
+    records: tuple[QuestionRecord, ...]
+    keys: tuple[int, ...] = field(init=False, repr=False)
+    positions: dict[int, int] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.keys = tuple(question_keys(self.records))
+        self.positions = {key: position for position, key in enumerate(self.keys)}
+
+    @classmethod
+    def load(cls, name: str, path: Path) -> "SharedBank":
+        return cls(name=name, path=path, records=tuple(load_records(path)))
+
+    def progress_path(self, user: str) -> Path:
+        digest = hashlib.sha1(user.encode("utf-8")).hexdigest()[:16]
+        return sidecar_path(self.path, f"user-{digest}.progress")
+
+
+def read_user_counts(path: Path, positions: dict[int, int]) -> dict[int, int]:
+    """Saved counts of a user by row; questions no longer in the bank are dropped."""
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return {}
+    if not data.startswith(_USER_MAGIC):
+        return {}
+    data = data[len(_USER_MAGIC) :]
+    counts: dict[int, int] = {}
+    for key, count in _USER_ENTRY.iter_unpack(data[: len(data) - len(data) % _USER_ENTRY.size]):
+        position = positions.get(key)
+        if position is not None:
+            counts[position] = count
+    return counts
+
+
+def write_user_counts(path: Path, keys: tuple[int, ...], counts: dict[int, int]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    entries = b"".join(
+        _USER_ENTRY.pack(keys[position], count) for position, count in counts.items()
+    )
+    tmp_path.write_bytes(_USER_MAGIC + entries)
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class UserProgress:
+    sampler: OverlaySampler
+    rng: random.Random
+    attempts: int = 0
+    correct: int = 0
+    dirty: bool = False
+    touched: float = field(default_factory=time.monotonic)
+
+
+class PracticeServer:
+    """Multi-user practice state on top of shared, read-only banks.
+
+    Every bank has one read-only base sampler; a user only holds the counts
+    they have changed on top of it, persisted beside the bank as
+    ``(question key, count)`` pairs so progress follows questions when the
+    bank is edited, and no per-user workbook is needed.
+    """
+
+    def __init__(
+        self,
+        banks: Iterable[SharedBank],
+        *,
+        max_correct: int = 5,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.banks = {bank.name: bank for bank in banks}
+        self.max_correct = max_correct
+        self.seed = seed
+        self._progress: dict[tuple[str, str], UserProgress] = {}
+        self._base: dict[str, ProgressSampler] = {}
+
+    @classmethod
+    def from_directory(cls, directory: str | Path, **options) -> "PracticeServer":
+        root = Path(directory)
+        banks = []
+        for path in sorted(root.iterdir(), key=lambda p: p.name.lower()):
+            suffix = path.suffix.lower()
+            if not path.is_file() or not (suffix.startswith(".xls") or suffix in SQLITE_SUFFIXES):
+                continue
+            name = path.stem if suffix.startswith(".xls") else f"{path.stem}{suffix}"
+            banks.append(SharedBank.load(name, path))
+        return cls(banks, **options)
+
+    def _bank(self, name: str) -> SharedBank:
+        bank = self.banks.get(name)
+        if bank is None:
+            raise HTTPError(404, f"题库不存在：{name}")
+        return bank
+
+    def progress(self, user: str, bank_name: str) -> UserProgress:
+        if not user:
+            raise HTTPError(400, "缺少 user 参数")
+        key = (user, bank_name)
+        state = self._progress.get(key)
+        if state is None:
+            bank = self._bank(bank_name)
+            base = self._base.get(bank_name)
+            if base is None:
+                base = self._base[bank_name] = ProgressSampler(
+                    [0] * len(bank.records), self.max_correct
+                )
+            counts = read_user_counts(bank.progress_path(user), bank.positions)
+            rng = random.Random()
+            if self.seed is not None:
+                rng.seed(f"{self.seed}:{user}:{bank_name}")
+            state = UserProgress(sampler=OverlaySampler(base, counts), rng=rng)
+            self._progress[key] = state
+        state.touched = time.monotonic()
+        return state
+
+    def list_banks(self) -> dict[str, object]:
+        return {
+            "banks": [
+                {"name": bank.name, "questions": len(bank.records)} for bank in self.banks.values()
+            ]
+        }
+
+    def next_question(self, user: str, bank_name: str) -> dict[str, object]:
+        bank = self._bank(bank_name)
+        state = self.progress(user, bank_name)
+        position = state.sampler.draw(state.rng)
+        if position is None:
+            return {"done": True, "remaining": 0}
+        record = bank.records[position]
+        return {
+            "done": False,
+            "index": position,
+            "type": record.qtype,
+            "number": record.number,
+            "stem": record.stem,
+            "prompt": record.prompt,
+            "options": [list(option) for option in record.options],
+            "correct_count": state.sampler.count(position),
+            "remaining": state.sampler.remaining,
+        }
+
+    def submit(self, user: str, bank_name: str, index: int, answer: str) -> dict[str, object]:
+        bank = self._bank(bank_name)
+        state = self.progress(user, bank_name)
+        if not 0 <= index < len(bank.records):
+            raise HTTPError(400, f"题目序号超出范围：{index}")
+        record = bank.records[index]
+        correct = record.check(normalize_answers(answer))
+        state.attempts += 1
+        if correct:
+            state.correct += 1
+            state.sampler.set_count(index, state.sampler.count(index) + 1)
+            state.dirty = True
+        return {
+            "correct": correct,
+            "answer": "".join(record.answer_letters) or record.answer,
+            "correct_count": state.sampler.count(index),
+            "remaining": state.sampler.remaining,
+        }
+
+    def stats(self, user: str, bank_name: str) -> dict[str, object]:
+        bank = self._bank(bank_name)
+        state = self.progress(user, bank_name)
+        total = len(bank.records)
+        return {
+            "total": total,
+            "remaining": state.sampler.remaining,
+            "mastered": total - state.sampler.remaining,
+            "attempts": state.attempts,
+            "correct": state.correct,
+        }
+
+    def flush(self, *, idle_seconds: Optional[float] = None) -> int:
+        """Persist dirty progress; optionally evict users idle for ``idle_seconds``."""
+        written = 0
+        now = time.monotonic()
+        for key, state in list(self._progress.items()):
+            user, bank_name = key
+            if state.dirty:
+                bank = self.banks[bank_name]
+                write_user_counts(bank.progress_path(user), bank.keys, state.sampler.overrides)
+                state.dirty = False
+                written += 1
+            if idle_seconds is not None and now - state.touched > idle_seconds:
+                del self._progress[key]
+        return written
+
+    def dispatch(self, method: str, target: str, body: bytes) -> dict[str, object]:
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/banks":
+            return self.list_banks()
+        if url.path == "/next":
+            return self.next_question(query.get("user", ""), query.get("bank", ""))
+        if url.path == "/stats":
+            return self.stats(query.get("user", ""), query.get("bank", ""))
+        if url.path == "/submit":
+            if method != "POST":
+                raise HTTPError(405, "提交答案需要使用 POST")
+            try:
+                payload = json.loads(body.decode("utf-8") or "{}")
+                index = int(payload["index"])
+            except (ValueError, KeyError, TypeError) as exc:
+                raise HTTPError(400, f"提交内容不正确：{exc}") from exc
+            return self.submit(
+                str(payload.get("user", "")),
+                str(payload.get("bank", "")),
+                index,
+                str(payload.get("answer", "")),
+            )
+        raise HTTPError(404, f"接口不存在：{url.path}")
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                headers: dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                status = 200
+                # 请求行或长度不合法时无法定位下一个请求，回复后关闭连接
+                framed = False
+                try:
+                    if len(parts) != 3:
+                        raise HTTPError(400, "请求行格式不正确")
+                    method, target, version = parts
+                    length_text = headers.get("content-length") or "0"
+                    if not (length_text.isascii() and length_text.isdigit()):
+                        raise HTTPError(400, f"Content-Length 不正确：{length_text}")
+                    length = int(length_text)
+                    if length > _MAX_BODY:
+                        raise HTTPError(413, "请求体过大")
+                    body = await reader.readexactly(length) if length else b""
+                    framed = True
+                    payload = self.dispatch(method.upper(), target, body)
+                except HTTPError as exc:
+                    status, payload = exc.status, {"error": exc.message}
+                keep_alive = (
+                    framed
+                    and parts[2] == "HTTP/1.1"
+                    and headers.get("connection", "").lower() != "close"
+                )
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                head = (
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                )
+                writer.write(head.encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        *,
+        flush_interval: float = 10.0,
+        idle_seconds: float = 1800.0,
+    ) -> None:
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        print(f"题库服务已启动：http://{host}:{port}（共 {len(self.banks)} 个题库）")
+        try:
+            async with server:
+                while True:
+                    await asyncio.sleep(flush_interval)
+                    self.flush(idle_seconds=idle_seconds)
+        finally:
+            self.flush()
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[rank]
+
+
+async def _http_request(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    method: str,
+    target: str,
+    payload: Optional[dict[str, object]] = None,
+) -> dict[str, object]:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+    head = f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n"
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    return json.loads(await reader.readexactly(length))
+
+
+async def run_load_test(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    *,
+    clients: int = 200,
+    rounds: int = 50,
+    bank: Optional[str] = None,
+    seed: int = 0,
+) -> dict[str, float]:
+    """Drive ``clients`` concurrent users through next/submit cycles."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        banks = (await _http_request(reader, writer, "GET", "/banks"))["banks"]
+    finally:
+        writer.close()
+    if not banks:
+        raise RuntimeError("服务端没有可用题库。")
+    bank_name = bank or banks[0]["name"]
+    latencies: list[float] = []
+    errors = 0
+
+    async def client(number: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed * 100003 + number)
+        user = f"loadtest-{number}"
+        next_target = "/next?" + urlencode({"user": user, "bank": bank_name})
+        try:
+            conn_reader, conn_writer = await asyncio.open_connection(host, port)
+        except OSError:
+            errors += 1
+            return
+        try:
+            for _ in range(rounds):
+                start = time.perf_counter()
+                question = await _http_request(conn_reader, conn_writer, "GET", next_target)
+                latencies.append(time.perf_counter() - start)
+                if question.get("done"):
+                    break
+                letters = [letter for letter, _ in question["options"]] or ["A"]
+                start = time.perf_counter()
+                submission = {
+                    "user": user,
+                    "bank": bank_name,
+                    "index": question["index"],
+                    "answer": rng.choice(letters),
+                }
+                await _http_request(conn_reader, conn_writer, "POST", "/submit", submission)
+                latencies.append(time.perf_counter() - start)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, KeyError):
+            errors += 1
+        finally:
+            conn_writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+    }
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import random
+import sqlite3
+from dataclasses import replace
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .instrument import timed
+from .question_bank import QuestionBank, QuestionSelection, saved_counts
+from .records import QuestionRecord
+from .sampler import count_weight, draw_target
+from .workbook import write_xlsx_table
+
+SQLITE_SUFFIX = ".sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    prompt TEXT NOT NULL DEFAULT '',
+    options TEXT NOT NULL DEFAULT '',
+    answer TEXT NOT NULL DEFAULT '',
+    qtype TEXT NOT NULL DEFAULT '',
+    correct INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_questions_correct ON questions (correct);
+CREATE INDEX IF NOT EXISTS idx_questions_qtype ON questions (qtype);
+"""
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    # GUI 的查询都在单线程 I/O 池里执行；同一时刻只有一个线程使用连接
+    conn = sqlite3.connect(str(path), timeout=30.0, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class SQLiteQuestionBank:
+    """Question bank stored in a SQLite database in WAL mode.
+
+    Question text is read once; correct counts always come from the
+    database, so several CLI/GUI processes can practise on the same file.
+    Selection follows the same ``1 / (count + 1)`` weighting as
+    :class:`QuestionBank`, resolved per count level through the
+    ``correct`` index.
+    """
+
+    correct_column = "正确次数"
+    policy = "weighted"
+
+    def __init__(self, db_path: str | Path, *, max_correct: int = 5) -> None:
+        self.path = Path(db_path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Question bank not found: {self.path}")
+        self.max_correct = max_correct
+        self._conn = _connect(self.path)
+        self._records = self._load()
+
+    def _load(self) -> dict[int, QuestionRecord]:
+        rows = self._conn.execute("SELECT id, prompt, options, answer FROM questions ORDER BY id")
+        return {row[0]: QuestionRecord.from_cells(*row) for row in rows}
+
+    @property
+    def records(self) -> list[QuestionRecord]:
+        return list(self._records.values())
+
+    @property
+    def remaining_count(self) -> int:
+        (count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM questions WHERE correct < ?", (self.max_correct,)
+        ).fetchone()
+        return count
+
+    def correct_count(self, index: int) -> int:
+        row = self._conn.execute("SELECT correct FROM questions WHERE id = ?", (index,)).fetchone()
+        return int(row[0]) if row else 0
+
+    @timed("sqlite.select_question")
+    def select_question(self, rng: Optional[random.Random] = None) -> Optional[QuestionSelection]:
+        rng = rng or random.Random()
+        self._conn.execute("BEGIN")
+        try:
+            levels = self._conn.execute(
+                "SELECT correct, COUNT(*) FROM questions WHERE correct < ? "
+                "GROUP BY correct ORDER BY correct",
+                (self.max_correct,),
+            ).fetchall()
+            if not levels:
+                return None
+            weighted = [
+                (level, count, count_weight(level, self.max_correct)) for level, count in levels
+            ]
+            total = sum(count * weight for _, count, weight in weighted)
+            target = draw_target(rng, total)
+            for level, count, weight in weighted:
+                if target < count * weight:
+                    break
+                target -= count * weight
+            offset = min(target // weight, count - 1)
+            (chosen,) = self._conn.execute(
+                "SELECT id FROM questions WHERE correct = ? ORDER BY id LIMIT 1 OFFSET ?",
+                (level, offset),
+            ).fetchone()
+            remaining = sum(count for _, count, _ in weighted)
+        finally:
+            self._conn.execute("COMMIT")
+        record = self._records.get(chosen)
+        if record is None:
+            self._records = self._load()
+            record = self._records[chosen]
+        return QuestionSelection(
+            index=record.index,
+            prompt=record.prompt,
+            options=record.options_text,
+            answer=record.answer,
+            correct_count=level,
+            remaining_count=remaining,
+            record=record,
+        )
+
+    @timed("sqlite.record_correct")
+    def record_correct(self, selection: QuestionSelection, *, increment: int = 1) -> None:
+        self._conn.execute(
+            "UPDATE questions SET correct = correct + ? WHERE id = ?", (increment, selection.index)
+        )
+
+    def record_incorrect(self, selection: QuestionSelection) -> None:
+        """Wrong answers do not affect the weighted draw."""
+
+    def mark_answer(
+        self, selection: QuestionSelection, correct: bool, *, increment: int = 1
+    ) -> QuestionSelection:
+        """The database is only written by :meth:`store_answer`; this updates a copy."""
+        if not correct:
+            return selection
+        count = selection.correct_count + increment
+        finished = selection.correct_count < self.max_correct <= count
+        return replace(
+            selection, correct_count=count, remaining_count=selection.remaining_count - finished
+        )
+
+    def store_answer(
+        self, selection: QuestionSelection, correct: bool, *, increment: int = 1
+    ) -> Optional[QuestionSelection]:
+        if correct:
+            self.record_correct(selection, increment=increment)
+        return self.reselect(selection)
+
+    def reselect(self, selection: QuestionSelection) -> Optional[QuestionSelection]:
+        """``selection`` with its count read back from the database, or ``None`` if deleted."""
+        row = self._conn.execute(
+            "SELECT correct FROM questions WHERE id = ?", (selection.index,)
+        ).fetchone()
+        if row is None:
+            return None
+        return replace(selection, correct_count=int(row[0]), remaining_count=self.remaining_count)
+
+    def reset_progress(self) -> None:
+        self._conn.execute("UPDATE questions SET correct = 0")
+
+    def sync(self) -> None:
+        """Updates are committed immediately; kept for interface parity."""
+
+    def save(self) -> None:
+        """Updates are committed immediately; kept for interface parity."""
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def reload(self) -> None:
+        self._records = self._load()
+
+    def refresh(self) -> None:
+        """SQLite banks are edited through the database and picked up on the next draw."""
+        return None
+
+    describe = staticmethod(QuestionBank.describe)
+
+
+def import_records(
+    db_path: str | Path,
+    rows: Iterable[tuple[str, str, str, int]],
+    *,
+    overwrite: bool = False,
+) -> Path:
+    """Create ``db_path`` from ``(prompt, options, answer, correct)`` rows."""
+    path = Path(db_path)
+    if path.exists():
+        if not overwrite:
+            raise FileExistsError(f"Database already exists: {path}")
+        path.unlink()
+    conn = _connect(path)
+    try:
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO questions (id, prompt, options, answer, qtype, correct) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (idx, record.prompt, record.options_text, record.answer, record.qtype, correct)
+                for idx, (prompt, options, answer, correct) in enumerate(rows)
+                for record in (QuestionRecord.from_cells(idx, prompt, options, answer),)
+            ),
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return path
+
+
+def import_xlsx(
+    xlsx_path: str | Path,
+    db_path: str | Path | None = None,
+    *,
+    overwrite: bool = False,
+) -> Path:
+    """One-shot import of an Excel bank, including its saved progress."""
+    records, counts = saved_counts(xlsx_path, cache="off")
+    if db_path is None:
+        db_path = Path(xlsx_path).with_suffix(SQLITE_SUFFIX)
+    rows = (
+        (record.prompt, record.options_text, record.answer, count)
+        for record, count in zip(records, counts)
+    )
+    return import_records(db_path, rows, overwrite=overwrite)
+
+
+def export_xlsx(
+    db_path: str | Path,
+    xlsx_path: str | Path | None = None,
+    *,
+    overwrite: bool = False,
+) -> Path:
+    """Write the database to ``xlsx_path`` (default ``<stem>.export.xlsx``).
+
+    The default name differs from the workbook a database is usually
+    imported from, and an existing file is only replaced with ``overwrite``.
+    """
+    path = Path(db_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Question bank not found: {path}")
+    output = Path(xlsx_path) if xlsx_path is not None else path.with_suffix(".export.xlsx")
+    if output.exists() and not overwrite:
+        raise FileExistsError(f"Output already exists: {output}")
+    conn = _connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT prompt, options, answer, correct FROM questions ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+    columns = ["题目", "选项", "答案", SQLiteQuestionBank.correct_column]
+    write_xlsx_table(output, {name: [row[i] for row in rows] for i, name in enumerate(columns)})
+    return output
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import os
 import re
+from pathlib import Path
 from typing import Iterable, List, Optional, Sequence, Tuple
 
 VALID_CHOICES: Tuple[str, ...] = tuple("ABCDE")
 _OPTION_PATTERN = re.compile(r"^\s*([A-Z])\s*[\.\:：．、]\s*(.*)$")
+SIDECAR_DIR = ".quizbank"
 _PROMPT_PATTERN = re.compile(
     r"^\s*(?P<qtype>[\u4e00-\u9fa5A-Za-z]+题)?\s*(?P<num>\d+)?[\.\:：、]?\s*(?P<stem>.*)$"
 )
@@ -31,6 +34,22 @@ def normalize_answers(raw: str) -> List[str]:
     return sorted(ordered)
 
 
+def letters_to_mask(letters: Iterable[str]) -> int:
+    mask = 0
+    for letter in letters:
+        if letter in VALID_CHOICES:
+            mask |= 1 << VALID_CHOICES.index(letter)
+    return mask
+
+
+def mask_to_letters(mask: int) -> List[str]:
+    return [letter for bit, letter in enumerate(VALID_CHOICES) if mask >> bit & 1]
+
+
+def answer_mask(raw: str) -> int:
+    return letters_to_mask(normalize_answers(raw))
+
+
 def answers_match(user_letters: Sequence[str], expected: str) -> bool:
     expected_letters = normalize_answers(expected)
     return sorted(user_letters) == expected_letters
@@ -71,3 +90,25 @@ def parse_prompt(prompt: str) -> tuple[Optional[str], Optional[int], str]:
 def letters_to_string(letters: Iterable[str]) -> str:
     ordered = sorted(letters)
     return "".join(ordered)
+
+
+def sidecar_path(bank_path: str | Path, kind: str) -> Path:
+    """Return the path of an auxiliary file kept beside ``bank_path``.
+
+    Sidecars live in a hidden directory so that globbing ``*.xls*`` in the
+    bank folder never picks them up.
+    """
+    path = Path(bank_path)
+    return path.parent / SIDECAR_DIR / f"{path.name}.{kind}"
+
+
+StatKey = Optional[Tuple[int, int]]
+
+
+def stat_key(path: str | Path) -> StatKey:
+    """``(size, mtime_ns)`` of ``path``, or ``None`` if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,214 @@
+"""Notice when bank files change on disk.
+
+On Linux the watcher listens to inotify events on each bank's directory
+(editors usually save by writing a temporary file and renaming it over the
+original, so watching the file itself would lose track of it). Elsewhere, or
+when inotify is unavailable, it polls ``stat`` every ``interval`` seconds.
+Either way a change is only reported once the file has stopped changing for
+``settle`` seconds, and only if its size or mtime differs from the last
+report.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from .utils import StatKey, stat_key
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    def __init__(self) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories: dict[int, Path] = {}
+
+    def add(self, directory: Path) -> None:
+        if directory in self.directories.values():
+            return
+        wd = self._add(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {directory}")
+        self.directories[wd] = directory
+
+    def remove(self, directory: Path) -> None:
+        for wd, watched in list(self.directories.items()):
+            if watched == directory:
+                self._rm(self.fd, wd)
+                del self.directories[wd]
+
+    def read(self, timeout: float) -> list[Path]:
+        """Paths touched by events that arrived within ``timeout`` seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            directory = self.directories.get(wd)
+            if directory is not None and name:
+                paths.append(directory / os.fsdecode(name))
+        return paths
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Call ``callback(path)`` on a background thread when a watched file changes.
+
+    ``backend`` is ``"auto"`` (inotify if possible), ``"inotify"`` or
+    ``"poll"``; :attr:`backend` reports the one in use after :meth:`start`.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[Path], None],
+        *,
+        interval: float = 1.0,
+        settle: float = 0.5,
+        backend: str = "auto",
+    ) -> None:
+        if backend not in ("auto", "inotify", "poll"):
+            raise ValueError(f"Unknown watcher backend: {backend}")
+        self.callback = callback
+        self.interval = interval
+        self.settle = settle
+        self.backend = backend
+        self._keys: dict[Path, StatKey] = {}
+        self._observed: dict[Path, StatKey] = {}
+        self._due: dict[Path, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+
+    def watch(self, path: str | Path) -> None:
+        path = Path(path).absolute()
+        with self._lock:
+            self._keys[path] = self._observed[path] = stat_key(path)
+            if self._inotify is not None:
+                self._inotify.add(path.parent)
+
+    def unwatch(self, path: str | Path) -> None:
+        path = Path(path).absolute()
+        with self._lock:
+            self._keys.pop(path, None)
+            self._observed.pop(path, None)
+            self._due.pop(path, None)
+            if self._inotify is not None and all(p.parent != path.parent for p in self._keys):
+                self._inotify.remove(path.parent)
+
+    def start(self) -> "FileWatcher":
+        if self._thread is not None:
+            return self
+        if self.backend in ("auto", "inotify"):
+            try:
+                self._inotify = _Inotify()
+                with self._lock:
+                    for directory in {path.parent for path in self._keys}:
+                        self._inotify.add(directory)
+                self.backend = "inotify"
+            except (OSError, AttributeError):
+                if self._inotify is not None:
+                    self._inotify.close()
+                    self._inotify = None
+                if self.backend == "inotify":
+                    raise
+                self.backend = "poll"
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="quizbank-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self) -> "FileWatcher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if self._inotify is not None:
+                # watch/unwatch 在别的线程改这些字典，读取也要持锁
+                with self._lock:
+                    waits = [due - now for due in self._due.values()]
+                touched = self._inotify.read(max(0.0, min([self.interval, *waits])))
+            else:
+                self._stop.wait(self.interval)
+                with self._lock:
+                    touched = list(self._keys)
+            now = time.monotonic()
+            with self._lock:
+                for path in touched:
+                    if path in self._keys and (self._inotify is not None or path not in self._due):
+                        # 保存过程中会连续触发事件，推迟到文件稳定后再检查
+                        self._due[path] = now + (self.settle if self._inotify is not None else 0)
+                ready = [path for path, due in self._due.items() if due <= now]
+                for path in ready:
+                    del self._due[path]
+            for path in ready:
+                self._check(path)
+
+    def _check(self, path: Path) -> None:
+        """Report ``path`` once its stat key has held still for ``settle`` seconds."""
+        key = stat_key(path)
+        with self._lock:
+            if path not in self._keys:
+                return
+            if key != self._observed[path]:
+                self._observed[path] = key
+                self._due[path] = time.monotonic() + self.settle
+                return
+            if key is None or key == self._keys[path]:
+                return
+            self._keys[path] = key
+        try:
+            self.callback(path)
+        except Exception:  # pylint: disable=broad-except
+            pass
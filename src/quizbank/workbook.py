@@ -0,0 +1,173 @@
+"""Pandas-free reading and writing of single-sheet ``.xlsx`` banks.
+
+Banks are handled as column-major tables: an ordered ``dict`` mapping each
+header to the list of its cell values (``None`` for empty cells). Reading
+parses the first worksheet's XML directly, which is several times faster to
+start than importing pandas; legacy ``.xls`` files still go through
+``pandas.read_excel``.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import zipfile
+from pathlib import Path
+from typing import Iterable, Optional
+from xml.etree.ElementTree import fromstring, iterparse
+
+Table = dict[str, list]
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_XML_SUFFIXES = (".xlsx", ".xlsm")
+
+
+def _column_index(reference: str) -> int:
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index - 1
+
+
+def _first_sheet_path(archive: zipfile.ZipFile) -> str:
+    workbook = fromstring(archive.read("xl/workbook.xml"))
+    sheet = workbook.find(f"{_MAIN_NS}sheets/{_MAIN_NS}sheet")
+    if sheet is None:
+        raise ValueError("Workbook has no worksheets")
+    rel_id = sheet.get(f"{_REL_NS}id")
+    rels = fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{_PKG_REL_NS}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    return "xl/worksheets/sheet1.xml"
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> list[str]:
+    try:
+        data = archive.read("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings = []
+    for item in fromstring(data).iter(f"{_MAIN_NS}si"):
+        # 富文本由多个 <r><t> 组成；<rPh> 里的注音不属于单元格内容
+        parts = [node.text or "" for node in item.findall(f"{_MAIN_NS}t")]
+        parts += [node.text or "" for node in item.findall(f"{_MAIN_NS}r/{_MAIN_NS}t")]
+        strings.append("".join(parts))
+    return strings
+
+
+def _number(text: str):
+    try:
+        value = float(text)
+    except ValueError:
+        return text
+    return int(value) if value.is_integer() and "E" not in text.upper() else value
+
+
+def _cell_value(cell, kind: Optional[str], strings: list[str]):
+    if kind == "inlineStr":
+        return "".join(node.text or "" for node in cell.iter(f"{_MAIN_NS}t"))
+    value = cell.findtext(f"{_MAIN_NS}v")
+    if value is None:
+        return None
+    if kind == "s":
+        return strings[int(value)]
+    if kind in ("str", "e"):
+        return value
+    if kind == "b":
+        return value == "1"
+    return _number(value)
+
+
+def _unique_headers(cells: list) -> list[str]:
+    """Name columns the way ``pandas.read_excel`` does."""
+    headers: list[str] = []
+    seen: dict[str, int] = {}
+    for position, cell in enumerate(cells):
+        name = f"Unnamed: {position}" if cell is None or cell == "" else str(cell)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        headers.append(name)
+    return headers
+
+
+def _read_sheet_rows(path: Path) -> list[list]:
+    with zipfile.ZipFile(path) as archive:
+        strings = _shared_strings(archive)
+        rows: list[list] = []
+        with archive.open(_first_sheet_path(archive)) as handle:
+            for _, element in iterparse(handle):
+                if element.tag != f"{_MAIN_NS}row":
+                    continue
+                number = int(element.get("r", len(rows) + 1))
+                while len(rows) < number - 1:
+                    rows.append([])
+                values: list = []
+                for position, cell in enumerate(element.iter(f"{_MAIN_NS}c")):
+                    reference = cell.get("r")
+                    column = _column_index(reference) if reference else position
+                    value = _cell_value(cell, cell.get("t"), strings)
+                    if value is not None:
+                        values.extend([None] * (column + 1 - len(values)))
+                        values[column] = value
+                rows.append(values)
+                element.clear()
+    return rows
+
+
+def read_xlsx_table(path: str | Path) -> Table:
+    """Read the first sheet into a column-major table keyed by header."""
+    path = Path(path)
+    if path.suffix.lower() not in _XML_SUFFIXES:
+        return _read_with_pandas(path)
+    rows = _read_sheet_rows(path)
+    while rows and not any(value is not None for value in rows[-1]):
+        rows.pop()
+    if not rows:
+        return {}
+    width = max(len(row) for row in rows)
+    headers = _unique_headers(rows[0] + [None] * (width - len(rows[0])))
+    body = rows[1:]
+    return {
+        name: [row[position] if position < len(row) else None for row in body]
+        for position, name in enumerate(headers)
+    }
+
+
+def _read_with_pandas(path: Path) -> Table:
+    import pandas as pd
+
+    frame = pd.read_excel(path)
+    return {
+        str(name): [None if value != value else value for value in frame[name].tolist()]
+        for name in frame.columns
+    }
+
+
+def write_xlsx_rows(path: str | Path, header: list[str], rows: Iterable[Iterable]) -> int:
+    """Stream ``rows`` under ``header`` into a single-sheet workbook; return the row count."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    count = 0
+    for row in rows:
+        sheet.append([None if value != value else value for value in row])
+        count += 1
+    workbook.save(path)
+    return count
+
+
+def write_xlsx_table(path: str | Path, table: Table) -> None:
+    """Write ``table`` as a single-sheet workbook with a header row."""
+    write_xlsx_rows(path, list(table), zip(*table.values()))